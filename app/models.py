@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 from typing import List, Optional, Dict, Any
 from enum import Enum
+from scoring.tags import tag_mask
 
 class FitnessGoal(str, Enum):
     """Supported fitness goals."""
@@ -48,6 +49,17 @@ class MealItem(BaseModel):
     tags: List[MealTag] = Field(default_factory=list)
     confidence_score: float = Field(0.0, ge=0.0, le=1.0)
     nutrition_notes: Optional[str] = None
+    # Internal tag bitmask; never serialized or accepted from clients
+    _tag_mask: int = PrivateAttr(0)
+
+    @model_validator(mode="after")
+    def _set_tag_mask(self):
+        self._tag_mask = tag_mask(self.tags)
+        return self
+
+    @property
+    def tag_mask(self) -> int:
+        return self._tag_mask
 
 class RestaurantWithMeals(BaseModel):
     """Restaurant with its menu items."""
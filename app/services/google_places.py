@@ -1,16 +1,29 @@
 import googlemaps
-from typing import List, Optional
+import asyncio
+from typing import List, Optional, Dict, Any
 from app.models import Restaurant
 from app.utils.config import settings
+from utils.cache import CACHE_TTLS, get_cache, set_cache
+from utils.geocode_cache import geocode_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
+DETAILS_FIELDS = ['place_id', 'name', 'formatted_address', 'rating',
+                  'price_level', 'website', 'formatted_phone_number']
+# Nearby search never returns these, so a place needs a details lookup unless cached
+REQUIRED_DETAIL_FIELDS = ('website', 'formatted_address')
+# restaurant_finder caches a narrower field set; the prefixes must not collide
+DETAILS_CACHE_PREFIX = "place_details:service:"
+DETAILS_TTL = CACHE_TTLS.get('place_details_ttl', 604800)
+DETAILS_CONCURRENCY = 5
+
 class GooglePlacesService:
     """Service for interacting with Google Places API."""
     
     def __init__(self):
         self.client = googlemaps.Client(key=settings.GOOGLE_MAPS_API_KEY)
+        self.details_semaphore = asyncio.Semaphore(DETAILS_CONCURRENCY)
     
     async def search_restaurants(self, location: str, max_results: int = 10) -> List[Restaurant]:
         """
@@ -24,39 +37,35 @@ class GooglePlacesService:
             List of Restaurant objects
         """
         try:
-            # First, geocode the location to get coordinates
-            geocode_result = self.client.geocode(location)
-            if not geocode_result:
+            # First, geocode the location to get coordinates (cached per normalized address)
+            coords = await asyncio.to_thread(geocode_cache.get_or_fetch, location, self._geocode)
+            if not coords:
                 logger.error(f"Could not geocode location: {location}")
                 return []
             
-            lat = geocode_result[0]['geometry']['location']['lat']
-            lng = geocode_result[0]['geometry']['location']['lng']
+            lat = coords['lat']
+            lng = coords['lng']
             
             # Search for restaurants
-            places_result = self.client.places_nearby(
+            places_result = await asyncio.to_thread(
+                self.client.places_nearby,
                 location=(lat, lng),
                 radius=settings.SEARCH_RADIUS_METERS,
-                type='restaurant',
-                max_results=max_results
+                type='restaurant'
             )
+            places = places_result.get('results', [])[:max_results]
+            
+            # Get detailed information for all places concurrently
+            details_list = await asyncio.gather(*[self._get_place_details(place) for place in places])
             
             restaurants = []
-            for place in places_result.get('results', []):
-                # Get detailed information for each place
-                place_details = self.client.place(
-                    place['place_id'],
-                    fields=['place_id', 'name', 'formatted_address', 'rating', 
-                           'price_level', 'website', 'formatted_phone_number']
-                )
-                
-                details = place_details.get('result', {})
+            for place, details in zip(places, details_list):
                 restaurant = Restaurant(
                     place_id=details.get('place_id', place['place_id']),
                     name=details.get('name', place.get('name', 'Unknown')),
                     address=details.get('formatted_address', place.get('vicinity', 'Unknown')),
-                    rating=details.get('rating'),
-                    price_level=details.get('price_level'),
+                    rating=details.get('rating', place.get('rating')),
+                    price_level=details.get('price_level', place.get('price_level')),
                     website=details.get('website'),
                     phone=details.get('formatted_phone_number')
                 )
@@ -80,13 +89,7 @@ class GooglePlacesService:
             Restaurant object or None if not found
         """
         try:
-            place_details = self.client.place(
-                place_id,
-                fields=['place_id', 'name', 'formatted_address', 'rating', 
-                       'price_level', 'website', 'formatted_phone_number']
-            )
-            
-            details = place_details.get('result', {})
+            details = await self._get_place_details({'place_id': place_id})
             return Restaurant(
                 place_id=details.get('place_id'),
                 name=details.get('name', 'Unknown'),
@@ -99,4 +102,50 @@ class GooglePlacesService:
             
         except Exception as e:
             logger.error(f"Error getting restaurant details: {str(e)}")
-            return None 
\ No newline at end of file
+            return None 
+    
+    def _geocode(self, location: str) -> Optional[Dict[str, float]]:
+        """
+        Geocode a location string with the Google client (blocking).
+        
+        Args:
+            location: Location string (e.g., "Brooklyn, NY")
+            
+        Returns:
+            Dict with lat/lng, or None if the location could not be geocoded
+        """
+        geocode_result = self.client.geocode(location)
+        if not geocode_result:
+            return None
+        return geocode_result[0]['geometry']['location']
+    
+    async def _get_place_details(self, place: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get Place Details for a search result, from cache when possible.
+        
+        Args:
+            place: Place dict from a nearby search (must contain place_id)
+            
+        Returns:
+            Details dict, or the search result itself when it already has every needed field
+        """
+        if all(place.get(field) for field in REQUIRED_DETAIL_FIELDS):
+            return place
+        cache_key = f"{DETAILS_CACHE_PREFIX}{place['place_id']}"
+        cached = get_cache(cache_key)
+        if cached is not None:
+            return cached
+        try:
+            async with self.details_semaphore:
+                place_details = await asyncio.to_thread(
+                    self.client.place,
+                    place['place_id'],
+                    fields=DETAILS_FIELDS
+                )
+        except Exception as e:
+            logger.warning(f"Error fetching details for {place['place_id']}: {str(e)}")
+            return {}
+        details = place_details.get('result', {})
+        if details:
+            set_cache(cache_key, details, DETAILS_TTL)
+        return details
@@ -2,11 +2,24 @@ import openai
 from typing import List, Dict, Any
 from app.models import MealItem, MealTag, FitnessGoal
 from app.utils.config import settings
+from scoring.tags import canonical_tag, mask_of, TAG_BITS
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
+GOAL_TAG_MASKS = {
+    FitnessGoal.LOW_CARB_MUSCLE_GAIN: mask_of(MealTag.HIGH_PROTEIN.value, MealTag.LOW_CARB.value),
+    FitnessGoal.KETO: mask_of(MealTag.KETO.value, MealTag.LOW_CARB.value),
+    FitnessGoal.HIGH_PROTEIN: mask_of(MealTag.HIGH_PROTEIN.value),
+    FitnessGoal.LOW_CALORIE: mask_of(MealTag.LOW_CALORIE.value),
+    FitnessGoal.VEGETARIAN: mask_of(MealTag.VEGETARIAN.value),
+    FitnessGoal.VEGAN: mask_of(MealTag.VEGAN.value),
+    FitnessGoal.GLUTEN_FREE: mask_of(MealTag.GLUTEN_FREE.value)
+}
+HEALTHY_BIT = TAG_BITS[MealTag.HEALTHY.value]
+UNHEALTHY_BIT = TAG_BITS[MealTag.UNHEALTHY.value]
+
 class LLMAnalyzerService:
     """Service for analyzing menu items using OpenAI LLM."""
     
@@ -164,7 +177,7 @@ Return only the JSON array, no additional text.
                         tags = []
                         for tag_str in item_analysis.get('tags', []):
                             try:
-                                tag = MealTag(tag_str)
+                                tag = MealTag(canonical_tag(str(tag_str)) or tag_str)
                                 tags.append(tag)
                             except ValueError:
                                 logger.debug(f"Invalid tag: {tag_str}")
@@ -200,29 +213,21 @@ Return only the JSON array, no additional text.
         Returns:
             Filtered list of meal items
         """
-        goal_tag_mapping = {
-            FitnessGoal.LOW_CARB_MUSCLE_GAIN: [MealTag.HIGH_PROTEIN, MealTag.LOW_CARB],
-            FitnessGoal.KETO: [MealTag.KETO, MealTag.LOW_CARB],
-            FitnessGoal.HIGH_PROTEIN: [MealTag.HIGH_PROTEIN],
-            FitnessGoal.LOW_CALORIE: [MealTag.LOW_CALORIE],
-            FitnessGoal.VEGETARIAN: [MealTag.VEGETARIAN],
-            FitnessGoal.VEGAN: [MealTag.VEGAN],
-            FitnessGoal.GLUTEN_FREE: [MealTag.GLUTEN_FREE]
-        }
-        
-        target_tags = goal_tag_mapping.get(fitness_goal, [])
+        target = GOAL_TAG_MASKS.get(fitness_goal, 0)
         
-        # Score items based on goal alignment
+        # Score items based on goal alignment: one bit test per tag class,
+        # memoized per distinct tag mask
+        scores: Dict[int, float] = {}
         scored_items = []
         for item in meal_items:
-            score = 0
-            for tag in item.tags:
-                if tag in target_tags:
-                    score += 1
-                elif tag == MealTag.HEALTHY:
+            score = scores.get(item.tag_mask)
+            if score is None:
+                score = (item.tag_mask & target).bit_count()
+                if item.tag_mask & HEALTHY_BIT:
                     score += 0.5
-                elif tag == MealTag.UNHEALTHY:
+                if item.tag_mask & UNHEALTHY_BIT:
                     score -= 1
+                scores[item.tag_mask] = score
             
             # Only include items with positive scores
             if score > 0:
@@ -230,4 +235,4 @@ Return only the JSON array, no additional text.
         
         # Sort by score and return top items
         scored_items.sort(key=lambda x: x[1], reverse=True)
-        return [item for item, score in scored_items[:10]]  # Return top 10 
\ No newline at end of file
+        return [item for item, score in scored_items[:10]]  # Return top 10 
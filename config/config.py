@@ -1,16 +1,25 @@
-from pydantic import BaseSettings, Field
+try:
+    # pydantic 2 keeps the v1 BaseSettings (env= fields, class Config) here
+    from pydantic.v1 import BaseSettings, Field
+except ImportError:
+    from pydantic import BaseSettings, Field
 from functools import lru_cache
 import os
 
 class Settings(BaseSettings):
     ENV: str = Field("development", env="ENV")
     OPENAI_API_KEY: str = Field("", env="OPENAI_API_KEY")
+    INTENT_LLM_MODEL: str = Field("gpt-3.5-turbo-1106", env="INTENT_LLM_MODEL")
+    # Local intent parses below this confidence are escalated to the LLM
+    INTENT_LLM_THRESHOLD: float = Field(0.7, env="INTENT_LLM_THRESHOLD")
     GOOGLE_API_KEY: str = Field("", env="GOOGLE_API_KEY")
     REDIS_URI: str = Field("redis://localhost:6379/0", env="REDIS_URI")
     FALLBACK_MODE: bool = Field(False, env="FALLBACK_MODE")
     LOG_LEVEL: str = Field("INFO", env="LOG_LEVEL")
     RATE_LIMIT: int = Field(100, env="RATE_LIMIT")
     SCORING_WEIGHTS_PATH: str = Field("config/scoring_weights.yaml", env="SCORING_WEIGHTS_PATH")
+    PLACES_MAX_RESULTS: int = Field(20, env="PLACES_MAX_RESULTS")
+    NUTRITION_GPT_THRESHOLD: float = Field(0.45, env="NUTRITION_GPT_THRESHOLD")
 
     class Config:
         env_file = ".env"
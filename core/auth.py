@@ -3,6 +3,7 @@ import os
 from fastapi import Header, HTTPException, Request, status, Depends
 from typing import Optional
 import structlog
+from core.concurrency import bind_request_context
 
 logger = structlog.get_logger()
 
@@ -31,6 +32,7 @@ async def get_api_key(x_api_key: Optional[str] = Header(None, alias="X-API-Key")
     plan = API_KEYS[x_api_key]['plan']
     request.state.api_plan = plan
     request.state.api_key = x_api_key
+    bind_request_context(plan, getattr(request.state, 'request_id', None))
     logger.info("auth.success", api_key=x_api_key, plan=plan, request_id=getattr(request.state, 'request_id', None))
     return x_api_key
 
@@ -0,0 +1,123 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import time
+import yaml
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+import structlog
+
+logger = structlog.get_logger()
+
+CONCURRENCY_CONFIG_PATH = os.path.join(os.path.dirname(__file__), '../config/concurrency.yaml')
+
+try:
+    with open(CONCURRENCY_CONFIG_PATH, "r") as f:
+        CONCURRENCY_CONFIG = yaml.safe_load(f).get('concurrency', {})
+except Exception:
+    CONCURRENCY_CONFIG = {}
+
+POOL_LIMITS = CONCURRENCY_CONFIG.get('pools') or {"playwright": 3, "openai": 8}
+PLAN_WEIGHTS = CONCURRENCY_CONFIG.get('plan_weights') or {"free": 1, "premium": 3, "enterprise": 6}
+DEFAULT_PLAN = "free"
+MAX_TRACKED_FLOWS = 1024
+
+_current_plan = contextvars.ContextVar('governor_plan', default=DEFAULT_PLAN)
+_current_request_id = contextvars.ContextVar('governor_request_id', default=None)
+
+def bind_request_context(plan: Optional[str], request_id: Optional[str] = None):
+    """Attach the caller's API plan and request id to the current task context."""
+    _current_plan.set(plan or DEFAULT_PLAN)
+    _current_request_id.set(request_id)
+
+class _FairPool:
+    """
+    Counting semaphore that hands out free slots in weighted-fair order.
+
+    Each flow (one API request) gets virtual finish tags spaced 1/weight apart,
+    so a premium request advances three times faster than a free one and no
+    single request can monopolise the pool.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, int(limit))
+        self.active = 0
+        self.virtual_time = 0.0
+        self.finish_tags: Dict[Any, float] = {}
+        self.waiters = []
+        self._seq = itertools.count()
+
+    async def acquire(self, flow: Any, weight: float):
+        start = max(self.virtual_time, self.finish_tags.get(flow, 0.0))
+        finish = start + 1.0 / max(weight, 0.001)
+        self.finish_tags[flow] = finish
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            self.virtual_time = start
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (finish, next(self._seq), start, fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Slot was granted just before cancellation; hand it on
+                self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        while self.waiters:
+            _, _, start, fut = heapq.heappop(self.waiters)
+            if fut.done():
+                continue
+            self.active += 1
+            self.virtual_time = max(self.virtual_time, start)
+            fut.set_result(None)
+            break
+        if self.active == 0 and not self.waiters:
+            self.finish_tags.clear()
+            self.virtual_time = 0.0
+        elif len(self.finish_tags) > MAX_TRACKED_FLOWS:
+            self.finish_tags = {k: v for k, v in self.finish_tags.items() if v > self.virtual_time}
+
+class ConcurrencyGovernor:
+    def __init__(self, limits: Optional[Dict[str, int]] = None, plan_weights: Optional[Dict[str, float]] = None):
+        self.limits = dict(limits or POOL_LIMITS)
+        self.plan_weights = dict(plan_weights or PLAN_WEIGHTS)
+        self.pools: Dict[str, _FairPool] = {}
+
+    def _pool(self, name: str) -> _FairPool:
+        pool = self.pools.get(name)
+        if pool is None:
+            pool = _FairPool(name, self.limits.get(name, 1))
+            self.pools[name] = pool
+        return pool
+
+    @asynccontextmanager
+    async def slot(self, pool_name: str, plan: Optional[str] = None, request_id: Optional[str] = None):
+        plan = plan or _current_plan.get()
+        request_id = request_id or _current_request_id.get()
+        pool = self._pool(pool_name)
+        weight = self.plan_weights.get(plan, self.plan_weights.get(DEFAULT_PLAN, 1))
+        t0 = time.time()
+        await pool.acquire((plan, request_id), weight)
+        waited = time.time() - t0
+        if waited > 0.05:
+            logger.info("governor.waited", pool=pool_name, plan=plan, request_id=request_id, wait_ms=int(waited * 1000))
+        try:
+            yield
+        finally:
+            pool.release()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {"limit": pool.limit, "active": pool.active, "waiting": len(pool.waiters)}
+            for name, pool in self.pools.items()
+        }
+
+# Process-level singleton shared by every service instance
+governor = ConcurrencyGovernor()
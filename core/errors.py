@@ -38,6 +38,11 @@ class ParsingError(Exception):
         self.message = message
         self.details = details
 
+class MealDiscoveryError(Exception):
+    def __init__(self, message: str, details: str = None):
+        self.message = message
+        self.details = details
+
 class GoalMatchError(Exception):
     def __init__(self, message: str, suggestion: str = "Try a different goal."):
         self.message = message
@@ -1,48 +1,68 @@
 from core.fitness_goals import FITNESS_GOALS, GOAL_SYNONYMS
 from core.errors import GoalMatchError
-from fuzzywuzzy import fuzz
-from typing import Dict, Any, List
+from fuzzywuzzy import fuzz, utils
+from functools import lru_cache
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
+
+MATCH_THRESHOLD = 80
+SUGGESTION_THRESHOLD = 50
+MAX_SUGGESTIONS = 3
+MATCH_CACHE_SIZE = 1024
+
+def _token_set_ratio(tokens1: FrozenSet[str], tokens2: FrozenSet[str]) -> int:
+    """fuzz.token_set_ratio on already processed token sets; same scores."""
+    if not tokens1 or not tokens2:
+        return 0
+    sorted_sect = " ".join(sorted(tokens1 & tokens2))
+    combined_1to2 = (sorted_sect + " " + " ".join(sorted(tokens1 - tokens2))).strip()
+    combined_2to1 = (sorted_sect + " " + " ".join(sorted(tokens2 - tokens1))).strip()
+    return max(
+        fuzz.ratio(sorted_sect, combined_1to2),
+        fuzz.ratio(sorted_sect, combined_2to1),
+        fuzz.ratio(combined_1to2, combined_2to1),
+    )
 
 class FuzzyGoalMatcher:
     def __init__(self):
         self.goals = list(FITNESS_GOALS.keys())
         self.synonyms = GOAL_SYNONYMS
-        self.all_terms = list(self.synonyms.keys()) + self.goals
+        # Goal keys are already synonyms of themselves; keep first occurrences only
+        self.all_terms = list(dict.fromkeys(list(self.synonyms.keys()) + self.goals))
+        self._vocab: List[Tuple[FrozenSet[str], str]] = [
+            (frozenset(utils.full_process(term, force_ascii=True).split()), self.synonyms.get(term, term))
+            for term in self.all_terms
+        ]
+        self._lookup = lru_cache(maxsize=MATCH_CACHE_SIZE)(self._score)
 
     def match(self, input_str: str) -> Dict[str, Any]:
-        input_norm = input_str.strip().lower()
-        # Exact or synonym match
-        if input_norm in self.synonyms:
-            canonical = self.synonyms[input_norm]
+        goal, confidence, suggestions = self._lookup(input_str.strip().lower())
+        if goal:
             return {
-                "goal_name": canonical,
-                "confidence": 100,
+                "goal_name": goal,
+                "confidence": confidence,
                 "input_term": input_str,
                 "suggestions": []
             }
-        # Fuzzy match
-        best_score = 0
-        best_goal = None
-        for term in self.all_terms:
-            score = fuzz.token_set_ratio(input_norm, term)
-            if score > best_score:
-                best_score = score
-                best_goal = self.synonyms.get(term, term) if term in self.synonyms else term
-        if best_score >= 80:
-            return {
-                "goal_name": best_goal,
-                "confidence": best_score,
-                "input_term": input_str,
-                "suggestions": []
-            }
-        # Suggest closest goals
-        suggestions = self.suggest(input_norm)
         raise GoalMatchError(f"Could not confidently match '{input_str}' to a fitness goal.", suggestion=f"Did you mean: {', '.join(suggestions)}?")
 
     def suggest(self, input_norm: str) -> List[str]:
-        scored = []
-        for term in self.all_terms:
-            score = fuzz.token_set_ratio(input_norm, term)
-            scored.append((term, score))
-        scored.sort(key=lambda x: x[1], reverse=True)
-        return [self.synonyms.get(term, term) for term, score in scored[:3] if score > 50] 
\ No newline at end of file
+        return list(self._lookup(input_norm)[2])
+
+    def _score(self, input_norm: str) -> Tuple[Optional[str], int, Tuple[str, ...]]:
+        """(goal, confidence, suggestions) for a normalized input, from one pass over the vocabulary."""
+        # Exact or synonym match
+        if input_norm in self.synonyms:
+            return self.synonyms[input_norm], 100, ()
+        tokens = frozenset(utils.full_process(input_norm, force_ascii=True).split())
+        scored = [(_token_set_ratio(tokens, term_tokens), goal) for term_tokens, goal in self._vocab]
+        # First term with the top score wins, as in a strict > scan
+        best_score, best_goal = max(scored, key=lambda x: x[0]) if scored else (0, None)
+        if best_score >= MATCH_THRESHOLD:
+            return best_goal, best_score, ()
+        suggestions: List[str] = []
+        for score, goal in sorted(scored, key=lambda x: x[0], reverse=True):
+            if score <= SUGGESTION_THRESHOLD or len(suggestions) == MAX_SUGGESTIONS:
+                break
+            if goal not in suggestions:
+                suggestions.append(goal)
+        return None, best_score, tuple(suggestions)
@@ -0,0 +1,366 @@
+import json
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import openai
+import structlog
+from config.config import get_settings
+from core.concurrency import governor
+from core.errors import GoalMatchError
+from core.fitness_goals import GOAL_SYNONYMS
+from core.goal_matcher import FuzzyGoalMatcher
+from scoring.exclusions import INGREDIENT_SYNONYMS, normalize_ingredient
+from scoring.preference_index import term_spans
+from scoring.profiles import OVERRIDE_FIELDS
+from utils.aho_corasick import AhoCorasick
+from utils.cache import CACHE_TTLS, get_cache, set_cache
+
+logger = structlog.get_logger()
+
+INTENT_CACHE_SIZE = 2048
+LLM_CONFIDENCE = 0.9
+
+# Phrases that name a goal without being one of its synonyms
+GOAL_HINTS = {
+    "high protein": "muscle_gain",
+    "protein": "muscle_gain",
+    "protein packed": "muscle_gain",
+    "low carb": "keto",
+    "low carbs": "keto",
+    "low calorie": "weight_loss",
+    "low cal": "weight_loss",
+    "cutting": "weight_loss",
+    "plant based": "vegan_protein",
+}
+HINT_CONFIDENCE = 85
+
+COMMON_INGREDIENTS = (
+    "chicken", "beef", "steak", "pork", "lamb", "turkey", "duck", "salmon", "tuna", "shrimp", "fish",
+    "tofu", "tempeh", "egg", "bean", "lentil", "chickpea", "rice", "quinoa", "potato", "sweet potato",
+    "pasta", "noodle", "bread", "avocado", "broccoli", "spinach", "kale", "mushroom", "cheese",
+    "onion", "garlic", "pepper", "tomato", "corn", "oat", "yogurt", "nut", "peanut", "coconut",
+)
+
+# Words that carry no constraint; they neither add to nor count against confidence
+FILLER_WORDS = frozenset("""
+    a an the i im me my we want need would like looking look for find show get give some something
+    anything meal meals food foods dish dishes option options place places restaurant restaurants spot
+    lunch dinner breakfast brunch snack near nearby around here close please and or with to of in on
+    at that is are be good great tasty healthy quick cheap best bowl bowls plate plates
+""".split())
+
+# Words between an exclusion trigger and the ingredient: 'without the skin', 'no added sugar'
+EXCLUSION_SKIP_WORDS = FILLER_WORDS | {"any", "added", "extra"}
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_NUM = r"(\d+(?:\.\d+)?)"
+_UNIT = r"\s*(?:(?P<cal>k?cals?|calories|calorie|kcal)|g(?:rams?)?\s*(?:of\s+)?(?P<macro>protein|carbs?|carbohydrates?|fats?))\b"
+_MAX_OPS = r"under|below|less than|fewer than|at most|no more than|max|maximum|up to|<"
+_MIN_OPS = r"over|above|more than|at least|min|minimum|>"
+MACRO_RANGE_RE = re.compile(r"(?:between\s+)?" + _NUM + r"\s*(?:and|to)\s*" + _NUM + _UNIT)
+MACRO_RE = re.compile(r"(?:(?<![a-z])(?P<op>" + _MAX_OPS + "|" + _MIN_OPS + r")\s*)?" + _NUM + _UNIT)
+_MIN_OP_SET = frozenset(_MIN_OPS.split("|"))
+EXCLUSION_TRIGGER_RE = re.compile(r"\b(?:no|without|hold the|allergic to|exclude|excluding|avoid|avoiding|free of)\s+")
+FREE_SUFFIX_RE = re.compile(r"\b([a-z]+) free\b")
+_LIST_SEP_RE = re.compile(r"\s*(?:,|\band\b|\bor\b|/|&)?\s*")
+_NUMBER_RANGE_RE = re.compile(r"(\d)\s*[-\u2013]\s*(?=\d)")
+
+def normalize_query(query: str) -> str:
+    """
+    Lowercase, '500-700' to '500 to 700', other '_'/'-' to spaces, whitespace
+    collapsed; offsets below refer to this form.
+    """
+    text = _NUMBER_RANGE_RE.sub(r"\1 to ", (query or "").lower())
+    return " ".join(re.sub(r"[_\-]+", " ", text).split())
+
+def _build_goal_automaton() -> AhoCorasick:
+    phrases = {normalize_query(k): v for k, v in GOAL_SYNONYMS.items()}
+    for phrase, goal in GOAL_HINTS.items():
+        phrases.setdefault(phrase, "~" + goal)
+    return AhoCorasick(phrases, values=phrases)
+
+def _build_ingredient_automaton() -> AhoCorasick:
+    owner: Dict[str, str] = {}
+    terms = list(COMMON_INGREDIENTS)
+    for key, synonyms in INGREDIENT_SYNONYMS.items():
+        terms.append(key)
+        terms.extend(synonyms)
+    for term in terms:
+        canonical = normalize_ingredient(term)
+        for variant in (canonical, canonical + "s", canonical + "es"):
+            owner.setdefault(variant, canonical)
+    return AhoCorasick(owner, values=owner)
+
+_GOAL_AUTOMATON = _build_goal_automaton()
+_INGREDIENT_AUTOMATON = _build_ingredient_automaton()
+_goal_matcher = FuzzyGoalMatcher()
+
+class ParsedIntent:
+    """
+    Structured reading of a freeform query. macros uses the MacroOverrides
+    field names; confidence is the share of the query's content words the
+    parser accounted for, discounted by fuzzy goal matches.
+    """
+
+    __slots__ = ("query", "goal", "goal_confidence", "macros", "ingredients", "exclusions",
+                 "cuisine", "flavors", "confidence", "source")
+
+    def __init__(self, query: str, goal: Optional[str] = None, goal_confidence: int = 0,
+                 macros: Optional[Dict[str, float]] = None, ingredients=(), exclusions=(),
+                 cuisine=(), flavors=(), confidence: float = 0.0, source: str = "local"):
+        self.query = query
+        self.goal = goal
+        self.goal_confidence = goal_confidence
+        self.macros = tuple(sorted((macros or {}).items()))
+        self.ingredients = tuple(ingredients)
+        self.exclusions = tuple(exclusions)
+        self.cuisine = tuple(cuisine)
+        self.flavors = tuple(flavors)
+        self.confidence = confidence
+        self.source = source
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "query": self.query,
+            "goal": self.goal,
+            "goal_confidence": self.goal_confidence,
+            "macros": dict(self.macros),
+            "ingredients": list(self.ingredients),
+            "exclusions": list(self.exclusions),
+            "cuisine": list(self.cuisine),
+            "flavors": list(self.flavors),
+            "confidence": self.confidence,
+            "source": self.source,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ParsedIntent":
+        return cls(**{k: data[k] for k in cls.__slots__ if k in data})
+
+def _unique(values: List[str]) -> List[str]:
+    return list(dict.fromkeys(values))
+
+def _cover(covered: List[bool], start: int, end: int):
+    covered[start:end] = [True] * (end - start)
+
+def _macro_field(match: re.Match) -> str:
+    if match.group("cal"):
+        return "calories"
+    macro = match.group("macro")
+    return "protein" if macro == "protein" else "carbs" if macro.startswith("carb") else "fat"
+
+def _parse_macros(text: str, covered: List[bool]) -> Dict[str, float]:
+    """
+    'under 600 calories', 'at least 30g protein', '400 to 600 cal'. A bare
+    amount is a floor for protein and a ceiling for calories, carbs and fat.
+    """
+    macros: Dict[str, float] = {}
+    taken: List[Tuple[int, int]] = []
+    for match in MACRO_RANGE_RE.finditer(text):
+        field = _macro_field(match)
+        lo, hi = sorted((float(match.group(1)), float(match.group(2))))
+        macros[f"min_{field}"], macros[f"max_{field}"] = lo, hi
+        taken.append(match.span())
+    for match in MACRO_RE.finditer(text):
+        if any(s < match.end() and match.start() < e for s, e in taken):
+            continue
+        field = _macro_field(match)
+        op = match.group("op")
+        floor = op in _MIN_OP_SET if op else field == "protein"
+        macros[f"{'min' if floor else 'max'}_{field}"] = float(match.group(2))
+        taken.append(match.span())
+    for start, end in taken:
+        _cover(covered, start, end)
+    for key in ("min_calories", "max_calories"):
+        if key in macros:
+            macros[key] = int(macros[key])
+    return macros
+
+def _parse_exclusions(text: str, covered: List[bool]) -> List[str]:
+    """
+    'no peanuts or shellfish', 'without the cheese', 'gluten free'. After a
+    trigger and any articles, consecutive known ingredients are taken as a
+    list; an unknown word is taken alone.
+    """
+    exclusions: List[str] = []
+    # start -> (end, ingredient); matches come in end order, so the longest wins
+    known = {start: (end, value) for start, end, value in _INGREDIENT_AUTOMATON.iter_word_matches(text)}
+    for trigger in EXCLUSION_TRIGGER_RE.finditer(text):
+        if covered[trigger.start()]:
+            continue
+        pos = trigger.end()
+        word = _WORD_RE.match(text, pos)
+        while word and word.group() in EXCLUSION_SKIP_WORDS and pos not in known:
+            pos = min(word.end() + 1, len(text))
+            word = _WORD_RE.match(text, pos)
+        _cover(covered, trigger.start(), pos)
+        hit = known.get(pos)
+        if hit is None:
+            if word:
+                exclusions.append(normalize_ingredient(word.group()))
+                _cover(covered, *word.span())
+            continue
+        while hit is not None:
+            end, value = hit
+            exclusions.append(value)
+            _cover(covered, pos, end)
+            pos = _LIST_SEP_RE.match(text, end).end()
+            hit = known.get(pos) if pos > end else None
+    for match in FREE_SUFFIX_RE.finditer(text):
+        if not covered[match.start()]:
+            exclusions.append(normalize_ingredient(match.group(1)))
+            _cover(covered, *match.span())
+    return _unique(exclusions)
+
+def _parse_goal_phrase(text: str, covered: List[bool], blocked: List[bool]) -> Tuple[Optional[str], int]:
+    """Goal named by a synonym or hint phrase; the longest phrase wins."""
+    best: Optional[Tuple[int, str, int]] = None
+    for start, end, value in _GOAL_AUTOMATON.iter_word_matches(text):
+        if blocked[start]:
+            continue
+        _cover(covered, start, end)
+        confidence = HINT_CONFIDENCE if value.startswith("~") else 100
+        if best is None or end - start > best[0]:
+            best = (end - start, value.lstrip("~"), confidence)
+    return (best[1], best[2]) if best else (None, 0)
+
+def _parse_ingredients(text: str, covered: List[bool], blocked: List[bool]) -> List[str]:
+    ingredients = []
+    for start, end, value in _INGREDIENT_AUTOMATON.iter_word_matches(text):
+        if not blocked[start]:
+            ingredients.append(value)
+            _cover(covered, start, end)
+    # 'soy sauce' also matches 'soy'; keep the longest reading only
+    return [i for i in _unique(ingredients) if not any(i != o and i in o.split() for o in ingredients)]
+
+def _parse_preferences(text: str, covered: List[bool], blocked: List[bool]) -> Tuple[List[str], List[str]]:
+    cuisine, flavors = [], []
+    for start, end, terms in term_spans(text):
+        if blocked[start]:
+            continue
+        _cover(covered, start, end)
+        for term in terms:
+            kind, name = term.split(":", 1)
+            (cuisine if kind == "cuisine" else flavors).append(name)
+    return _unique(cuisine), _unique(flavors)
+
+def _content_words(text: str) -> List[re.Match]:
+    return [w for w in _WORD_RE.finditer(text) if w.group() not in FILLER_WORDS]
+
+def _fuzzy_goal(rest: List[re.Match]) -> Tuple[Optional[str], int, List[re.Match]]:
+    """Typo-tolerant goal over the unexplained words, then over adjacent pairs of them."""
+    candidates = [rest] + [rest[i:i + 2] for i in range(len(rest) - 1)] if len(rest) > 2 else [rest]
+    for words in candidates:
+        if not words:
+            continue
+        try:
+            result = _goal_matcher.match(" ".join(w.group() for w in words))
+        except GoalMatchError:
+            continue
+        return result["goal_name"], result["confidence"], words
+    return None, 0, []
+
+@lru_cache(maxsize=INTENT_CACHE_SIZE)
+def _parse(text: str) -> ParsedIntent:
+    covered = [False] * len(text)
+    macros = _parse_macros(text, covered)
+    exclusions = _parse_exclusions(text, covered)
+    # Goal, ingredient and cuisine readings may overlap each other, not an exclusion
+    blocked = covered[:]
+    goal, goal_confidence = _parse_goal_phrase(text, covered, blocked)
+    ingredients = _parse_ingredients(text, covered, blocked)
+    cuisine, flavors = _parse_preferences(text, covered, blocked)
+    words = _content_words(text)
+    discount = 1.0
+    if goal is None:
+        goal, goal_confidence, matched = _fuzzy_goal([w for w in words if not covered[w.start()]])
+        if goal:
+            discount = goal_confidence / 100
+            for w in matched:
+                _cover(covered, *w.span())
+    if words:
+        confidence = discount * sum(covered[w.start()] for w in words) / len(words)
+    else:
+        confidence = 1.0 if text else 0.0
+    return ParsedIntent(
+        query=text, goal=goal, goal_confidence=goal_confidence, macros=macros,
+        ingredients=[i for i in ingredients if i not in exclusions], exclusions=exclusions,
+        cuisine=cuisine, flavors=flavors, confidence=round(confidence, 3),
+    )
+
+def parse_query(query: str) -> ParsedIntent:
+    """Local, deterministic parse of a freeform query; memoized per normalized query."""
+    return _parse(normalize_query(query))
+
+INTENT_PROMPT = """
+You extract meal search constraints from a user's request. Output ONLY valid JSON:
+{"goal": "muscle_gain|weight_loss|keto|balanced|athletic_endurance|vegan_protein|null",
+ "macros": {"min_calories": null, "max_calories": null, "min_protein": null, "max_protein": null,
+            "min_carbs": null, "max_carbs": null, "min_fat": null, "max_fat": null},
+ "ingredients": [], "exclusions": [], "cuisine": [], "flavors": []}
+"""
+
+async def _llm_parse(text: str) -> Optional[Dict[str, Any]]:
+    settings = get_settings()
+    try:
+        openai.api_key = settings.OPENAI_API_KEY
+        async with governor.slot("openai"):
+            response = await openai.ChatCompletion.acreate(
+                model=settings.INTENT_LLM_MODEL,
+                messages=[{"role": "system", "content": INTENT_PROMPT}, {"role": "user", "content": text}],
+                temperature=0,
+                max_tokens=200,
+                response_format={"type": "json_object"},
+                timeout=10
+            )
+        return json.loads(response.choices[0].message.content)
+    except Exception as e:
+        logger.warn("intent.llm_failed", query=text, error=str(e))
+        return None
+
+def _strings(values: Any) -> List[str]:
+    return [str(v).strip().lower() for v in values or [] if v and str(v).strip()] if isinstance(values, list) else []
+
+def _merge(local: ParsedIntent, data: Dict[str, Any]) -> ParsedIntent:
+    """LLM fields fill what the local parse missed; local regex macros take precedence."""
+    goal, goal_confidence = local.goal, local.goal_confidence
+    if data.get("goal") and (goal is None or goal_confidence < 100):
+        try:
+            result = _goal_matcher.match(str(data["goal"]))
+            goal, goal_confidence = result["goal_name"], result["confidence"]
+        except GoalMatchError:
+            pass
+    macros = {}
+    for key, value in (data.get("macros") or {}).items():
+        if key in OVERRIDE_FIELDS and isinstance(value, (int, float)) and value >= 0:
+            macros[key] = int(value) if key.endswith("calories") else float(value)
+    macros.update(dict(local.macros))
+    exclusions = _unique(list(local.exclusions) + [normalize_ingredient(e) for e in _strings(data.get("exclusions"))])
+    return ParsedIntent(
+        query=local.query, goal=goal, goal_confidence=goal_confidence, macros=macros,
+        ingredients=[i for i in _unique(list(local.ingredients) + _strings(data.get("ingredients"))) if i not in exclusions],
+        exclusions=exclusions,
+        cuisine=_unique(list(local.cuisine) + _strings(data.get("cuisine"))),
+        flavors=_unique(list(local.flavors) + _strings(data.get("flavors"))),
+        confidence=max(local.confidence, LLM_CONFIDENCE), source="llm",
+    )
+
+async def parse_intent(query: str, allow_llm: bool = True) -> ParsedIntent:
+    """
+    Local parse first; only a low-confidence parse goes to the LLM, and its
+    merged result is cached per normalized query.
+    """
+    intent = parse_query(query)
+    if not allow_llm or not intent.query or intent.confidence >= get_settings().INTENT_LLM_THRESHOLD:
+        return intent
+    cache_key = f"intent:{intent.query}"
+    cached = get_cache(cache_key)
+    if cached:
+        return ParsedIntent.from_dict(cached)
+    data = await _llm_parse(intent.query)
+    if not isinstance(data, dict):
+        return intent
+    merged = _merge(intent, data)
+    set_cache(cache_key, merged.to_dict(), CACHE_TTLS.get('intent_ttl', 86400))
+    logger.info("intent.escalated", query=intent.query, local_confidence=intent.confidence)
+    return merged
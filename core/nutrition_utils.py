@@ -1,33 +1,27 @@
 from typing import Dict, Any, Optional
-from core.fitness_goals import FITNESS_GOALS
 from schemas.responses import NutritionInfo
+from scoring.profiles import compile_goal_profile
 
-def analyze_goal_fit(nutrition: NutritionInfo, goal: str) -> Dict[str, Any]:
-    goal_def = FITNESS_GOALS.get(goal)
-    if not goal_def:
+def analyze_goal_fit(nutrition: NutritionInfo, goal: str, overrides: Optional[Any] = None) -> Dict[str, Any]:
+    profile = compile_goal_profile(goal, overrides)
+    if not profile.known:
         return {"match_score": 0, "tags": ["unknown goal"], "reason": "Goal not found"}
-    macros = goal_def["macros"]
-    cal_range = goal_def["calories"]
     score = 1.0
     tags = []
+    calories = nutrition.calories
     # Calories
-    if not (cal_range[0] <= nutrition.calories <= cal_range[1]):
+    if not (profile.cal_lo <= calories <= profile.cal_hi):
         tags.append("calorie mismatch")
-        score -= 0.3
-    # Protein
-    p_pct = nutrition.protein * 4 / max(nutrition.calories, 1)
-    if not (macros["protein"][0] <= p_pct <= macros["protein"][1]):
-        tags.append("protein mismatch")
-        score -= 0.2
-    # Carbs
-    c_pct = nutrition.carbs * 4 / max(nutrition.calories, 1)
-    if not (macros["carbs"][0] <= c_pct <= macros["carbs"][1]):
-        tags.append("carb mismatch")
-        score -= 0.2
-    # Fat
-    f_pct = nutrition.fat * 9 / max(nutrition.calories, 1)
-    if not (macros["fat"][0] <= f_pct <= macros["fat"][1]):
-        tags.append("fat mismatch")
-        score -= 0.2
+        score -= profile.calorie_penalty
+    # Protein, carbs, fat: calorie share within the goal range, grams within any override
+    grams = (nutrition.protein, nutrition.carbs, nutrition.fat)
+    for i, (label, kcal) in enumerate((("protein mismatch", 4), ("carb mismatch", 4), ("fat mismatch", 9))):
+        pct = grams[i] * kcal / max(calories, 1)
+        in_range = profile.pct_lo[i] <= pct <= profile.pct_hi[i]
+        if in_range and profile.has_overrides:
+            in_range = profile.gram_lo[i] <= grams[i] <= profile.gram_hi[i]
+        if not in_range:
+            tags.append(label)
+            score -= profile.macro_penalty
     score = max(0, min(1, score))
-    return {"match_score": score, "tags": tags, "reason": None if score == 1 else "Macros/calories out of goal range"} 
\ No newline at end of file
+    return {"match_score": score, "tags": tags, "reason": None if score == 1 else "Macros/calories out of goal range"}
@@ -16,6 +16,8 @@ from core.auth import get_api_key
 from core.ratelimit import RateLimitMiddleware
 from core.errors import global_exception_handler
 from core.analytics import AnalyticsTracker
+from services.nutrition_estimator import NutritionEstimator
+from services.nutrition_refiner import nutrition_refiner
 import uuid
 analytics = AnalyticsTracker()
 
@@ -95,6 +97,15 @@ def create_app() -> FastAPI:
     app.include_router(debug_router, prefix="/api/v1")
     app.include_router(metrics_router, prefix="/api/v1")
 
+    # Background refinement of low-confidence nutrition estimates
+    @app.on_event("startup")
+    async def start_refiner():
+        nutrition_refiner.start(NutritionEstimator())
+
+    @app.on_event("shutdown")
+    async def stop_refiner():
+        await nutrition_refiner.stop()
+
     # Override global exception handler
     app.add_exception_handler(Exception, global_exception_handler)
 
@@ -2,9 +2,15 @@ import openai
 import json
 import logging
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import hashlib
+import re
 from datetime import datetime, timedelta
+from functools import lru_cache
+from core.errors import GoalMatchError
+from core.goal_matcher import FuzzyGoalMatcher
+from scoring.engine import MealBatch, goal_score, score_all_goals
+from scoring.tags import TAG_BITS, canonical_tag, meal_mask, tag_mask
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +20,18 @@ logger = logging.getLogger(__name__)
 CACHE_FILE = '.gcache_openai.json'
 CACHE_DURATION = timedelta(hours=24)
 
+# Macro-derived tags for meals with estimated nutrition: (macro, min share, max share)
+# of calories; 'calories' bounds the meal's calories instead
+MACRO_TAGS = {
+    'high_protein': ('protein', 0.3, None),
+    'low_carb': ('carbs', None, 0.2),
+    'keto': ('carbs', None, 0.1),
+    'low_fat': ('fat', None, 0.25),
+    'low_calorie': ('calories', None, 500),
+}
+CALORIES_PER_GRAM = {'protein': 4, 'carbs': 4, 'fat': 9}
+NEUTRAL_RELEVANCE = 0.5
+
 def load_openai_cache():
     """Load cached OpenAI responses."""
     if os.path.exists(CACHE_FILE):
@@ -32,10 +50,9 @@ def save_openai_cache(cache_data):
     except Exception as e:
         logger.warning(f"Failed to save OpenAI cache: {e}")
 
-def get_openai_cache_key(menu_text: str, goal: str) -> str:
-    """Generate cache key for OpenAI request."""
-    content = f"{menu_text[:500]}_{goal}"  # Use first 500 chars + goal
-    return hashlib.md5(content.encode()).hexdigest()
+def get_openai_cache_key(menu_text: str) -> str:
+    """Generate cache key for OpenAI request. The parse is goal-independent, so only the menu counts."""
+    return hashlib.md5(f"meals_v2_{menu_text}".encode()).hexdigest()
 
 def is_openai_cache_valid(timestamp_str: str) -> bool:
     """Check if cached OpenAI data is still valid."""
@@ -49,6 +66,10 @@ def extract_meals_from_menu(menu_text: str, goal: str) -> List[Dict[str, Any]]:
     """
     Extract and analyze meals from restaurant menu text using OpenAI.
     
+    The menu is parsed once, independent of the goal; the goal only picks a
+    column of each meal's goal_scores. Goals that match no fitness goal, and
+    meals without nutrition, fall back to the tags the goal names.
+    
     Args:
         menu_text: Raw text content from restaurant menu
         goal: User's fitness goal (e.g., "low carb muscle gain", "keto", "high protein")
@@ -58,8 +79,36 @@ def extract_meals_from_menu(menu_text: str, goal: str) -> List[Dict[str, Any]]:
         - name: Meal name
         - description: Meal description
         - tags: List of nutrition tags
+        - nutrition: Estimated calories, protein, carbs and fat (when given)
+        - goal_scores: Match score per goal, in scoring.engine.GOAL_NAMES order
         - relevance_score: Float between 0-1 indicating goal alignment
     """
+    return apply_goal(parse_menu_meals(menu_text), goal)
+
+def parse_menu_meals(menu_text: str) -> List[Dict[str, Any]]:
+    """
+    Goal-independent meal extraction, cached per menu text.
+    
+    Args:
+        menu_text: Raw text content from restaurant menu
+        
+    Returns:
+        List of cleaned meal dictionaries with goal_scores
+    """
+    # Scores are computed on every call rather than cached, so they follow
+    # scoring weight reloads
+    return add_goal_scores(extract_menu_meals(menu_text))
+
+def extract_menu_meals(menu_text: str) -> List[Dict[str, Any]]:
+    """
+    Meals extracted by OpenAI, cached per menu text for CACHE_DURATION.
+    
+    Args:
+        menu_text: Raw text content from restaurant menu
+        
+    Returns:
+        List of cleaned meal dictionaries
+    """
     
     # Get OpenAI API key from environment variable
     api_key = os.getenv('OPENAI_API_KEY')
@@ -71,23 +120,21 @@ def extract_meals_from_menu(menu_text: str, goal: str) -> List[Dict[str, Any]]:
     
     # Check cache first
     cache = load_openai_cache()
-    cache_key = get_openai_cache_key(menu_text, goal)
+    cache_key = get_openai_cache_key(menu_text)
     
     if cache_key in cache:
         cached_data = cache[cache_key]
         if is_openai_cache_valid(cached_data['timestamp']):
-            logger.info(f"Using cached OpenAI response for goal: {goal}")
+            logger.info("Using cached OpenAI response for menu")
             return cached_data['meals']
         else:
-            logger.info(f"OpenAI cache expired for goal: {goal}, calling API")
+            logger.info("OpenAI cache expired for menu, calling API")
     
     try:
         # Construct the prompt
-        system_message = "You are a nutrition AI assistant. Your job is to extract and score meals from a restaurant menu based on a fitness goal."
+        system_message = "You are a nutrition AI assistant. Your job is to extract meals from a restaurant menu and estimate their nutrition."
         
         user_message = f"""
-User's goal: {goal}
-
 Restaurant Menu:
 {menu_text}
 
@@ -95,10 +142,9 @@ Extract 3–8 individual meals from the menu. For each meal, return the followin
 - name
 - description
 - tags (e.g. high protein, low carb, vegan, gluten free, etc.)
-- relevance_score (0 to 1 based on alignment with user's goal)
+- nutrition: estimated calories, protein, carbs and fat in grams, as {{"calories": 0, "protein": 0, "carbs": 0, "fat": 0}}
 """
         
-        logger.info(f"Extracting meals for goal: {goal}")
         logger.info(f"Menu text length: {len(menu_text)} characters")
         
         # Call OpenAI API
@@ -126,7 +172,7 @@ Extract 3–8 individual meals from the menu. For each meal, return the followin
             'timestamp': datetime.now().isoformat()
         }
         save_openai_cache(cache)
-        logger.info(f"Cached OpenAI response for goal: {goal}")
+        logger.info("Cached OpenAI response for menu")
         
         logger.info(f"Successfully extracted {len(meals)} meals")
         return meals
@@ -147,6 +193,102 @@ Extract 3–8 individual meals from the menu. For each meal, return the followin
         logger.error(f"Error extracting meals: {str(e)}")
         raise Exception(f"Failed to extract meals: {str(e)}")
 
+@lru_cache(maxsize=256)
+def resolve_goal(goal: str) -> Optional[str]:
+    """
+    Map a free-text goal to a FITNESS_GOALS key.
+    
+    Args:
+        goal: User's fitness goal text
+        
+    Returns:
+        Goal key, or None when no goal matches confidently
+    """
+    try:
+        return FuzzyGoalMatcher().match(goal)["goal_name"]
+    except GoalMatchError:
+        logger.warning(f"Could not match goal '{goal}' to a fitness goal")
+        return None
+
+def apply_goal(meals: List[Dict[str, Any]], goal: str) -> List[Dict[str, Any]]:
+    """
+    Set relevance_score from each meal's goal score column, or from the
+    goal's keywords when the goal is not a known fitness goal or the meal
+    has no nutrition to score.
+    
+    Args:
+        meals: Cleaned meals with goal_scores
+        goal: User's fitness goal text
+        
+    Returns:
+        Copies of the meals with relevance_score for the goal
+    """
+    goal_key = resolve_goal(goal)
+    scored = []
+    for meal in meals:
+        score = goal_score(meal, goal_key) if goal_key and meal.get('nutrition') else None
+        if score is None:
+            score = keyword_relevance(meal, goal)
+        scored.append(dict(meal, relevance_score=score))
+    return scored
+
+@lru_cache(maxsize=256)
+def goal_tag_mask(goal: str) -> int:
+    """
+    Tag mask of the vocabulary tags a free-text goal names.
+    
+    Args:
+        goal: User's fitness goal text (e.g., "high protein", "low carb muscle gain")
+        
+    Returns:
+        Bitmask of the tags, 0 when the goal names none
+    """
+    words = re.findall(r"[a-z]+", goal.lower())
+    mask = 0
+    for size in (3, 2, 1):
+        for i in range(len(words) - size + 1):
+            tag = canonical_tag(" ".join(words[i:i + size]))
+            if tag:
+                mask |= TAG_BITS[tag]
+    return mask
+
+def macro_tag_mask(nutrition: Optional[Dict[str, float]]) -> int:
+    """
+    Tag mask implied by estimated nutrition.
+    
+    Args:
+        nutrition: Cleaned nutrition dict, or None
+        
+    Returns:
+        Bitmask of the MACRO_TAGS the nutrition meets
+    """
+    if not nutrition or not nutrition.get('calories'):
+        return 0
+    calories = nutrition['calories']
+    mask = 0
+    for tag, (macro, low, high) in MACRO_TAGS.items():
+        value = calories if macro == 'calories' else nutrition[macro] * CALORIES_PER_GRAM[macro] / calories
+        if (low is None or value >= low) and (high is None or value <= high):
+            mask |= TAG_BITS[tag]
+    return mask
+
+def keyword_relevance(meal: Dict[str, Any], goal: str) -> float:
+    """
+    Share of the tags a goal names that the meal carries or its nutrition meets.
+    
+    Args:
+        meal: Cleaned meal dictionary
+        goal: User's fitness goal text
+        
+    Returns:
+        Float between 0 and 1; NEUTRAL_RELEVANCE when the goal names no tags
+    """
+    wanted = goal_tag_mask(goal)
+    if not wanted:
+        return NEUTRAL_RELEVANCE
+    have = meal_mask(meal) | macro_tag_mask(meal.get('nutrition'))
+    return round(bin(have & wanted).count('1') / bin(wanted).count('1'), 3)
+
 def parse_openai_response(response: str) -> List[Dict[str, Any]]:
     """
     Parse the OpenAI response to extract meal information.
@@ -180,7 +322,6 @@ def parse_openai_response(response: str) -> List[Dict[str, Any]]:
         
         # If that fails, try to extract JSON from the response
         # Look for JSON array pattern
-        import re
         json_pattern = r'\[.*\]'
         json_match = re.search(json_pattern, cleaned_response, re.DOTALL)
         
@@ -223,11 +364,13 @@ def validate_and_clean_meals(meals_data: List[Dict[str, Any]]) -> List[Dict[str,
                 continue
             
             # Clean and validate fields
+            tags = validate_tags(meal.get('tags', []))
             cleaned_meal = {
                 'name': name,
                 'description': meal.get('description', '').strip(),
-                'tags': validate_tags(meal.get('tags', [])),
-                'relevance_score': validate_score(meal.get('relevance_score', 0.5))
+                'tags': tags,
+                'tag_mask': tag_mask(tags),
+                'nutrition': validate_nutrition(meal.get('nutrition'))
             }
             
             cleaned_meals.append(cleaned_meal)
@@ -238,6 +381,40 @@ def validate_and_clean_meals(meals_data: List[Dict[str, Any]]) -> List[Dict[str,
     
     return cleaned_meals
 
+def add_goal_scores(meals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Score every goal at once so a goal switch is a column lookup.
+    
+    Args:
+        meals: Cleaned meal data
+        
+    Returns:
+        Copies of the meals with goal_scores, in scoring.engine.GOAL_NAMES order
+    """
+    
+    if not meals:
+        return []
+    scores = score_all_goals(MealBatch.from_meals(meals))
+    return [dict(meal, goal_scores=[round(float(v), 3) for v in row]) for meal, row in zip(meals, scores)]
+
+def validate_nutrition(nutrition: Any) -> Optional[Dict[str, float]]:
+    """
+    Validate estimated nutrition.
+    
+    Args:
+        nutrition: Raw nutrition dict from meal data
+        
+    Returns:
+        Dict with non-negative calories, protein, carbs and fat, or None
+    """
+    
+    if not isinstance(nutrition, dict):
+        return None
+    try:
+        return {key: max(0.0, float(nutrition[key])) for key in ('calories', 'protein', 'carbs', 'fat')}
+    except (KeyError, ValueError, TypeError):
+        return None
+
 def validate_tags(tags: Any) -> List[str]:
     """
     Validate and clean tags.
@@ -257,23 +434,6 @@ def validate_tags(tags: Any) -> List[str]:
     else:
         return []
 
-def validate_score(score: Any) -> float:
-    """
-    Validate and clean relevance score.
-    
-    Args:
-        score: Raw score from meal data
-        
-    Returns:
-        Float between 0 and 1
-    """
-    
-    try:
-        score_float = float(score)
-        return max(0.0, min(1.0, score_float))  # Clamp between 0 and 1
-    except (ValueError, TypeError):
-        return 0.5  # Default score
-
 def test_meal_extractor():
     """Test function to demonstrate usage."""
     # Sample menu text
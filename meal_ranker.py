@@ -1,6 +1,10 @@
 from typing import List, Dict, Any
+import heapq
 import logging
 
+from scoring.tags import meal_mask
+from scoring.weights import get_weights
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,75 +26,50 @@ def rank_meals(meals: List[Dict[str, Any]], top_n: int = 5) -> List[Dict[str, An
         logger.warning("No meals provided for ranking")
         return []
     
-    # Define goal-aligned tags and their weights
-    goal_aligned_tags = {
-        'high_protein': 3,
-        'low_carb': 2,
-        'keto': 3,
-        'low_calorie': 1,
-        'vegetarian': 1,
-        'vegan': 1,
-        'gluten_free': 1,
-        'healthy': 1,
-        'balanced': 1,
-        'lean': 2,
-        'protein_rich': 3,
-        'carb_free': 2,
-        'fat_burning': 2,
-        'muscle_building': 3
-    }
+    # Goal-aligned tag weights from config/scoring_weights.yaml, one snapshot per call
+    goal_aligned_tags = get_weights().tags
     
-    def calculate_tag_score(meal: Dict[str, Any]) -> int:
+    def calculate_tag_score(meal: Dict[str, Any]) -> float:
         """
         Calculate a score based on goal-aligned tags.
         
         Args:
-            meal: Meal dictionary with tags
+            meal: Meal dictionary with tags (and tag_mask when set at ingest)
             
         Returns:
-            Integer score based on goal-aligned tags
+            Score based on goal-aligned tags, one lookup per meal
         """
-        tags = meal.get('tags', [])
-        if not tags:
-            return 0
-        
-        score = 0
-        for tag in tags:
-            tag_lower = tag.lower().replace(' ', '_')
-            if tag_lower in goal_aligned_tags:
-                score += goal_aligned_tags[tag_lower]
-        
-        return score
+        return goal_aligned_tags.score(meal_mask(meal))
     
-    def meal_sort_key(meal: Dict[str, Any]) -> tuple:
+    def meal_sort_key(index: int, meal: Dict[str, Any]) -> tuple:
         """
-        Create a sort key for meals: (relevance_score, tag_score).
+        Create a sort key for meals: (relevance_score, tag_score, position).
         
         Args:
+            index: Position of the meal in the input list
             meal: Meal dictionary
             
         Returns:
-            Tuple for sorting (higher values first)
+            Tuple for sorting (higher scores first, input order on ties)
         """
         relevance_score = meal.get('relevance_score', 0.0)
         tag_score = calculate_tag_score(meal)
         
         # Return negative values so higher scores come first
-        return (-relevance_score, -tag_score)
+        return (-relevance_score, -tag_score, index)
     
     try:
-        # Sort meals by relevance score (descending) and tag score (descending)
-        ranked_meals = sorted(meals, key=meal_sort_key)
-        
-        # Take top N meals
-        top_meals = ranked_meals[:top_n]
+        # Keep only the best top_n while scanning: O(n log top_n), and each
+        # meal's tag score is computed once
+        keyed = [(meal_sort_key(i, meal), meal) for i, meal in enumerate(meals)]
+        ranked = heapq.nsmallest(top_n, keyed, key=lambda pair: pair[0])
+        top_meals = [meal for _, meal in ranked]
         
         logger.info(f"Ranked {len(meals)} meals, returning top {len(top_meals)}")
         
         # Log ranking details for debugging
-        for i, meal in enumerate(top_meals, 1):
-            tag_score = calculate_tag_score(meal)
-            logger.debug(f"Rank {i}: {meal['name']} (score: {meal['relevance_score']:.2f}, tags: {tag_score})")
+        for i, (key, meal) in enumerate(ranked, 1):
+            logger.debug(f"Rank {i}: {meal['name']} (score: {meal['relevance_score']:.2f}, tags: {-key[1]})")
         
         return top_meals
         
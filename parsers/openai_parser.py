@@ -6,6 +6,8 @@ from config.config import get_settings
 import structlog
 import time
 from core.analytics import log_event
+from core.concurrency import governor
+from scoring.tags import tag_mask
 
 logger = structlog.get_logger()
 
@@ -62,13 +64,14 @@ class OpenAIParser:
                     *FEW_SHOT_EXAMPLES,
                     {"role": "user", "content": raw_text}
                 ]
-                response = await openai.ChatCompletion.acreate(
-                    model=self.model,
-                    messages=messages,
-                    temperature=self.temperature,
-                    response_format={"type": "json_object"},
-                    timeout=30
-                )
+                async with governor.slot("openai"):
+                    response = await openai.ChatCompletion.acreate(
+                        model=self.model,
+                        messages=messages,
+                        temperature=self.temperature,
+                        response_format={"type": "json_object"},
+                        timeout=30
+                    )
                 content = response.choices[0].message.content
                 data = self._safe_json_load(content)
                 if data and "meals" in data:
@@ -81,6 +84,7 @@ class OpenAIParser:
                     for meal in data["meals"]:
                         meal["confidence_level"] = "high"
                         meal["estimation_origin"] = "gpt"
+                        meal["tag_mask"] = tag_mask(meal.get("tags"))
                     return {
                         "meals": data["meals"],
                         "source": "GPT",
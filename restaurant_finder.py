@@ -5,6 +5,9 @@ from typing import List, Dict, Optional
 from urllib.parse import quote
 import requests_cache
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from utils.cache import CACHE_TTLS, get_cache, set_cache
+from utils.geocode_cache import geocode_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -18,6 +21,75 @@ requests_cache.install_cache(
     allowable_codes=(200, 201, 202, 203, 204, 205, 206, 207, 208, 226)
 )
 
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+DETAILS_URL = "https://maps.googleapis.com/maps/api/place/details/json"
+# Only name/website/place_id are requested; app.services.google_places caches a wider set
+DETAILS_CACHE_PREFIX = "place_details:finder:"
+DETAILS_TTL = CACHE_TTLS.get('place_details_ttl', 604800)
+DETAILS_CONCURRENCY = 5
+
+def geocode_location(location: str, api_key: str) -> Optional[Dict]:
+    """
+    Geocode a location string with the Google Geocoding API.
+    
+    Args:
+        location: Location string (e.g., "Brooklyn, NY")
+        api_key: Google API key
+        
+    Returns:
+        Dict with lat/lng, or None if geocoding failed
+    """
+    geocode_params = {
+        'address': location,
+        'key': api_key
+    }
+    
+    logger.info(f"Geocoding location: {location}")
+    geocode_response = requests.get(GEOCODE_URL, params=geocode_params)
+    geocode_response.raise_for_status()
+    geocode_data = geocode_response.json()
+    
+    if geocode_data['status'] != 'OK':
+        logger.error(f"Geocoding failed: {geocode_data['status']}")
+        return None
+    
+    return geocode_data['results'][0]['geometry']['location']
+
+def get_place_details(place: Dict, api_key: str) -> Optional[Dict]:
+    """
+    Get the name/website details for a place, cached per place_id.
+    
+    Args:
+        place: Place dict from a nearby search
+        api_key: Google API key
+        
+    Returns:
+        Details dict with name, website and place_id, or None if the lookup failed
+    """
+    # Nearby search results don't carry a website; skip the lookup if one is present
+    if place.get('website'):
+        return {'name': place.get('name'), 'website': place['website'], 'place_id': place['place_id']}
+    
+    cache_key = f"{DETAILS_CACHE_PREFIX}{place['place_id']}"
+    cached = get_cache(cache_key)
+    if cached is not None:
+        return cached
+    
+    details_params = {
+        'place_id': place['place_id'],
+        'fields': 'name,website,place_id',
+        'key': api_key
+    }
+    details_response = requests.get(DETAILS_URL, params=details_params)
+    details_response.raise_for_status()
+    details_data = details_response.json()
+    
+    if details_data['status'] != 'OK':
+        return None
+    
+    set_cache(cache_key, details_data['result'], DETAILS_TTL)
+    return details_data['result']
+
 def get_nearby_restaurants(location: str, keyword: str = "healthy food") -> List[Dict]:
     """
     Find nearby restaurants using Google Places API.
@@ -41,24 +113,11 @@ def get_nearby_restaurants(location: str, keyword: str = "healthy food") -> List
     restaurants = []
     
     try:
-        # Step 1: Geocode the location to get coordinates
-        geocode_url = "https://maps.googleapis.com/maps/api/geocode/json"
-        geocode_params = {
-            'address': location,
-            'key': api_key
-        }
-        
-        logger.info(f"Geocoding location: {location}")
-        geocode_response = requests.get(geocode_url, params=geocode_params)
-        geocode_response.raise_for_status()
-        geocode_data = geocode_response.json()
-        
-        if geocode_data['status'] != 'OK':
-            logger.error(f"Geocoding failed: {geocode_data['status']}")
+        # Step 1: Geocode the location to get coordinates (cached per normalized address)
+        location_data = geocode_cache.get_or_fetch(location, lambda loc: geocode_location(loc, api_key))
+        if not location_data:
             return []
         
-        # Extract coordinates
-        location_data = geocode_data['results'][0]['geometry']['location']
         lat = location_data['lat']
         lng = location_data['lng']
         
@@ -87,31 +146,19 @@ def get_nearby_restaurants(location: str, keyword: str = "healthy food") -> List
             logger.info("No restaurants found")
             return []
         
-        # Step 3: Get detailed information for each restaurant
-        for place in places_data.get('results', []):
-            place_id = place['place_id']
-            
-            # Get detailed place information
-            details_url = "https://maps.googleapis.com/maps/api/place/details/json"
-            details_params = {
-                'place_id': place_id,
-                'fields': 'name,website,place_id',
-                'key': api_key
-            }
-            
-            details_response = requests.get(details_url, params=details_params)
-            details_response.raise_for_status()
-            details_data = details_response.json()
-            
-            if details_data['status'] == 'OK':
-                place_details = details_data['result']
-                
+        # Step 3: Get detailed information for all restaurants concurrently
+        places = places_data.get('results', [])
+        with ThreadPoolExecutor(max_workers=DETAILS_CONCURRENCY) as pool:
+            details_list = list(pool.map(lambda p: get_place_details(p, api_key), places))
+        
+        for place, place_details in zip(places, details_list):
+            if place_details:
                 # Only include restaurants with websites
                 if 'website' in place_details and place_details['website']:
                     restaurant = {
                         'name': place_details.get('name', 'Unknown'),
                         'website': place_details['website'],
-                        'place_id': place_details.get('place_id', place_id)
+                        'place_id': place_details.get('place_id', place['place_id'])
                     }
                     restaurants.append(restaurant)
                     logger.info(f"Found restaurant: {restaurant['name']}")
@@ -1,12 +1,18 @@
 from fastapi import APIRouter, Depends, Path
-from schemas.meals import FindMealsRequest, FreeformRequest
+from schemas.meals import FindMealsRequest
+from schemas.requests import FreeformMealSearchRequest, NutritionAnalysisRequest
 from schemas.goals import GoalDefinition, NutritionRule, ConfidenceLevel
-from schemas.responses import ApiResponse
+from schemas.responses import ApiResponse, NutritionInfo
 from typing import List
 from datetime import datetime
 from core.analytics import log_event
+from core.fitness_goals import FITNESS_GOALS
+from core.intent_parser import parse_intent
+from core.nutrition_utils import analyze_goal_fit
+from services.nutrition_estimator import NutritionEstimator
 
 router = APIRouter(prefix="/meals", tags=["Meals"])
+nutrition_estimator = NutritionEstimator()
 
 @router.post("/find", response_model=ApiResponse)
 async def find_meals(request: FindMealsRequest):
@@ -22,13 +28,36 @@ async def find_meals(request: FindMealsRequest):
     return ApiResponse.success_response({"meals": []})
 
 @router.post("/freeform", response_model=ApiResponse)
-async def freeform_query(request: FreeformRequest):
+async def freeform_query(request: FreeformMealSearchRequest):
+    intent = await parse_intent(request.query)
     log_event('goal_search', {
         'query': request.query,
-        'location': request.location.dict()
+        'location': request.location.dict(),
+        'intent': intent.to_dict()
     })
     # Placeholder: return empty list
-    return ApiResponse.success_response({"meals": []})
+    return ApiResponse.success_response({"meals": [], "intent": intent.to_dict()})
+
+@router.post("/nutrition", response_model=ApiResponse)
+async def analyze_nutrition(request: NutritionAnalysisRequest):
+    # high_confidence skips the template tiers and asks the LLM directly
+    result = await nutrition_estimator.estimate(request.meal_description, "", high_confidence=request.high_confidence)
+    nutrition = NutritionInfo(**result["nutrition"])
+    data = {
+        "nutrition": nutrition.model_dump(),
+        "origin": result["origin"],
+        "confidence": result["confidence"],
+        "confidence_score": result.get("confidence_score")
+    }
+    if request.context in FITNESS_GOALS:
+        data["goal_fit"] = analyze_goal_fit(nutrition, request.context)
+    log_event('nutrition_analysis', {
+        'meal_description': request.meal_description,
+        'context': request.context,
+        'high_confidence': request.high_confidence,
+        'origin': result["origin"]
+    })
+    return ApiResponse.success_response(data)
 
 @router.get("/goals", response_model=ApiResponse)
 async def get_goals():
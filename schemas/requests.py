@@ -36,4 +36,5 @@ class FreeformMealSearchRequest(BaseModel):
 
 class NutritionAnalysisRequest(BaseModel):
     meal_description: str = Field(..., example="Grilled salmon with brown rice and broccoli", description="Meal description for nutrition analysis")
-    context: Optional[str] = Field(None, example="keto", description="Optional goal or context for analysis") 
\ No newline at end of file
+    context: Optional[str] = Field(None, example="keto", description="Optional goal or context for analysis")
+    high_confidence: bool = Field(False, description="Always use the LLM estimate instead of a template estimate") 
\ No newline at end of file
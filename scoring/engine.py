@@ -0,0 +1,119 @@
+import numpy as np
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+from core.fitness_goals import FITNESS_GOALS
+from scoring.profiles import MACROS, compile_goal_profile
+from scoring.weights import ScoringWeights, get_weights
+
+KCAL_PER_GRAM = np.array([4.0, 4.0, 9.0])
+# Column order of per-meal goal score vectors
+GOAL_NAMES = tuple(FITNESS_GOALS)
+GOAL_INDEX = {goal: i for i, goal in enumerate(GOAL_NAMES)}
+MISMATCH_LABELS = ("calorie mismatch", "protein mismatch", "carb mismatch", "fat mismatch")
+# All 16 combinations of the four mismatch flags, indexed by bitmask
+_TAG_TABLE = [
+    [label for bit, label in enumerate(MISMATCH_LABELS) if code & (1 << bit)]
+    for code in range(1 << len(MISMATCH_LABELS))
+]
+
+class MealBatch:
+    """Columnar (calories, protein, carbs, fat) view over a list of meal dicts."""
+
+    def __init__(self, calories: np.ndarray, protein: np.ndarray, carbs: np.ndarray, fat: np.ndarray):
+        self.calories = np.asarray(calories, dtype=np.float64)
+        self.grams = np.column_stack([protein, carbs, fat]).astype(np.float64)
+
+    @classmethod
+    def from_meals(cls, meals: List[Dict[str, Any]]) -> "MealBatch":
+        cols = np.full((len(meals), 4), np.nan)
+        for i, meal in enumerate(meals):
+            nutrition = meal.get("nutrition") or meal.get("nutrition_estimate") or {}
+            for j, key in enumerate(("calories",) + MACROS):
+                value = nutrition.get(key)
+                if value is not None:
+                    cols[i, j] = value
+        return cls(cols[:, 0], cols[:, 1], cols[:, 2], cols[:, 3])
+
+    def __len__(self) -> int:
+        return len(self.calories)
+
+    @property
+    def known(self) -> np.ndarray:
+        return ~(np.isnan(self.calories) | np.isnan(self.grams).any(axis=1))
+
+    def macro_pct(self) -> np.ndarray:
+        """(n, 3) share of calories from protein, carbs and fat."""
+        return self.grams * KCAL_PER_GRAM / np.maximum(self.calories, 1)[:, None]
+
+def score_batch(batch: MealBatch, goal: str, overrides: Any = None, weights: Optional[ScoringWeights] = None) -> Dict[str, Any]:
+    """
+    Goal fit for every meal in one pass; same rules as analyze_goal_fit.
+
+    Returns match_score (n,), macro_pct (n, 3), deviation (n, 3) of each macro
+    share from its goal range (0 when inside), calorie_deviation (n,) and
+    mismatch (n, 4) flags in MISMATCH_LABELS order.
+    """
+    n = len(batch)
+    profile = compile_goal_profile(goal, overrides, weights)
+    if not profile.known:
+        return {"match_score": np.zeros(n), "macro_pct": np.zeros((n, 3)), "deviation": np.zeros((n, 3)),
+                "calorie_deviation": np.zeros(n), "mismatch": np.zeros((n, 4), dtype=bool), "goal_known": False}
+    pct = batch.macro_pct()
+    deviation = np.maximum(profile.pct_lo - pct, 0) + np.maximum(pct - profile.pct_hi, 0)
+    cal_dev = np.maximum(profile.cal_lo - batch.calories, 0) + np.maximum(batch.calories - profile.cal_hi, 0)
+    macro_ok = (pct >= profile.pct_lo) & (pct <= profile.pct_hi)
+    if profile.has_overrides:
+        macro_ok &= (batch.grams >= profile.gram_lo) & (batch.grams <= profile.gram_hi)
+    mismatch = np.column_stack([
+        ~((batch.calories >= profile.cal_lo) & (batch.calories <= profile.cal_hi)),
+        ~macro_ok,
+    ])
+    penalty = mismatch[:, 0] * profile.calorie_penalty + mismatch[:, 1:].sum(axis=1) * profile.macro_penalty
+    score = np.clip(1.0 - penalty, 0, 1)
+    score[~batch.known] = 0
+    return {"match_score": score, "macro_pct": pct, "deviation": deviation,
+            "calorie_deviation": cal_dev, "mismatch": mismatch, "goal_known": True}
+
+@lru_cache(maxsize=4)
+def _goal_matrix(weights: ScoringWeights) -> Tuple[np.ndarray, ...]:
+    """Bounds of every goal stacked along a goal axis, with one weights snapshot's penalties."""
+    profiles = [compile_goal_profile(g, weights=weights) for g in GOAL_NAMES]
+    return (np.array([p.cal_lo for p in profiles]), np.array([p.cal_hi for p in profiles]),
+            np.stack([p.pct_lo for p in profiles]), np.stack([p.pct_hi for p in profiles]),
+            weights.calorie_penalty, weights.macro_penalty)
+
+def score_all_goals(batch: MealBatch, weights: Optional[ScoringWeights] = None) -> np.ndarray:
+    """
+    (n, len(GOAL_NAMES)) match scores for every goal in one broadcast pass;
+    column g equals score_batch(batch, GOAL_NAMES[g])["match_score"].
+    """
+    cal_lo, cal_hi, pct_lo, pct_hi, cal_penalty, macro_penalty = _goal_matrix(weights or get_weights())
+    cal = batch.calories[:, None]
+    pct = batch.macro_pct()[:, None, :]
+    cal_bad = ~((cal >= cal_lo) & (cal <= cal_hi))
+    macro_bad = (~((pct >= pct_lo) & (pct <= pct_hi))).sum(axis=2)
+    scores = np.clip(1.0 - cal_bad * cal_penalty - macro_bad * macro_penalty, 0, 1)
+    scores[~batch.known] = 0
+    return scores
+
+def goal_score(meal: Dict[str, Any], goal: str) -> Optional[float]:
+    """A meal's precomputed score for one goal, or None when it has no score vector."""
+    scores = meal.get("goal_scores")
+    column = GOAL_INDEX.get(goal)
+    if not scores or column is None:
+        return None
+    return scores[column]
+
+def mismatch_tags(result: Dict[str, Any]) -> List[List[str]]:
+    """Per-meal tag lists from the mismatch flags, via a 16-entry lookup table."""
+    if not result["goal_known"]:
+        return [["unknown goal"] for _ in range(len(result["match_score"]))]
+    codes = result["mismatch"] @ (1 << np.arange(len(MISMATCH_LABELS)))
+    return [_TAG_TABLE[c] for c in codes.tolist()]
+
+def rank_indices(result: Dict[str, Any], tiebreak: Optional[np.ndarray] = None) -> np.ndarray:
+    """Meal indices by match_score desc, then tiebreak desc, stable."""
+    scores = result["match_score"]
+    if tiebreak is None:
+        return np.argsort(-scores, kind="stable")
+    return np.lexsort((-tiebreak, -scores))
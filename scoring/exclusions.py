@@ -0,0 +1,127 @@
+import json
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Set
+import numpy as np
+from utils.aho_corasick import AhoCorasick
+
+SYNONYMS_PATH = os.path.join(os.path.dirname(__file__), '../data/ingredient_synonyms.json')
+EXCEPTIONS_PATH = os.path.join(os.path.dirname(__file__), '../data/ingredient_exceptions.json')
+try:
+    with open(SYNONYMS_PATH) as f:
+        INGREDIENT_SYNONYMS: Dict[str, List[str]] = json.load(f)
+except Exception:
+    INGREDIENT_SYNONYMS = {}
+# Words and phrases that contain an ingredient's name without containing it (buckwheat, peanut butter)
+try:
+    with open(EXCEPTIONS_PATH) as f:
+        INGREDIENT_EXCEPTIONS: Dict[str, List[str]] = json.load(f)
+except Exception:
+    INGREDIENT_EXCEPTIONS = {}
+
+MATCHER_CACHE_SIZE = 256
+# Shorter terms (egg, ham, nut) only match whole words: eggplant, hamburger, nutmeg
+MIN_COMPOUND_LENGTH = 4
+# "gluten-free", "dairy free", "flourless" and tags like gluten_free name the absence of the ingredient
+_ABSENCE_SUFFIX = re.compile(r"[\s\-]*free\b|less\b")
+
+# -ies plurals whose singular keeps the "ie" (cookie, not cooky)
+IE_PLURALS = frozenset({"brownies", "calories", "cookies", "hoagies", "pierogies", "smoothies", "veggies"})
+
+def normalize_ingredient(term: str) -> str:
+    """'Peanuts', ' tree_nuts ', 'Tomatoes', 'Strawberries' -> 'peanut', 'tree nut', 'tomato', 'strawberry'."""
+    term = " ".join(re.sub(r"[_\-]+", " ", term.lower()).split())
+    if len(term) > 4 and term.endswith("ies") and term.rsplit(" ", 1)[-1] not in IE_PLURALS:
+        term = term[:-3] + "y"
+    elif len(term) > 4 and term.endswith("oes"):
+        term = term[:-2]
+    elif len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+        term = term[:-1]
+    return term
+
+def _variants(term: str) -> List[str]:
+    variants = [term, term + "s", term + "es"]
+    if len(term) > 3 and term.endswith("y") and term[-2] not in "aeiou":
+        variants.append(term[:-1] + "ies")
+    return variants
+
+class ExclusionMatcher:
+    """
+    Compiled exclusion set: each excluded ingredient plus its synonyms in one
+    Aho-Corasick automaton, scanned over a meal's name, description, tags and
+    ingredients in a single pass.
+
+    Allergen terms also match at the start or end of a compound word
+    (cheeseburger, flatbread, buttermilk); terms shorter than
+    MIN_COMPOUND_LENGTH only match whole words. A hit inside one of the
+    term's exception words or phrases (buckwheat, peanut butter) is not a hit.
+    """
+
+    def __init__(self, exclusions: FrozenSet[str]):
+        self.exclusions = exclusions
+        owner: Dict[str, str] = {}
+        for term in sorted(exclusions):
+            for pattern in [term] + [normalize_ingredient(s) for s in INGREDIENT_SYNONYMS.get(term, [])]:
+                for variant in _variants(pattern):
+                    owner.setdefault(variant, term)
+        self._automaton = AhoCorasick(owner, values=owner)
+        # Exception phrase -> the excluded terms it is an exception for
+        self._exception_owners: Dict[str, Set[str]] = {}
+        for term in exclusions:
+            for phrase in INGREDIENT_EXCEPTIONS.get(term, []):
+                for variant in _variants(" ".join(phrase.lower().split())):
+                    self._exception_owners.setdefault(variant, set()).add(term)
+        self._exceptions = AhoCorasick(self._exception_owners) if self._exception_owners else None
+
+    @staticmethod
+    def meal_text(meal: Dict[str, Any]) -> str:
+        parts = [meal.get("name") or "", meal.get("description") or ""]
+        parts.extend(str(t) for t in meal.get("tags") or [])
+        parts.extend(str(i) for i in meal.get("ingredients") or [])
+        return "\n".join(parts).lower().replace("_", " ")
+
+    def _hits(self, meal: Dict[str, Any]) -> Iterator[str]:
+        text = self.meal_text(meal)
+        excepted = None
+        for start, end, term in self._automaton.iter_matches(text):
+            at_start = start == 0 or not text[start - 1].isalnum()
+            at_end = end == len(text) or not text[end].isalnum()
+            if not (at_start and at_end) and not ((at_start or at_end) and end - start >= MIN_COMPOUND_LENGTH):
+                continue
+            if _ABSENCE_SUFFIX.match(text, end):
+                continue
+            if self._exceptions is not None:
+                if excepted is None:
+                    excepted = [
+                        (s, e, self._exception_owners[phrase])
+                        for s, e, phrase in self._exceptions.iter_word_matches(text)
+                    ]
+                if any(s <= start and end <= e and term in owners for s, e, owners in excepted):
+                    continue
+            yield term
+
+    def find(self, meal: Dict[str, Any]) -> Set[str]:
+        """Excluded ingredients present in the meal."""
+        return set(self._hits(meal))
+
+    def contains(self, meal: Dict[str, Any]) -> bool:
+        return any(True for _ in self._hits(meal))
+
+def compile_exclusions(exclusions: Optional[List[str]]) -> Optional[ExclusionMatcher]:
+    """Matcher for the exclusion list, shared across requests with the same set; None when empty."""
+    terms = frozenset(normalize_ingredient(e) for e in exclusions or [] if e and e.strip())
+    if not terms:
+        return None
+    return _compile(terms)
+
+@lru_cache(maxsize=MATCHER_CACHE_SIZE)
+def _compile(terms: FrozenSet[str]) -> ExclusionMatcher:
+    return ExclusionMatcher(terms)
+
+def excluded_mask(meals: List[Dict[str, Any]], exclusions: Optional[List[str]]) -> np.ndarray:
+    """True for meals that contain any excluded ingredient."""
+    matcher = compile_exclusions(exclusions)
+    if matcher is None:
+        return np.zeros(len(meals), dtype=bool)
+    return np.array([matcher.contains(m) for m in meals], dtype=bool)
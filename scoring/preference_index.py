@@ -0,0 +1,166 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from utils.aho_corasick import AhoCorasick
+
+PREFERENCE_TERMS_PATH = os.path.join(os.path.dirname(__file__), '../data/preference_terms.json')
+try:
+    with open(PREFERENCE_TERMS_PATH) as f:
+        PREFERENCE_TERMS: Dict[str, Dict[str, List[str]]] = json.load(f)
+except Exception:
+    PREFERENCE_TERMS = {}
+# Phrases whose keywords mean nothing about cuisine or flavor ('hot' in 'hot chocolate')
+NEUTRAL_PHRASES = ("hot chocolate", "hot cocoa", "hot coffee", "hot tea", "hot cider", "hot fudge", "hot toddy", "hot cake")
+MAX_RESTAURANTS = 20000
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[_\-]+", " ", text.lower()).split())
+
+def _build_automaton() -> AhoCorasick:
+    """Every cuisine/flavor name and keyword (plus plurals) -> 'kind:name' terms."""
+    owners: Dict[str, Set[str]] = defaultdict(set)
+    for kind, entries in PREFERENCE_TERMS.items():
+        for name, keywords in entries.items():
+            for keyword in [name] + keywords:
+                keyword = _normalize(keyword)
+                for variant in (keyword, keyword + "s", keyword + "es"):
+                    owners[variant].add(f"{kind}:{name}")
+    for phrase in NEUTRAL_PHRASES:
+        for variant in (phrase, phrase + "s", phrase + "es"):
+            owners.setdefault(variant, set())
+    # One value per pattern; keywords shared by several terms carry all of them
+    return AhoCorasick(owners, values={k: "|".join(sorted(v)) for k, v in owners.items()})
+
+_AUTOMATON = _build_automaton()
+
+def term_spans(text: str) -> Iterator[Tuple[int, int, List[str]]]:
+    """
+    (start, end, terms) for each cuisine/flavor keyword in already normalized
+    text. A keyword inside a longer match is dropped, so 'hot dog' is only
+    american and 'hot chocolate' (a neutral phrase) is nothing at all.
+    """
+    end = 0
+    for start, stop, value in sorted(_AUTOMATON.iter_word_matches(text), key=lambda m: (m[0], -m[1])):
+        if stop <= end:
+            continue
+        end = stop
+        if value:
+            yield start, stop, value.split("|")
+
+def extract_terms(text: str) -> Set[str]:
+    """Normalized 'cuisine:x' / 'flavor:y' terms mentioned in free text."""
+    terms: Set[str] = set()
+    for _, _, matched in term_spans(_normalize(text)):
+        terms.update(matched)
+    return terms
+
+@lru_cache(maxsize=1024)
+def _preference_terms(prefs: frozenset) -> frozenset:
+    terms = set()
+    for pref in prefs:
+        terms |= extract_terms(pref)
+    return frozenset(terms)
+
+def preference_terms(prefs: Optional[Iterable[str]], kind: Optional[str] = None) -> frozenset:
+    """User preferences ('Spicy', 'italian food', 'hot') -> index terms, optionally one kind only."""
+    terms = _preference_terms(frozenset(p for p in prefs or () if p))
+    if kind:
+        terms = frozenset(t for t in terms if t.startswith(kind + ":"))
+    return terms
+
+def meal_id(restaurant_id: str, meal: Dict[str, Any]) -> str:
+    return f"{restaurant_id}|{_normalize(meal.get('name') or '')}"
+
+def restaurant_id(place: Dict[str, Any]) -> str:
+    return place.get("place_id") or place.get("name") or ""
+
+class PreferenceIndex:
+    """
+    Inverted index of cuisine and flavor terms, built as menus are parsed.
+
+    postings[term][restaurant_id] holds the ids of that restaurant's meals
+    mentioning the term; restaurant_postings[term] the restaurants whose name
+    mentions it. Re-indexing a restaurant replaces its entries, so the index
+    follows menu changes; past max_restaurants the least recently indexed
+    restaurant is dropped (pooled menus are re-indexed on their next use).
+    """
+
+    def __init__(self, max_restaurants: int = MAX_RESTAURANTS):
+        self.max_restaurants = max_restaurants
+        self.postings: Dict[str, Dict[str, Set[str]]] = defaultdict(dict)
+        self.restaurant_postings: Dict[str, Set[str]] = defaultdict(set)
+        self._restaurant_terms: "OrderedDict[str, Set[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._restaurant_terms)
+
+    def is_indexed(self, rid: str) -> bool:
+        return rid in self._restaurant_terms
+
+    def index_menu(self, place: Dict[str, Any], meals: List[Dict[str, Any]]):
+        rid = restaurant_id(place)
+        own_terms = extract_terms(place.get("name") or "")
+        meal_terms: Dict[str, Set[str]] = defaultdict(set)
+        for meal in meals:
+            text = " ".join([meal.get("name") or "", meal.get("description") or ""] + [str(t) for t in meal.get("tags") or []])
+            mid = meal.get("meal_id") or meal_id(rid, meal)
+            for term in extract_terms(text):
+                meal_terms[term].add(mid)
+        with self._lock:
+            self._remove(rid)
+            for term, mids in meal_terms.items():
+                self.postings[term][rid] = mids
+            for term in own_terms:
+                self.restaurant_postings[term].add(rid)
+            self._restaurant_terms[rid] = set(meal_terms) | {"@" + t for t in own_terms}
+            while len(self._restaurant_terms) > self.max_restaurants:
+                self._remove(next(iter(self._restaurant_terms)))
+
+    def _remove(self, rid: str):
+        for term in self._restaurant_terms.pop(rid, ()):
+            if term.startswith("@"):
+                owners = self.restaurant_postings.get(term[1:])
+                if owners is not None:
+                    owners.discard(rid)
+                    if not owners:
+                        del self.restaurant_postings[term[1:]]
+            else:
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(rid, None)
+                    if not postings:
+                        del self.postings[term]
+
+    def meal_matches(self, rid: str, terms: Iterable[str]) -> Dict[str, List[str]]:
+        """meal_id -> matched terms for one restaurant, from the posting lists only."""
+        matches: Dict[str, List[str]] = defaultdict(list)
+        for term in terms:
+            for mid in self.postings.get(term, {}).get(rid, ()):
+                matches[mid].append(term)
+        return matches
+
+    def restaurant_matches(self, rid: str, terms: Iterable[str]) -> List[str]:
+        return [t for t in terms if rid in self.restaurant_postings.get(t, ())]
+
+    def meals_matching_all(self, terms: Iterable[str]) -> Set[str]:
+        """Meal ids mentioning every term: posting-list intersection, smallest list first."""
+        lists = []
+        for term in terms:
+            postings = self.postings.get(term, {})
+            lists.append(set().union(*postings.values()) if postings else set())
+        if not lists:
+            return set()
+        lists.sort(key=len)
+        result = set(lists[0])
+        for other in lists[1:]:
+            result &= other
+            if not result:
+                break
+        return result
+
+preference_index = PreferenceIndex()
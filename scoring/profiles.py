@@ -0,0 +1,105 @@
+import numpy as np
+from functools import lru_cache
+from typing import Any, Optional, Tuple
+from core.fitness_goals import FITNESS_GOALS
+from scoring.weights import ScoringWeights, get_weights
+
+MACROS = ("protein", "carbs", "fat")
+OVERRIDE_FIELDS = (
+    "min_calories", "max_calories",
+    "min_protein", "max_protein",
+    "min_carbs", "max_carbs",
+    "min_fat", "max_fat",
+)
+PROFILE_CACHE_SIZE = 512
+
+class GoalProfile:
+    """
+    Numeric bounds for one (goal, overrides) pair, built once and shared.
+
+    cal_lo/cal_hi are the calorie range (an override replaces the goal's
+    bound), pct_lo/pct_hi the goal's macro calorie-share ranges, and
+    limit_lo/limit_hi the raw MacroOverrides bounds on (calories, protein,
+    carbs, fat), -inf/inf where unset.
+    """
+
+    __slots__ = ("goal", "known", "cal_lo", "cal_hi", "pct_lo", "pct_hi", "limit_lo", "limit_hi",
+                 "calorie_penalty", "macro_penalty", "has_overrides")
+
+    def __init__(self, goal: str, known: bool, cal_lo: float, cal_hi: float, pct_lo: np.ndarray, pct_hi: np.ndarray,
+                 limit_lo: np.ndarray, limit_hi: np.ndarray, calorie_penalty: float, macro_penalty: float, has_overrides: bool):
+        self.goal = goal
+        self.known = known
+        self.cal_lo = cal_lo
+        self.cal_hi = cal_hi
+        self.pct_lo = _frozen(pct_lo)
+        self.pct_hi = _frozen(pct_hi)
+        self.limit_lo = _frozen(limit_lo)
+        self.limit_hi = _frozen(limit_hi)
+        self.calorie_penalty = calorie_penalty
+        self.macro_penalty = macro_penalty
+        self.has_overrides = has_overrides
+
+    @property
+    def gram_lo(self) -> np.ndarray:
+        return self.limit_lo[1:]
+
+    @property
+    def gram_hi(self) -> np.ndarray:
+        return self.limit_hi[1:]
+
+def _frozen(arr: np.ndarray) -> np.ndarray:
+    arr = np.asarray(arr, dtype=np.float64)
+    arr.setflags(write=False)
+    return arr
+
+def overrides_key(overrides: Any) -> Tuple[Optional[float], ...]:
+    """Hashable key for MacroOverrides, a plain dict of the same fields, or None."""
+    if overrides is None:
+        return (None,) * len(OVERRIDE_FIELDS)
+    if not isinstance(overrides, dict):
+        overrides = overrides.model_dump()
+    return tuple(
+        float(overrides[f]) if overrides.get(f) is not None else None
+        for f in OVERRIDE_FIELDS
+    )
+
+def compile_goal_profile(goal: str, overrides: Any = None, weights: Optional[ScoringWeights] = None) -> GoalProfile:
+    """Profile under the given (default: current) scoring weights; a weights reload yields new profiles."""
+    weights = weights or get_weights()
+    return _compile(goal, overrides_key(overrides), weights.calorie_penalty, weights.macro_penalty)
+
+@lru_cache(maxsize=PROFILE_CACHE_SIZE)
+def _compile(goal: str, key: Tuple[Optional[float], ...], calorie_penalty: float, macro_penalty: float) -> GoalProfile:
+    goal_def = FITNESS_GOALS.get(goal)
+    if goal_def:
+        cal_lo, cal_hi = goal_def["calories"]
+        pct_lo = [goal_def["macros"][m][0] for m in MACROS]
+        pct_hi = [goal_def["macros"][m][1] for m in MACROS]
+    else:
+        cal_lo, cal_hi = 0.0, np.inf
+        pct_lo, pct_hi = [0.0] * 3, [np.inf] * 3
+    limit_lo = np.array([v if v is not None else -np.inf for v in key[0::2]])
+    limit_hi = np.array([v if v is not None else np.inf for v in key[1::2]])
+    return GoalProfile(
+        goal=goal,
+        known=bool(goal_def),
+        cal_lo=float(key[0] if key[0] is not None else cal_lo),
+        cal_hi=float(key[1] if key[1] is not None else cal_hi),
+        pct_lo=np.array(pct_lo),
+        pct_hi=np.array(pct_hi),
+        limit_lo=limit_lo,
+        limit_hi=limit_hi,
+        calorie_penalty=calorie_penalty,
+        macro_penalty=macro_penalty,
+        has_overrides=any(v is not None for v in key),
+    )
+
+def within_limits(calories: np.ndarray, grams: np.ndarray, profile: GoalProfile) -> np.ndarray:
+    """
+    Mask of meals that do not break a MacroOverrides bound. Meals with
+    unknown nutrition are kept; scoring already ranks them last.
+    """
+    values = np.column_stack([calories, grams])
+    broken = (values < profile.limit_lo) | (values > profile.limit_hi)
+    return ~broken.any(axis=1)
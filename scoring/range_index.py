@@ -0,0 +1,128 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from scoring.profiles import GoalProfile
+
+RANGE_COLUMNS = ("calories", "protein", "carbs", "fat", "price")
+_PRICE_RE = re.compile(r"\d+(?:[.,]\d+)?")
+
+def parse_price(price: Any) -> float:
+    """'$12.99', '12,50 €', 9 -> float; NaN when there is no number."""
+    if isinstance(price, (int, float)):
+        return float(price)
+    match = _PRICE_RE.search(str(price or ""))
+    return float(match.group().replace(",", ".")) if match else np.nan
+
+def _column_value(meal: Dict[str, Any], column: str) -> float:
+    if column == "price":
+        return parse_price(meal.get("price"))
+    nutrition = meal.get("nutrition") or meal.get("nutrition_estimate") or {}
+    value = nutrition.get(column)
+    return np.nan if value is None else float(value)
+
+class RangeIndex:
+    """
+    Sorted column indexes over meal calories, macros and price.
+
+    Each range predicate is two bisections on its column. The most selective
+    predicate supplies the candidates and the rest are checked only on those,
+    so a query costs O(log n + k) for k candidates instead of a full scan.
+    Meals come in restaurant groups so results can be regrouped in order.
+    """
+
+    def __init__(self, groups: List[List[Dict[str, Any]]]):
+        self.meals: List[Dict[str, Any]] = [m for meals in groups for m in meals]
+        self.group = np.repeat(np.arange(len(groups)), [len(meals) for meals in groups])
+        self.values: Dict[str, np.ndarray] = {}
+        self.order: Dict[str, np.ndarray] = {}
+        self.sorted: Dict[str, np.ndarray] = {}
+        self.unknown: Dict[str, np.ndarray] = {}
+        for column in RANGE_COLUMNS:
+            values = np.array([_column_value(m, column) for m in self.meals], dtype=np.float64)
+            known = np.flatnonzero(~np.isnan(values))
+            order = known[np.argsort(values[known], kind="stable")]
+            self.values[column] = values
+            self.order[column] = order
+            self.sorted[column] = values[order]
+            self.unknown[column] = np.flatnonzero(np.isnan(values))
+
+    def __len__(self) -> int:
+        return len(self.meals)
+
+    def subset(self, groups: List[int]) -> "RangeIndex":
+        """
+        Index over only the given groups (ascending), renumbered from 0. The
+        sorted orders are filtered rather than rebuilt, so narrowing costs
+        O(n) instead of a fresh sort per column.
+        """
+        groups = np.asarray(groups, dtype=np.int64)
+        kept = np.isin(self.group, groups)
+        positions = np.flatnonzero(kept)
+        # Old position -> new position for the kept meals
+        renumber = np.cumsum(kept) - 1
+        narrowed = RangeIndex.__new__(RangeIndex)
+        narrowed.meals = [self.meals[i] for i in positions.tolist()]
+        narrowed.group = np.searchsorted(groups, self.group[positions])
+        narrowed.values, narrowed.order, narrowed.sorted, narrowed.unknown = {}, {}, {}, {}
+        for column in RANGE_COLUMNS:
+            order = self.order[column]
+            in_order = kept[order]
+            narrowed.values[column] = self.values[column][positions]
+            narrowed.order[column] = renumber[order[in_order]]
+            narrowed.sorted[column] = self.sorted[column][in_order]
+            unknown = self.unknown[column]
+            narrowed.unknown[column] = renumber[unknown[kept[unknown]]]
+        return narrowed
+
+    def _span(self, column: str, lo: Optional[float], hi: Optional[float]) -> Tuple[int, int]:
+        col = self.sorted[column]
+        start = 0 if lo is None else int(np.searchsorted(col, lo, side="left"))
+        end = len(col) if hi is None else int(np.searchsorted(col, hi, side="right"))
+        return start, max(start, end)
+
+    def select(self, bounds: Dict[str, Tuple[Optional[float], Optional[float]]], keep_unknown: bool = False) -> np.ndarray:
+        """
+        Sorted positions of meals inside every (lo, hi) bound, inclusive; None
+        leaves a side open. Meals missing a bounded value are dropped unless
+        keep_unknown is set.
+        """
+        if not bounds:
+            return np.arange(len(self.meals))
+        spans = {column: self._span(column, lo, hi) for column, (lo, hi) in bounds.items()}
+        # Seed from the narrowest column, then filter the candidates on the others
+        seed = min(spans, key=lambda c: spans[c][1] - spans[c][0] + (len(self.unknown[c]) if keep_unknown else 0))
+        start, end = spans[seed]
+        candidates = self.order[seed][start:end]
+        if keep_unknown:
+            candidates = np.concatenate([candidates, self.unknown[seed]])
+        for column, (lo, hi) in bounds.items():
+            if column == seed or not len(candidates):
+                continue
+            values = self.values[column][candidates]
+            ok = np.ones(len(candidates), dtype=bool)
+            if lo is not None:
+                ok &= values >= lo
+            if hi is not None:
+                ok &= values <= hi
+            if keep_unknown:
+                ok |= np.isnan(values)
+            candidates = candidates[ok]
+        return np.sort(candidates)
+
+    def regroup(self, positions: np.ndarray) -> List[Tuple[int, List[Dict[str, Any]]]]:
+        """(group, meals) pairs for the selected positions, groups and meals in original order."""
+        grouped: List[Tuple[int, List[Dict[str, Any]]]] = []
+        for pos in positions.tolist():
+            group = int(self.group[pos])
+            if not grouped or grouped[-1][0] != group:
+                grouped.append((group, []))
+            grouped[-1][1].append(self.meals[pos])
+        return grouped
+
+def profile_bounds(profile: GoalProfile) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+    """Range predicates for the MacroOverrides limits compiled into a goal profile."""
+    bounds = {}
+    for column, lo, hi in zip(RANGE_COLUMNS[:4], profile.limit_lo.tolist(), profile.limit_hi.tolist()):
+        if np.isfinite(lo) or np.isfinite(hi):
+            bounds[column] = (lo if np.isfinite(lo) else None, hi if np.isfinite(hi) else None)
+    return bounds
@@ -0,0 +1,92 @@
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+
+# Fixed tag vocabulary; a tag's position is its bit in a meal's tag mask.
+# Append only: masks may be cached or stored.
+TAG_VOCAB = (
+    "high_protein", "low_carb", "keto", "low_calorie", "vegetarian", "vegan",
+    "gluten_free", "healthy", "unhealthy", "balanced", "lean", "protein_rich",
+    "carb_free", "fat_burning", "muscle_building", "dairy_free", "low_fat",
+    "high_fiber", "paleo",
+)
+TAG_BITS: Dict[str, int] = {tag: 1 << i for i, tag in enumerate(TAG_VOCAB)}
+TAG_ALIASES = {
+    "protein": "high_protein",
+    "protein_packed": "high_protein",
+    "lowcarb": "low_carb",
+    "low_carbs": "low_carb",
+    "ketogenic": "keto",
+    "keto_friendly": "keto",
+    "low_cal": "low_calorie",
+    "low_calories": "low_calorie",
+    "light": "low_calorie",
+    "veggie": "vegetarian",
+    "plant_based": "vegan",
+    "gf": "gluten_free",
+    "no_gluten": "gluten_free",
+    "glutenfree": "gluten_free",
+    "no_carb": "carb_free",
+    "no_dairy": "dairy_free",
+    "non_dairy": "dairy_free",
+    "lactose_free": "dairy_free",
+    "fiber_rich": "high_fiber",
+    "high_in_protein": "high_protein",
+}
+
+@lru_cache(maxsize=4096)
+def canonical_tag(tag: str) -> Optional[str]:
+    """'High Protein', 'high-protein', 'GF' -> vocabulary tag; None when not in the vocabulary."""
+    key = re.sub(r"[\s\-]+", "_", tag.strip().lower())
+    key = TAG_ALIASES.get(key, key)
+    return key if key in TAG_BITS else None
+
+def tag_mask(tags: Optional[Iterable[Any]]) -> int:
+    """Bitmask of the vocabulary tags in a free-text or MealTag list."""
+    mask = 0
+    for tag in tags or ():
+        canonical = canonical_tag(str(getattr(tag, "value", tag)))
+        if canonical:
+            mask |= TAG_BITS[canonical]
+    return mask
+
+def mask_of(*tags: str) -> int:
+    mask = 0
+    for tag in tags:
+        mask |= TAG_BITS[tag]
+    return mask
+
+def tags_of(mask: int) -> List[str]:
+    return [tag for tag, bit in TAG_BITS.items() if mask & bit]
+
+def meal_mask(meal: Dict[str, Any]) -> int:
+    """The mask stored at ingest, computed from the tags for older records."""
+    mask = meal.get("tag_mask")
+    return tag_mask(meal.get("tags")) if mask is None else mask
+
+def mask_array(meals: Iterable[Dict[str, Any]]) -> np.ndarray:
+    return np.array([meal_mask(m) for m in meals], dtype=np.int64)
+
+def has_all(masks: np.ndarray, required: int) -> np.ndarray:
+    return (masks & required) == required
+
+def has_any(masks: np.ndarray, wanted: int) -> np.ndarray:
+    return (masks & wanted) != 0
+
+def has_none(masks: np.ndarray, excluded: int) -> np.ndarray:
+    return (masks & excluded) == 0
+
+class TagWeights:
+    """Per-tag weights summed over a mask, memoized per distinct mask."""
+
+    def __init__(self, weights: Dict[str, float]):
+        self.weights = [(TAG_BITS[tag], w) for tag, w in weights.items() if tag in TAG_BITS]
+        self._scores: Dict[int, float] = {}
+
+    def score(self, mask: int) -> float:
+        score = self._scores.get(mask)
+        if score is None:
+            score = sum(w for bit, w in self.weights if mask & bit)
+            self._scores[mask] = score
+        return score
@@ -0,0 +1,41 @@
+import heapq
+import itertools
+from typing import Any, Generic, Iterable, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+class TopK(Generic[T]):
+    """
+    Bounded min-heap that keeps the k items with the largest keys.
+
+    Items can be pushed as they arrive; memory stays O(k) and each push is
+    O(log k). Equal keys keep insertion order, same as a stable sort.
+    """
+
+    def __init__(self, k: int):
+        self.k = max(0, k)
+        self.total = 0
+        self._heap: List[Tuple[Any, int, T]] = []
+        self._seq = itertools.count()
+
+    def push(self, key: Any, item: T):
+        self.total += 1
+        if not self.k:
+            return
+        # Negated sequence: among equal keys the later item is the smaller one
+        entry = (key, -next(self._seq), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def extend(self, pairs: Iterable[Tuple[Any, T]]):
+        for key, item in pairs:
+            self.push(key, item)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def items(self) -> List[T]:
+        """Kept items, best first."""
+        return [item for _, _, item in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
@@ -0,0 +1,91 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+import numpy as np
+import structlog
+import yaml
+from config.config import get_settings
+from scoring.tags import TAG_VOCAB, TagWeights
+
+logger = structlog.get_logger()
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+RELOAD_CHECK_INTERVAL = 2.0  # seconds between mtime checks
+
+DEFAULT_PENALTIES = {"calorie": 0.3, "macro": 0.2}
+DEFAULT_TAG_WEIGHTS = {
+    "high_protein": 3, "low_carb": 2, "keto": 3, "low_calorie": 1, "vegetarian": 1,
+    "vegan": 1, "gluten_free": 1, "healthy": 1, "balanced": 1, "lean": 2,
+    "protein_rich": 3, "carb_free": 2, "fat_burning": 2, "muscle_building": 3,
+}
+
+class ScoringWeights:
+    """One immutable, compiled snapshot of the scoring weights file."""
+
+    def __init__(self, penalties: Dict[str, float], tag_weights: Dict[str, float], version: float = 0.0):
+        self.calorie_penalty = float(penalties.get("calorie", DEFAULT_PENALTIES["calorie"]))
+        self.macro_penalty = float(penalties.get("macro", DEFAULT_PENALTIES["macro"]))
+        self.tags = TagWeights({k: float(v) for k, v in tag_weights.items()})
+        # Weight per TAG_VOCAB position, for vectorized use
+        self.tag_vector = np.array([float(tag_weights.get(tag, 0)) for tag in TAG_VOCAB])
+        self.tag_vector.setflags(write=False)
+        self.version = version
+
+    @classmethod
+    def from_config(cls, data: Dict[str, Any], version: float = 0.0) -> "ScoringWeights":
+        penalties = {**DEFAULT_PENALTIES, **(data.get("penalties") or {})}
+        tag_weights = data.get("tag_weights")
+        return cls(penalties, DEFAULT_TAG_WEIGHTS if tag_weights is None else tag_weights, version)
+
+class WeightsRegistry:
+    """
+    Holds the current ScoringWeights and swaps in a freshly compiled snapshot
+    when the YAML file's mtime changes. A snapshot never changes, so a
+    reader that takes one reference per request and passes it down never
+    mixes old and new weights; the file is checked at most every
+    check_interval seconds. A bad file keeps the last good one.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval: float = RELOAD_CHECK_INTERVAL):
+        path = path or get_settings().SCORING_WEIGHTS_PATH
+        self.path = path if os.path.isabs(path) else os.path.join(REPO_ROOT, path)
+        self.check_interval = check_interval
+        self._weights = ScoringWeights(DEFAULT_PENALTIES, DEFAULT_TAG_WEIGHTS)
+        self._mtime: Optional[float] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._maybe_reload(force=True)
+
+    def current(self) -> ScoringWeights:
+        if time.monotonic() - self._checked >= self.check_interval:
+            self._maybe_reload()
+        return self._weights
+
+    def _maybe_reload(self, force: bool = False):
+        with self._lock:
+            if not force and time.monotonic() - self._checked < self.check_interval:
+                return
+            self._checked = time.monotonic()
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return
+            if mtime == self._mtime:
+                return
+            try:
+                with open(self.path, "r") as f:
+                    data = (yaml.safe_load(f) or {}).get("scoring", {})
+                weights = ScoringWeights.from_config(data, version=mtime)
+            except Exception as e:
+                logger.warn("scoring_weights.reload_failed", path=self.path, error=str(e))
+                self._mtime = mtime
+                return
+            self._weights = weights
+            self._mtime = mtime
+            logger.info("scoring_weights.loaded", path=self.path, version=mtime)
+
+weights_registry = WeightsRegistry()
+
+def get_weights() -> ScoringWeights:
+    return weights_registry.current()
@@ -5,6 +5,7 @@ import time
 import random
 from typing import List, Dict, Any, Optional
 import structlog
+from core.concurrency import governor
 
 logger = structlog.get_logger()
 
@@ -33,7 +34,7 @@ class PlaywrightScraper:
         start_time = time.time()
         while retries < 3:
             try:
-                async with self.semaphore:
+                async with self.semaphore, governor.slot("playwright"):
                     async with async_playwright() as p:
                         browser = getattr(p, self.browser)
                         context = await browser.launch(headless=self.headless)
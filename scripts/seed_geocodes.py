@@ -0,0 +1,8 @@
+import argparse
+from utils.geocode_cache import geocode_cache
+
+parser = argparse.ArgumentParser(description="Pre-seed the geocoding cache from a JSON file of {location: {lat, lng}}")
+parser.add_argument('--input', required=True, help='Path to JSON file')
+args = parser.parse_args()
+count = geocode_cache.seed_from_file(args.input)
+print(f"Seeded {count} locations.")
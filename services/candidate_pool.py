@@ -0,0 +1,116 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import structlog
+from utils.cache import CACHE_TTLS, get_cache, set_cache
+from services.place_index import geohash_encode, haversine_km
+from scoring.range_index import RangeIndex
+
+logger = structlog.get_logger()
+
+CANDIDATE_POOL_PREFIX = "candidate_pool:"
+CANDIDATE_POOL_TTL = CACHE_TTLS.get('candidate_pool_ttl', 1800)  # 30 minutes
+CANDIDATE_POOL_LRU_SIZE = 64
+POOL_TILE_PRECISION = 6  # ~1.2km x 0.6km area tiles
+POOL_RADIUS_STEP = 0.5
+POOL_PLACE_FIELDS = ("place_id", "name", "location")
+
+def pool_key(lat: float, lng: float, radius: float, keyword: str) -> str:
+    """
+    (area tile, radius bucket, search keyword). Only a lookup key: requests
+    in one tile and bucket can have different circles, so a stored pool is
+    checked against the actual circle before it is reused.
+    """
+    bucket = math.ceil(radius / POOL_RADIUS_STEP) * POOL_RADIUS_STEP
+    return f"{CANDIDATE_POOL_PREFIX}{geohash_encode(lat, lng, POOL_TILE_PRECISION)}:{bucket:g}:{keyword.strip().lower()}"
+
+class CandidatePool:
+    """
+    One search circle's meals grouped by restaurant, with each restaurant's
+    place (id, name, location) and a range index built on first use.
+    """
+
+    def __init__(self, restaurants: List[List[Dict[str, Any]]], center: Optional[List[float]] = None,
+                 radius: float = 0.0, places: Optional[List[Optional[Dict[str, Any]]]] = None):
+        self.restaurants = restaurants
+        self.center = center
+        self.radius = radius
+        self.places = places or [None] * len(restaurants)
+        self._index: Optional[RangeIndex] = None
+
+    def covers(self, lat: float, lng: float, radius: float) -> bool:
+        """True when this pool's circle contains the requested one."""
+        if self.center is None:
+            return False
+        return haversine_km(lat, lng, self.center[0], self.center[1]) + radius <= self.radius + 1e-9
+
+    def within(self, lat: float, lng: float, radius: float) -> "CandidatePool":
+        """The pool narrowed to restaurants inside the requested circle; restaurants without a location are kept."""
+        keep = [
+            i for i, place in enumerate(self.places)
+            if not (place or {}).get("location")
+            or haversine_km(lat, lng, place["location"]["lat"], place["location"]["lng"]) <= radius
+        ]
+        if len(keep) == len(self.restaurants):
+            return self
+        narrowed = CandidatePool([self.restaurants[i] for i in keep], [lat, lng], radius, [self.places[i] for i in keep])
+        # Reuse the stored pool's sorted columns instead of indexing the narrowed pool from scratch
+        narrowed._index = self.index.subset(keep)
+        return narrowed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"center": self.center, "radius": self.radius, "restaurants": self.restaurants, "places": self.places}
+
+    @property
+    def index(self) -> RangeIndex:
+        if self._index is None:
+            self._index = RangeIndex(self.restaurants)
+        return self._index
+
+class CandidatePoolCache:
+    """
+    Scraped and estimated meals per area, grouped by restaurant in discovery
+    order, so a request that only changes overrides, exclusions or flavor
+    preferences can be re-scored without Places, scraping or estimation.
+    """
+
+    def __init__(self, maxsize: int = CANDIDATE_POOL_LRU_SIZE, ttl: int = CANDIDATE_POOL_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lru: "OrderedDict[str, CandidatePool]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, lat: float, lng: float, radius: float, keyword: str) -> Optional[CandidatePool]:
+        """A stored pool whose circle contains the request, narrowed to the requested radius."""
+        key = pool_key(lat, lng, radius, keyword)
+        with self._lock:
+            pool = self._lru.get(key)
+            if pool is not None:
+                self._lru.move_to_end(key)
+        if pool is None:
+            data = get_cache(key)
+            if not isinstance(data, dict) or "restaurants" not in data:
+                return None
+            pool = self._remember(key, CandidatePool(data["restaurants"], data.get("center"), data.get("radius", 0.0), data.get("places")))
+        if not pool.covers(lat, lng, radius):
+            return None
+        return pool.within(lat, lng, radius)
+
+    def set(self, lat: float, lng: float, radius: float, keyword: str, restaurants: List[List[Dict[str, Any]]],
+            places: Optional[List[Optional[Dict[str, Any]]]] = None):
+        key = pool_key(lat, lng, radius, keyword)
+        pool = CandidatePool(restaurants, [lat, lng], radius, places)
+        set_cache(key, pool.to_dict(), self.ttl)
+        self._remember(key, pool)
+        logger.info("candidate_pool.stored", key=key, restaurants=len(restaurants), meals=sum(len(m) for m in restaurants))
+
+    def _remember(self, key: str, pool: CandidatePool) -> CandidatePool:
+        with self._lock:
+            self._lru[key] = pool
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+        return pool
+
+candidate_pool = CandidatePoolCache()
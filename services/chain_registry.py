@@ -0,0 +1,217 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+import structlog
+from utils.cache import CACHE_TTLS, get_cache, set_cache
+from services.place_index import geohash_encode
+
+logger = structlog.get_logger()
+
+CHAIN_MENU_PREFIX = "chain_menu:"
+CHAIN_OVERRIDE_PREFIX = "chain_override:"
+CHAIN_MENU_TTL = CACHE_TTLS.get('chain_menu_ttl', 86400)  # 1 day
+# In-process copies are re-read from the shared cache this often, and capped in number
+CHAIN_LOCAL_TTL = 600
+MAX_LOCAL_CHAINS = 2048
+MAX_LOCAL_OVERRIDES = 20000
+_MISSING = object()
+# Locations with the same name but no shared domain must show the same menu this often
+FINGERPRINT_CONFIRMATIONS = 2
+# Without a domain, only same-name places in one ~5km geohash cell can form a chain
+NAME_LOCALITY_PRECISION = 5
+# Share of requests for a location not yet compared with its chain that fetch its menu anyway
+CHAIN_VERIFY_RATE = 0.2
+# Hosts shared by unrelated restaurants; they say nothing about chain identity
+GENERIC_DOMAINS = frozenset({
+    "facebook.com", "instagram.com", "linktr.ee", "google.com", "sites.google.com", "yelp.com",
+    "toasttab.com", "square.site", "squareup.com", "order.online", "doordash.com", "ubereats.com",
+    "grubhub.com", "clover.com", "wixsite.com", "business.site", "menufy.com", "chownow.com",
+})
+_LOCATION_SUFFIX = re.compile(r"\s+(?:-|–|—|@|\|)\s+.*$|\s*\(.*\)\s*$|\s+#\s*\d+\s*$|\s+(?:store|location|unit)\s*\d*\s*$")
+
+def normalize_chain_name(name: str) -> str:
+    """"McDonald's - Times Sq", "MCDONALDS (#1234)" -> "mcdonalds"."""
+    name = (name or "").lower().replace("&", " and ")
+    name = _LOCATION_SUFFIX.sub("", name.strip())
+    name = re.sub(r"['’`.]", "", name)
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name).split())
+
+def website_domain(url: Optional[str]) -> Optional[str]:
+    """Registrable-looking host of a place website, None for missing or generic hosts."""
+    if not url:
+        return None
+    host = urlparse(url if "//" in url else f"//{url}").netloc.lower().split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+    if not host or host in GENERIC_DOMAINS or any(host.endswith("." + d) for d in GENERIC_DOMAINS):
+        return None
+    return host
+
+def _meal_key(meal: Dict[str, Any]) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", (meal.get("name") or "").lower()).split())
+
+def _meal_content(meal: Dict[str, Any]) -> tuple:
+    return (_meal_key(meal), (meal.get("description") or "").strip().lower(), str(meal.get("price") or ""))
+
+def menu_fingerprint(meals: List[Dict[str, Any]]) -> str:
+    """Order-independent hash of a menu's dishes, descriptions and prices."""
+    items = sorted({"\t".join(_meal_content(m)) for m in meals or [] if m.get("name")})
+    return hashlib.sha1("\n".join(items).encode()).hexdigest()
+
+def menu_override(canonical: List[Dict[str, Any]], meals: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """What one location's menu changes relative to the chain's canonical menu; None when identical."""
+    base = {_meal_key(m): _meal_content(m) for m in canonical}
+    own = {_meal_key(m): m for m in meals}
+    changed = [m for key, m in own.items() if base.get(key) != _meal_content(m)]
+    removed = sorted(key for key in base if key not in own)
+    if not changed and not removed:
+        return None
+    return {"meals": changed, "removed": removed}
+
+def apply_override(canonical: List[Dict[str, Any]], override: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    if not override:
+        return [dict(m) for m in canonical]
+    replaced = {_meal_key(m): m for m in override.get("meals", [])}
+    dropped = set(override.get("removed", ()))
+    meals = [dict(replaced.pop(_meal_key(m), m)) for m in canonical if _meal_key(m) not in dropped]
+    return meals + [dict(m) for m in replaced.values()]
+
+def chain_key(place: Dict[str, Any]) -> Optional[str]:
+    """'name@domain', or 'name~geohash' for a place without a usable website; None without either."""
+    name = normalize_chain_name(place.get("name"))
+    if not name:
+        return None
+    domain = website_domain(place.get("website"))
+    if domain:
+        return f"{name}@{domain}"
+    loc = place.get("location") or {}
+    if "lat" not in loc or "lng" not in loc:
+        return None
+    return f"{name}~{geohash_encode(loc['lat'], loc['lng'], NAME_LOCALITY_PRECISION)}"
+
+class ChainRegistry:
+    """
+    Links the locations of a chain to one canonical parsed menu.
+
+    Identity is the normalized name plus the website domain. Places with
+    the same name but no usable domain are only grouped within one
+    NAME_LOCALITY_PRECISION geohash cell, and only count as a chain once
+    FINGERPRINT_CONFIRMATIONS locations served the same menu. A location
+    whose menu differs keeps just the difference as an override, so every
+    location still sees its own menu.
+
+    A location is compared with its chain only when its menu is fetched.
+    Until a comparison is on record, verify_rate of its lookups return
+    None so the caller fetches and observes the menu; comparisons expire
+    with ttl, so locations are re-checked periodically.
+
+    Canonical menus and overrides live in the shared cache under ttl. The
+    in-process copies in front of it expire after local_ttl, so an expired
+    or replaced cache entry is picked up, and are bounded LRUs.
+    """
+
+    def __init__(self, ttl: int = CHAIN_MENU_TTL, confirmations: int = FINGERPRINT_CONFIRMATIONS,
+                 local_ttl: float = CHAIN_LOCAL_TTL, max_chains: int = MAX_LOCAL_CHAINS,
+                 max_overrides: int = MAX_LOCAL_OVERRIDES, verify_rate: float = CHAIN_VERIFY_RATE):
+        self.ttl = ttl
+        self.confirmations = confirmations
+        self.verify_rate = verify_rate
+        self.local_ttl = min(local_ttl, ttl)
+        self.max_chains = max_chains
+        self.max_overrides = max_overrides
+        self._menus: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._overrides: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._sightings: Dict[str, Dict[str, Set[str]]] = defaultdict(lambda: defaultdict(set))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.verifications = 0
+
+    def _local_get(self, store: OrderedDict, key: str) -> Any:
+        """A live in-process entry, or _MISSING when absent or expired."""
+        with self._lock:
+            entry = store.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del store[key]
+                return _MISSING
+            store.move_to_end(key)
+            return entry[1]
+
+    def _local_put(self, store: OrderedDict, key: str, value: Any, maxsize: int):
+        with self._lock:
+            store[key] = (time.monotonic() + self.local_ttl, value)
+            store.move_to_end(key)
+            while len(store) > maxsize:
+                store.popitem(last=False)
+
+    def _canonical(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        menu = self._local_get(self._menus, key)
+        if menu is _MISSING:
+            menu = get_cache(CHAIN_MENU_PREFIX + key)
+            if menu is not None:
+                self._local_put(self._menus, key, menu, self.max_chains)
+        return menu
+
+    def _override(self, place_id: str) -> Optional[Dict[str, Any]]:
+        """The location's recorded difference ({} when none), or None when it was never compared."""
+        if not place_id:
+            return None
+        override = self._local_get(self._overrides, place_id)
+        if override is _MISSING:
+            override = get_cache(CHAIN_OVERRIDE_PREFIX + place_id)
+            self._local_put(self._overrides, place_id, override, self.max_overrides)
+        return override
+
+    def menu_for(self, place: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """This location's menu from its chain's canonical menu, or None when it has to be fetched."""
+        key = chain_key(place)
+        if not key:
+            return None
+        canonical = self._canonical(key)
+        if canonical is None:
+            return None
+        override = self._override(place.get("place_id") or "")
+        if override is None and random.random() < self.verify_rate:
+            # Fetch this location so observe() can record how it differs from the chain
+            self.verifications += 1
+            return None
+        self.hits += 1
+        logger.info("chain_registry.reused", chain=key, place=place.get("name"))
+        return apply_override(canonical, override)
+
+    def observe(self, place: Dict[str, Any], meals: List[Dict[str, Any]]):
+        """Record a freshly fetched location menu: set or confirm the canonical menu, or store an override."""
+        key = chain_key(place)
+        if not key or not meals:
+            return
+        place_id = place.get("place_id") or ""
+        canonical = self._canonical(key)
+        if canonical is not None:
+            # {} records that this location was compared and serves the canonical menu
+            override = menu_override(canonical, meals) or {}
+            if place_id:
+                self._local_put(self._overrides, place_id, override, self.max_overrides)
+                set_cache(CHAIN_OVERRIDE_PREFIX + place_id, override, self.ttl)
+            return
+        fingerprint = menu_fingerprint(meals)
+        with self._lock:
+            seen = self._sightings[key][fingerprint]
+            seen.add(place_id)
+            confirmed = "@" in key or len(seen) >= self.confirmations
+            if confirmed:
+                self._sightings.pop(key, None)
+        if confirmed:
+            self._local_put(self._menus, key, [dict(m) for m in meals], self.max_chains)
+            set_cache(CHAIN_MENU_PREFIX + key, meals, self.ttl)
+            for pid in seen - {""}:
+                self._local_put(self._overrides, pid, {}, self.max_overrides)
+                set_cache(CHAIN_OVERRIDE_PREFIX + pid, {}, self.ttl)
+            logger.info("chain_registry.canonical", chain=key, meals=len(meals))
+
+chain_registry = ChainRegistry()
@@ -0,0 +1,246 @@
+import json
+import os
+import re
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import structlog
+from services.dish_memo import STOP_WORDS
+from utils.aho_corasick import AhoCorasick
+
+logger = structlog.get_logger()
+
+FOODS_PATH = os.path.join(os.path.dirname(__file__), '../data/food_nutrients.json')
+COMPILED_PATH = os.path.join(os.path.dirname(__file__), '../data/food_nutrients.npy')
+PORTION_COL, UNIT_COL = 4, 5
+NAME_WIDTH = 32
+TABLE_DTYPE = np.dtype([("name", f"U{NAME_WIDTH}"), ("food", f"U{NAME_WIDTH}"), ("group", f"U{NAME_WIDTH}"),
+                        ("values", np.float32, (6,))])
+MAX_CONFIDENCE_SCORE = 0.85
+HIGH_CONFIDENCE_SCORE = 0.7
+# Applied when the foods found miss what the dish is ('pizza' in 'Pepperoni Pizza')
+WEAK_MATCH_FACTOR = 0.5
+
+# Grams per unit; counts ('2 eggs', '3 slices') use the food's own piece weight instead
+UNIT_GRAMS = {
+    "oz": 28.35, "ounce": 28.35, "ounces": 28.35, "lb": 453.6, "lbs": 453.6, "pound": 453.6, "pounds": 453.6,
+    "g": 1.0, "gram": 1.0, "grams": 1.0, "kg": 1000.0,
+    "cup": 150.0, "cups": 150.0, "tbsp": 15.0, "tablespoon": 15.0, "tablespoons": 15.0,
+    "tsp": 5.0, "teaspoon": 5.0, "teaspoons": 5.0,
+}
+COUNT_UNITS = frozenset({"pc", "pcs", "piece", "pieces", "slice", "slices", "scoop", "scoops", "strip", "strips"})
+NUMBER_WORDS = {
+    "a": 1.0, "an": 1.0, "one": 1.0, "two": 2.0, "three": 3.0, "four": 4.0, "five": 5.0, "six": 6.0,
+    "half": 0.5, "double": 2.0, "triple": 3.0,
+}
+# Before a food in the meal name these name a whole dish ('Half Chicken', 'Double Burger'), not a portion
+WHOLE_DISH_WORDS = frozenset({"half", "whole", "quarter", "double", "triple"})
+# Words that describe how a dish is made or served, not what is in it
+FILLER_WORDS = STOP_WORDS | frozenset("""
+    grilled roasted steamed fried baked sauteed seared smoked braised toasted crispy charred pan
+    topped tossed side choice bowl plate platter combo sliced diced chopped shredded organic
+    local wild whole light extra or to for over
+""".split()) | frozenset(UNIT_GRAMS) | COUNT_UNITS | frozenset(NUMBER_WORDS)
+_UNITS = "|".join(sorted(map(re.escape, set(UNIT_GRAMS) | COUNT_UNITS), key=len, reverse=True))
+_PORTION_RE = re.compile(
+    r"(?:(\d+/\d+|\d+(?:\.\d+)?)|\b(" + "|".join(NUMBER_WORDS) + r")\b)\s*(?:(" + _UNITS + r")\b\.?\s*)?"
+    r"(?:of\s+)?(?:[a-z]+\s+)?$"
+)
+_WORD_RE = re.compile(r"[a-z]+")
+_SEPARATOR_RE = re.compile(r"[,;:\n]")
+_PARENTHESES_RE = re.compile(r"\([^)]*\)")
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[_\-()]+", " ", (text or "").lower().replace("&", " and ")).split())
+
+def _variants(name: str) -> Tuple[str, ...]:
+    return (name,) if name.endswith("s") else (name, name + "s", name + "es")
+
+def compile_food_table(path: str = FOODS_PATH) -> np.ndarray:
+    """
+    Flatten the food table into one structured array: a row per food name,
+    alias and plural, each carrying the canonical food, its group (the
+    food itself unless listed under "groups") and its per-100 g calories,
+    protein, carbs and fat, typical portion and piece weight.
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+    foods = data.get("foods", {})
+    groups = data.get("groups", {})
+    rows: Dict[str, Tuple[str, List[float]]] = {}
+    for food, values in foods.items():
+        for variant in _variants(_normalize(food)):
+            rows.setdefault(variant, (food, values))
+    for alias, food in data.get("aliases", {}).items():
+        if food in foods:
+            for variant in _variants(_normalize(alias)):
+                rows.setdefault(variant, (food, foods[food]))
+    table = np.zeros(len(rows), dtype=TABLE_DTYPE)
+    for i, (name, (food, values)) in enumerate(rows.items()):
+        table[i] = (name[:NAME_WIDTH], food[:NAME_WIDTH], groups.get(food, food)[:NAME_WIDTH], values)
+    return table
+
+def load_food_table(path: str = FOODS_PATH, compiled_path: str = COMPILED_PATH) -> np.ndarray:
+    """
+    The compiled table, memory-mapped read-only. It is rebuilt next to the
+    JSON whenever the JSON is newer; where data/ is not writable the table
+    is compiled in memory instead.
+    """
+    try:
+        if os.path.getmtime(compiled_path) >= os.path.getmtime(path):
+            table = np.load(compiled_path, mmap_mode='r')
+            # A table compiled by an older layout is rebuilt
+            if table.dtype == TABLE_DTYPE:
+                return table
+    except (OSError, ValueError):
+        pass
+    try:
+        table = compile_food_table(path)
+    except Exception as e:
+        logger.warn("nutrition.foods.load_failed", error=str(e))
+        return np.zeros(0, dtype=TABLE_DTYPE)
+    try:
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(compiled_path), suffix=".npy")
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, table)
+        os.replace(tmp, compiled_path)
+        return np.load(compiled_path, mmap_mode='r')
+    except OSError as e:
+        logger.info("nutrition.foods.compile_in_memory", error=str(e))
+        return table
+
+def _amount(token: str) -> float:
+    if "/" in token:
+        num, den = token.split("/")
+        return float(num) / float(den) if float(den) else 1.0
+    return float(token)
+
+class CompositionEstimator:
+    """
+    Nutrition from a meal's ingredients: every food name and alias in one
+    Aho-Corasick automaton over the compiled food table, the portion read
+    from the words just before each match ('12oz ribeye', '2 eggs',
+    'a cup of brown rice'), and the macros summed per 100 g in one matrix
+    product. Unquantified ingredients count as one typical portion. A food
+    named only in the meal name gives way to a description food of the
+    same group ('Steak Dinner' with '12oz ribeye' counts the ribeye once).
+
+    Confidence grows with the share of the meal's words the ingredients
+    explain and the share of ingredients with an explicit portion. It is
+    halved, and the estimate marked low, when the dish itself is not in the
+    table: the name's head noun is unexplained ('Chicken Wings'), a food
+    names a whole dish ('Half Chicken'), or one word of several is all
+    that matched.
+    """
+
+    def __init__(self, table: Optional[np.ndarray] = None):
+        self.table = load_food_table() if table is None else table
+        self.values = self.table["values"]
+        self.foods = [str(food) for food in self.table["food"]]
+        self.groups = [str(group) for group in self.table["group"]]
+        names = {str(name): str(i) for i, name in enumerate(self.table["name"])}
+        self._automaton = AhoCorasick(names, values=names)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def ingredients(self, name: str, description: str) -> Tuple[List[Tuple[int, float, bool]], float, bool]:
+        """
+        ([(table row, grams, portion given)], share of content words
+        explained, whether the match is weak). Overlapping matches keep the
+        longest; a food named in both the name and the description counts
+        once, preferring the mention with a portion, and one named only in
+        the name is dropped when the description names another food of its
+        group.
+        """
+        name_text = _normalize(name)
+        text = name_text + "\n" + _normalize(description)
+        hits = sorted(self._automaton.iter_word_matches(text), key=lambda h: (h[0], h[0] - h[1]))
+        picked: Dict[str, Tuple[int, float, bool]] = {}
+        described = set()
+        explained = 0
+        name_words = set()
+        end = 0
+        for start, stop, row in hits:
+            if start < end:
+                continue
+            # A portion belongs to the words since the previous ingredient or separator
+            before = _SEPARATOR_RE.split(text[max(end, start - 40):start])[-1]
+            end = stop
+            row = int(row)
+            words = _WORD_RE.findall(text[start:stop])
+            explained += len(words)
+            if start < len(name_text):
+                preceding = _WORD_RE.findall(before)
+                if preceding and preceding[-1] in WHOLE_DISH_WORDS:
+                    # 'Half Chicken' is a dish of its own; its food is only a typical portion
+                    before = ""
+                else:
+                    name_words.update(words)
+            grams, explicit = self._portion(before, row)
+            food = self.foods[row]
+            if start > len(name_text):
+                described.add(food)
+            if food not in picked or (explicit and not picked[food][2]):
+                picked[food] = (row, grams, explicit)
+        # 'Steak Dinner' with '12oz ribeye': the name's generic steak is the described ribeye
+        described_groups = {self.groups[picked[food][0]] for food in described}
+        picked = {
+            food: hit for food, hit in picked.items()
+            if food in described or self.groups[hit[0]] not in described_groups
+        }
+        content = sum(1 for word in _WORD_RE.findall(text) if word not in FILLER_WORDS)
+        coverage = min(1.0, explained / content) if content else 0.0
+        # The head noun is the name's last content word, outside any parentheses
+        head = [w for w in _WORD_RE.findall(_normalize(_PARENTHESES_RE.sub(" ", name or ""))) if w not in FILLER_WORDS]
+        weak = (bool(head) and head[-1] not in name_words) or (explained == 1 and content > 1)
+        return list(picked.values()), coverage, weak
+
+    def _portion(self, before: str, row: int) -> Tuple[float, bool]:
+        """Grams of a matched food from the text preceding it, and whether a portion was stated."""
+        values = self.values[row]
+        piece = float(values[UNIT_COL]) or float(values[PORTION_COL])
+        match = _PORTION_RE.search(before)
+        if not match:
+            return float(values[PORTION_COL]), False
+        number, word, unit = match.groups()
+        if unit in UNIT_GRAMS:
+            return (_amount(number) if number else NUMBER_WORDS[word]) * UNIT_GRAMS[unit], True
+        if number:
+            return _amount(number) * piece, True
+        if word in ("a", "an"):
+            return float(values[PORTION_COL]), False
+        return NUMBER_WORDS[word] * piece, True
+
+    def estimate(self, name: str, description: str) -> Optional[Dict[str, Any]]:
+        """Summed ingredient estimate, or None when no known food is mentioned."""
+        if not len(self.table):
+            return None
+        found, coverage, weak = self.ingredients(name, description)
+        if not found:
+            return None
+        rows = np.fromiter((row for row, _, _ in found), dtype=np.intp, count=len(found))
+        grams = np.fromiter((g for _, g, _ in found), dtype=np.float64, count=len(found))
+        calories, protein, carbs, fat = (grams / 100.0 @ self.values[rows, :4].astype(np.float64)).tolist()
+        explicit = sum(1 for _, _, given in found if given) / len(found)
+        score = min(MAX_CONFIDENCE_SCORE, 0.25 + 0.4 * coverage + 0.2 * explicit)
+        if weak:
+            score *= WEAK_MATCH_FACTOR
+        score = round(score, 3)
+        confidence = "low" if weak else "high" if score >= HIGH_CONFIDENCE_SCORE else "medium"
+        nutrition = {
+            "calories": int(round(calories)),
+            "protein": round(protein, 1),
+            "carbs": round(carbs, 1),
+            "fat": round(fat, 1),
+            "fiber": None, "sugar": None, "sodium": None,
+            "confidence_level": confidence,
+            "estimation_origin": "rule"
+        }
+        return {
+            "nutrition": nutrition,
+            "origin": "composition",
+            "confidence": confidence,
+            "confidence_score": score,
+            "ingredients": [{"food": self.foods[row], "grams": round(g, 1)} for row, g, _ in found]
+        }
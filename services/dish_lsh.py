@@ -0,0 +1,126 @@
+import re
+import threading
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+from services.dish_memo import STOP_WORDS, dish_signature
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 Jaccard collide in some band
+ROWS = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.6
+CONFIDENCE_DISCOUNT = 0.85
+MAX_ENTRIES = 50000
+_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.RandomState(1729)
+_A = _rng.randint(1, 1 << 31, NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 1 << 31, NUM_PERM).astype(np.uint64)
+_TOKEN_RE = re.compile(r"[a-z]+")
+_DOWNGRADE = {"high": "medium", "medium": "low", "low": "low"}
+
+def _tokens(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN_RE.findall((text or "").lower()):
+        if token not in STOP_WORDS:
+            tokens.append(token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token)
+    return tokens
+
+def shingles(name: str, description: str = "") -> Set[str]:
+    """Name words (counted twice, so the name outweighs the description), name bigrams and description words."""
+    name_tokens = _tokens(name)
+    result = {f"n:{t}" for t in name_tokens} | {f"n2:{t}" for t in name_tokens}
+    result |= {f"b:{a} {b}" for a, b in zip(name_tokens, name_tokens[1:])}
+    result |= {f"d:{t}" for t in _tokens(description)}
+    return result
+
+def minhash(items: Set[str]) -> np.ndarray:
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in items), dtype=np.uint64, count=len(items))
+    if not len(hashes):
+        return np.full(NUM_PERM, np.iinfo(np.uint64).max, dtype=np.uint64)
+    return ((np.outer(_A, hashes) + _B[:, None]) % _PRIME).min(axis=1)
+
+class DishLSH:
+    """
+    Near-duplicate dish index: MinHash signatures of name and description
+    shingles, banded into hash tables. A lookup hashes the new dish once,
+    collects the dishes sharing any band and returns the most similar one
+    above the threshold, so 'Chicken Bowl, Grilled' finds 'Grilled
+    Chicken Rice Bowl' without a scan.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD, max_entries: int = MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, np.ndarray, Dict[str, Any]]]" = OrderedDict()
+        self._buckets: List[Dict[bytes, Set[str]]] = [defaultdict(set) for _ in range(BANDS)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return dish_signature(name) in self._entries
+
+    @staticmethod
+    def _bands(signature: np.ndarray) -> List[bytes]:
+        return [signature[i * ROWS:(i + 1) * ROWS].tobytes() for i in range(BANDS)]
+
+    def add(self, name: str, description: str, result: Dict[str, Any]):
+        """Index an estimated dish; a dish already indexed under its signature is replaced."""
+        key = dish_signature(name)
+        if not key:
+            return
+        signature = minhash(shingles(name, description))
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (name, signature, result)
+            for band, bucket in zip(self._bands(signature), self._buckets):
+                bucket[band].add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band, bucket in zip(self._bands(entry[1]), self._buckets):
+            keys = bucket.get(band)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del bucket[band]
+
+    def nearest(self, name: str, description: str = "") -> Optional[Tuple[float, str, Dict[str, Any]]]:
+        """(estimated Jaccard similarity, name, estimate) of the closest indexed dish above the threshold."""
+        signature = minhash(shingles(name, description))
+        with self._lock:
+            candidates: Set[str] = set()
+            for band, bucket in zip(self._bands(signature), self._buckets):
+                candidates |= bucket.get(band, set())
+            best = None
+            for key in candidates:
+                other_name, other, result = self._entries[key]
+                similarity = float(np.count_nonzero(other == signature)) / NUM_PERM
+                if similarity >= self.threshold and (best is None or similarity > best[0]):
+                    best = (similarity, other_name, result)
+        return best
+
+    def lookup(self, name: str, description: str = "") -> Optional[Dict[str, Any]]:
+        """The nearest dish's estimate, inherited with its confidence discounted by similarity."""
+        match = self.nearest(name, description)
+        if match is None:
+            return None
+        similarity, other_name, result = match
+        confidence = _DOWNGRADE.get(result.get("confidence"), "low")
+        nutrition = {**result.get("nutrition", {}), "confidence_level": confidence}
+        return {
+            "nutrition": nutrition,
+            "origin": "similar",
+            "confidence": confidence,
+            "confidence_score": round(result.get("confidence_score", 0) * similarity * CONFIDENCE_DISCOUNT, 3),
+            "similar_to": other_name,
+            "similarity": round(similarity, 3),
+        }
+
+dish_lsh = DishLSH()
@@ -0,0 +1,107 @@
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+import structlog
+from utils.cache import CACHE_TTLS, get_cache, set_cache
+
+logger = structlog.get_logger()
+
+DISH_MEMO_PREFIX = "dish_memo:"
+DISH_MEMO_TTL = CACHE_TTLS.get('dish_memo_ttl', 2592000)  # 30 days
+DISH_MEMO_LRU_SIZE = 4096
+
+# Words that vary between menus without changing the dish
+STOP_WORDS = frozenset("""
+    a an the and with w of in on our my your house famous signature classic original special
+    homemade fresh freshly style served delicious new
+""".split())
+SIZE_WORDS = {
+    "small": "small", "sm": "small", "regular": "regular", "reg": "regular", "medium": "medium",
+    "med": "medium", "large": "large", "lg": "large", "half": "half", "full": "full",
+    "single": "single", "double": "double", "triple": "triple", "kids": "kids",
+}
+PORTION_UNITS = {
+    "oz": "oz", "ounce": "oz", "ounces": "oz", "g": "g", "gram": "g", "grams": "g",
+    "lb": "lb", "lbs": "lb", "pound": "lb", "pc": "pc", "pcs": "pc", "piece": "pc", "pieces": "pc",
+    "ct": "pc", "count": "pc", "in": "in", "inch": "in", "inches": "in", '"': "in",
+}
+_PORTION_RE = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(" + "|".join(sorted((re.escape(u) for u in PORTION_UNITS), key=len, reverse=True)) + r")(?![a-z])"
+)
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+@lru_cache(maxsize=8192)
+def dish_signature(name: str) -> str:
+    """
+    Canonical dish key shared across restaurants: lowercased, stop words
+    removed, tokens sorted, and portions ('12 oz', 'Large') parsed into a
+    suffix, so 'The Famous Grilled Chicken Caesar Salad (Large)' and
+    'caesar salad w/ grilled chicken - large' agree.
+    """
+    text = (name or "").lower().replace("&", " and ")
+    portions = []
+    for amount, unit in _PORTION_RE.findall(text):
+        portions.append(f"{float(amount):g}{PORTION_UNITS[unit]}")
+    text = _PORTION_RE.sub(" ", text)
+    tokens = set()
+    for token in _TOKEN_RE.findall(text):
+        if token in SIZE_WORDS:
+            portions.append(SIZE_WORDS[token])
+        elif token not in STOP_WORDS:
+            # Singular form, so 'tacos' and 'taco' agree
+            tokens.add(token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token)
+    signature = " ".join(sorted(tokens))
+    return f"{signature}|{','.join(sorted(set(portions)))}" if portions else signature
+
+class DishMemo:
+    """
+    Nutrition estimates per dish signature, shared by every restaurant.
+
+    Entries keep the estimate with its origin and confidence; a lower
+    confidence estimate never replaces a higher one. Backed by the Redis /
+    file cache, with an in-process LRU in front.
+    """
+
+    def __init__(self, maxsize: int = DISH_MEMO_LRU_SIZE, ttl: int = DISH_MEMO_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lru: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        signature = dish_signature(name)
+        if not signature:
+            return None
+        with self._lock:
+            entry = self._lru.get(signature)
+            if entry is not None:
+                self._lru.move_to_end(signature)
+                return entry
+        entry = get_cache(DISH_MEMO_PREFIX + signature)
+        if entry is not None:
+            self._remember(signature, entry)
+        return entry
+
+    def put(self, name: str, result: Dict[str, Any]) -> bool:
+        """Store an estimate unless the memo already holds a more confident one."""
+        signature = dish_signature(name)
+        if not signature:
+            return False
+        current = self.get(name)
+        if current and current.get("confidence_score", 0) > result.get("confidence_score", 0):
+            return False
+        entry = {**result, "signature": signature}
+        set_cache(DISH_MEMO_PREFIX + signature, entry, self.ttl)
+        self._remember(signature, entry)
+        return True
+
+    def _remember(self, signature: str, entry: Dict[str, Any]):
+        with self._lock:
+            self._lru[signature] = entry
+            self._lru.move_to_end(signature)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+dish_memo = DishMemo()
@@ -2,23 +2,43 @@ import httpx
 import asyncio
 import os
 import json
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
 from config.config import get_settings
 import structlog
 import redis
 from core.errors import MealDiscoveryError
+from services.place_index import get_place_index, haversine_km
+from utils.cache import CACHE_TTLS
+from utils.opening_hours import open_now
 
 logger = structlog.get_logger()
 
 REDIS_TTL = 3600  # 1 hour default
 CACHE_PREFIX = "places:"
 MOCK_PLACES_PATH = "services/mock_places.json"
+GOOGLE_PAGE_SIZE = 20
+GOOGLE_MAX_RESULTS = 60  # Google stops paginating after 3 pages
+NEXT_PAGE_DELAY = 2  # seconds before a next_page_token can be used
+DETAILS_URL = "https://maps.googleapis.com/maps/api/place/details/json"
+DETAILS_CONCURRENCY = 5
+
+# Field-level caching: stable attributes live for days, volatile ones for minutes
+STATIC_FIELDS = ("name", "place_id", "location", "rating", "website")
+DYNAMIC_FIELDS = ("open_now",)
+STATIC_PREFIX = "places:static:"
+DYNAMIC_PREFIX = "places:dynamic:"
+HOURS_PREFIX = "places:hours:"
+STATIC_TTL = CACHE_TTLS.get('places_static_ttl', 604800)  # 7 days
+DYNAMIC_TTL = CACHE_TTLS.get('places_dynamic_ttl', 600)   # 10 minutes
+HOURS_TTL = CACHE_TTLS.get('places_hours_ttl', 604800)    # 7 days
 
 class GooglePlacesClient:
     def __init__(self):
         self.settings = get_settings()
         self.api_key = self.settings.GOOGLE_API_KEY
         self.mock_mode = getattr(self.settings, "MOCK_MODE", False)
+        self.max_places = min(self.settings.PLACES_MAX_RESULTS, GOOGLE_MAX_RESULTS)
         self.redis_uri = self.settings.REDIS_URI
         self.redis = None
         try:
@@ -27,15 +47,73 @@ class GooglePlacesClient:
         except Exception:
             logger.warn("redis.unavailable", uri=self.redis_uri)
             self.redis = None
+        self.index = get_place_index()
+        self._local_fields: Dict[str, Any] = {}
+
+    async def discover_places(self, lat: float, lng: float, radius: float, keyword: str, refresh: bool = False, max_places: Optional[int] = None) -> List[Dict[str, Any]]:
+        places = []
+        async for page in self.iter_places(lat, lng, radius, keyword, refresh=refresh, max_places=max_places):
+            places.extend(page)
+        return places
 
-    async def discover_places(self, lat: float, lng: float, radius: float, keyword: str, refresh: bool = False) -> List[Dict[str, Any]]:
-        cache_key = f"{CACHE_PREFIX}{lat}:{lng}:{radius}:{keyword}"
+    async def iter_places(self, lat: float, lng: float, radius: float, keyword: str, refresh: bool = False, max_places: Optional[int] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield batches of places as soon as they are available, so callers can
+        start scraping page 1 while Google's next page is still pending.
+        """
+        max_places = max_places or self.max_places
+        cache_key = f"{CACHE_PREFIX}{lat}:{lng}:{radius}:{keyword}:{max_places}"
+        known = []
+        search = (lat, lng, radius)
+        if not refresh and not self.mock_mode:
+            # Answer from the local spatial index when the whole circle is fresh
+            known, uncovered = self.index.query(lat, lng, radius, keyword, limit=max_places)
+            if not uncovered:
+                logger.info("places.index_hit", count=len(known))
+                yield await self._with_dynamic_fields(known)
+                return
+            search = self.index.uncovered_region(lat, lng, radius, uncovered)
         if not refresh:
             cached = await self._get_cache(cache_key)
             if cached:
-                return cached
+                cached = await self._resolve_cached(cached)
+            if cached:
+                yield cached
+                return
         if self.mock_mode:
-            return self._load_mock_places()
+            yield self._load_mock_places()
+            return
+        partial = search != (lat, lng, radius)
+        returned = []
+        if partial and known:
+            # Only part of the circle goes to Google; what the index already knew can start right away
+            known = await self._with_dynamic_fields(known)
+            returned.extend(known)
+            yield known
+        seen = {p["place_id"] for p in returned}
+        truncated = more = False
+        async for page, more in self._iter_nearby_pages(*search, keyword, max_places=max_places):
+            self._store_fields(page)
+            self.index.add_places(page, keyword, *search, mark_coverage=False)
+            page = [
+                p for p in page
+                if p["place_id"] not in seen
+                and (not partial or haversine_km(lat, lng, p["location"]["lat"], p["location"]["lng"]) <= radius)
+            ]
+            if len(page) > max_places - len(returned):
+                page = page[:max_places - len(returned)]
+                truncated = True
+            seen.update(p["place_id"] for p in page)
+            returned.extend(page)
+            if page:
+                yield page
+        if not truncated and not more:
+            # Only a complete result set may answer later queries inside this circle
+            self.index.add_places([], keyword, *search)
+        await self._set_cache(cache_key, [p["place_id"] for p in returned])
+
+    async def _iter_nearby_pages(self, lat: float, lng: float, radius: float, keyword: str, max_places: int = GOOGLE_PAGE_SIZE) -> AsyncIterator[Tuple[List[Dict[str, Any]], bool]]:
+        """Yield (places, more) per results page; more is True while Google has results beyond it."""
         url = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
         params = {
             "location": f"{lat},{lng}",
@@ -44,37 +122,56 @@ class GooglePlacesClient:
             "keyword": keyword,
             "key": self.api_key
         }
+        fetched = 0
         async with httpx.AsyncClient(timeout=10) as client:
-            for attempt in range(3):
-                try:
-                    resp = await client.get(url, params=params)
-                    data = resp.json()
-                    if data.get("status") == "OK":
-                        places = [
-                            {
-                                "name": p["name"],
-                                "place_id": p["place_id"],
-                                "location": p["geometry"]["location"],
-                                "rating": p.get("rating"),
-                                "open_now": p.get("opening_hours", {}).get("open_now"),
-                                "website": p.get("website")
-                            }
-                            for p in data.get("results", [])
-                        ]
-                        await self._set_cache(cache_key, places)
-                        return places
-                    elif data.get("status") == "OVER_QUERY_LIMIT":
-                        await asyncio.sleep(2 ** attempt)
-                        continue
-                    else:
-                        logger.error("places.error", status=data.get("status"), error=data)
-                        raise MealDiscoveryError(f"Google Places error: {data.get('status')}")
-                except Exception as e:
-                    logger.error("places.http_error", error=str(e))
-                    if attempt == 2:
-                        raise MealDiscoveryError("Failed to fetch places after retries.")
+            while params:
+                data = await self._get_nearby_page(client, url, params)
+                places = [
+                    {
+                        "name": p["name"],
+                        "place_id": p["place_id"],
+                        "location": p["geometry"]["location"],
+                        "rating": p.get("rating"),
+                        "open_now": p.get("opening_hours", {}).get("open_now"),
+                        "website": p.get("website")
+                    }
+                    for p in data.get("results", [])
+                ]
+                fetched += len(places)
+                token = data.get("next_page_token")
+                # More results exist past this page: a page token, or Google's hard cap reached
+                yield places, bool(token) or fetched >= GOOGLE_MAX_RESULTS
+                params = None
+                if token and fetched < min(max_places, GOOGLE_MAX_RESULTS):
+                    # next_page_token only becomes valid after a short delay
+                    await asyncio.sleep(NEXT_PAGE_DELAY)
+                    params = {"pagetoken": token, "key": self.api_key}
+
+    async def _get_nearby_page(self, client: httpx.AsyncClient, url: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        for attempt in range(3):
+            try:
+                resp = await client.get(url, params=params)
+                data = resp.json()
+                if data.get("status") == "OK":
+                    return data
+                elif data.get("status") == "ZERO_RESULTS":
+                    return {}
+                elif data.get("status") in ("OVER_QUERY_LIMIT", "INVALID_REQUEST") and "pagetoken" in params:
+                    # Page token not ready yet
+                    await asyncio.sleep(NEXT_PAGE_DELAY)
+                    continue
+                elif data.get("status") == "OVER_QUERY_LIMIT":
                     await asyncio.sleep(2 ** attempt)
-        return []
+                    continue
+                else:
+                    logger.error("places.error", status=data.get("status"), error=data)
+                    raise MealDiscoveryError(f"Google Places error: {data.get('status')}")
+            except Exception as e:
+                logger.error("places.http_error", error=str(e))
+                if attempt == 2:
+                    raise MealDiscoveryError("Failed to fetch places after retries.")
+                await asyncio.sleep(2 ** attempt)
+        return {}
 
     async def _get_cache(self, key: str) -> Optional[List[Dict[str, Any]]]:
         if self.redis:
@@ -97,6 +194,100 @@ class GooglePlacesClient:
             except Exception:
                 pass
 
+    async def _resolve_cached(self, cached: List[Any]) -> Optional[List[Dict[str, Any]]]:
+        # Search results are cached as place_ids; full place dicts come from the mock file fallback
+        if not all(isinstance(p, str) for p in cached):
+            return cached
+        statics = self._get_fields(STATIC_PREFIX, cached)
+        if any(s is None for s in statics):
+            return None
+        return await self._with_dynamic_fields(statics)
+
+    async def _with_dynamic_fields(self, places: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Merge cached volatile fields into static place records. An expired
+        open_now is recomputed from the stored opening-hours periods; Place
+        Details is only asked for places whose hours are not known yet. A
+        place that publishes no hours is stored as such and not asked again
+        until HOURS_TTL.
+        """
+        ids = [p["place_id"] for p in places]
+        dynamics = self._get_fields(DYNAMIC_PREFIX, ids)
+        stale = [pid for pid, d in zip(ids, dynamics) if d is None]
+        refreshed = {}
+        if stale:
+            for pid, hours in zip(stale, self._get_fields(HOURS_PREFIX, stale)):
+                if hours is not None:
+                    refreshed[pid] = {"open_now": open_now(hours.get("periods"), hours.get("utc_offset") or 0)}
+            missing = [pid for pid in stale if pid not in refreshed]
+            if missing and not self.mock_mode:
+                refreshed.update(await self._refresh_dynamic(missing))
+        merged = []
+        for place, dynamic in zip(places, dynamics):
+            dynamic = dynamic or refreshed.get(place["place_id"]) or {}
+            merged.append({
+                **{f: place.get(f) for f in STATIC_FIELDS},
+                **{f: dynamic.get(f) for f in DYNAMIC_FIELDS},
+            })
+        return merged
+
+    async def _refresh_dynamic(self, place_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(DETAILS_CONCURRENCY)
+        async with httpx.AsyncClient(timeout=10) as client:
+            async def fetch(place_id):
+                params = {"place_id": place_id, "fields": "place_id,opening_hours,utc_offset_minutes", "key": self.api_key}
+                async with semaphore:
+                    try:
+                        resp = await client.get(DETAILS_URL, params=params)
+                        data = resp.json()
+                        if data.get("status") == "OK":
+                            result = data.get("result", {})
+                            hours = result.get("opening_hours", {})
+                            # Periods change rarely; keep them (or that there are none) so
+                            # open_now can be recomputed locally
+                            self._set_field(HOURS_PREFIX + place_id, HOURS_TTL, {
+                                "periods": hours.get("periods") or [],
+                                "utc_offset": result.get("utc_offset_minutes"),
+                            })
+                            return place_id, {"open_now": hours.get("open_now")}
+                    except Exception as e:
+                        logger.warn("places.dynamic_refresh_failed", place_id=place_id, error=str(e))
+                return place_id, None
+            results = await asyncio.gather(*[fetch(pid) for pid in place_ids])
+        refreshed = {pid: d for pid, d in results if d is not None}
+        for pid, dynamic in refreshed.items():
+            self._set_field(DYNAMIC_PREFIX + pid, DYNAMIC_TTL, dynamic)
+        logger.info("places.dynamic_refreshed", requested=len(place_ids), refreshed=len(refreshed))
+        return refreshed
+
+    def _store_fields(self, places: List[Dict[str, Any]]):
+        for p in places:
+            self._set_field(STATIC_PREFIX + p["place_id"], STATIC_TTL, {f: p.get(f) for f in STATIC_FIELDS})
+            self._set_field(DYNAMIC_PREFIX + p["place_id"], DYNAMIC_TTL, {f: p.get(f) for f in DYNAMIC_FIELDS})
+
+    def _get_fields(self, prefix: str, place_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        keys = [prefix + pid for pid in place_ids]
+        if self.redis and keys:
+            try:
+                return [json.loads(v) if v else None for v in self.redis.mget(keys)]
+            except Exception:
+                pass
+        now = time.time()
+        values = []
+        for key in keys:
+            entry = self._local_fields.get(key)
+            values.append(entry[1] if entry and entry[0] > now else None)
+        return values
+
+    def _set_field(self, key: str, ttl: int, value: Dict[str, Any]):
+        if self.redis:
+            try:
+                self.redis.setex(key, ttl, json.dumps(value))
+                return
+            except Exception:
+                pass
+        self._local_fields[key] = (time.time() + ttl, value)
+
     def _load_mock_places(self):
         if os.path.exists(MOCK_PLACES_PATH):
             with open(MOCK_PLACES_PATH, "r") as f:
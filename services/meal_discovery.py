@@ -1,5 +1,5 @@
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from config.config import get_settings
 from services.google_places import GooglePlacesClient
 from core.errors import MealDiscoveryError
@@ -10,7 +10,18 @@ import os
 from parsers.openai_parser import OpenAIParser
 from parsers.fallback_parser import FallbackParser
 from core.analytics import log_event
+from core.concurrency import governor
+from scoring.engine import MealBatch, score_batch, mismatch_tags
+from scoring.profiles import compile_goal_profile, within_limits
+from scoring.topk import TopK
+from scoring.weights import get_weights
+from scoring.exclusions import excluded_mask
+from scoring.range_index import profile_bounds
+from scoring.preference_index import meal_id, preference_index, preference_terms, restaurant_id
+from services.candidate_pool import POOL_PLACE_FIELDS, candidate_pool
+from services.chain_registry import chain_registry
 import httpx
+import numpy as np
 
 logger = structlog.get_logger()
 
@@ -25,51 +36,82 @@ class MealDiscoveryService:
         self.settings = get_settings()
         self.places_client = GooglePlacesClient()
         self.mock_mode = getattr(self.settings, "MOCK_MODE", False)
-        self.playwright_semaphore = asyncio.Semaphore(3)  # Cap Playwright concurrency
         self.openai_parser = OpenAIParser()
         # Remove Documenu and fallback parser init
 
-    async def discover_meals(self, lat: float, lng: float, radius: float, goal: str, macros: Optional[Dict[str, float]] = None, exclusions: Optional[List[str]] = None, flavor_prefs: Optional[List[str]] = None, page: int = 1, page_size: int = 10, refresh: bool = False) -> Dict[str, Any]:
+    async def discover_meals(self, lat: float, lng: float, radius: float, goal: str, macros: Optional[Dict[str, float]] = None, exclusions: Optional[List[str]] = None, flavor_prefs: Optional[List[str]] = None, page: int = 1, page_size: int = 10, refresh: bool = False, cuisine: Optional[List[str]] = None) -> Dict[str, Any]:
         t0 = time.time()
         try:
             if self.mock_mode:
                 return self._load_mock_meals()
-            # 1. Discover places
-            t_places = time.time()
             keyword = goal.replace("_", " ")
-            places = await self.places_client.discover_places(lat, lng, radius, keyword, refresh=refresh)
-            t_places_done = time.time()
-            if not places:
-                raise MealDiscoveryError("No restaurants found.")
-            # 2. Scrape menus (async, capped concurrency)
-            async def scrape_with_semaphore(place):
-                async with self.playwright_semaphore:
-                    return await self._scrape_and_parse_menu(place)
-            t_scrape = time.time()
-            menu_results = await asyncio.gather(*[
-                scrape_with_semaphore(place) for place in places
-            ])
-            t_scrape_done = time.time()
-            # 3. Score meals
-            t_score = time.time()
-            all_meals = []
-            for meals in menu_results:
-                if meals:
-                    all_meals.extend(meals)
-            all_meals = self._score_and_sort_meals(all_meals, goal, macros, exclusions, flavor_prefs)
-            t_score_done = time.time()
-            # 4. Filter, paginate, sort
+            # One weights snapshot for the whole request
+            weights = get_weights()
+            # Only meals up to the end of the requested page are kept; later pages
+            # re-score the cached candidate pool
             start = (page - 1) * page_size
-            end = start + page_size
+            top = TopK(start + page_size)
+            # 0. Preference-only follow-ups re-score the cached candidate pool
+            pool = None if refresh else candidate_pool.get(lat, lng, radius, keyword)
+            if pool is not None:
+                t_score = time.time()
+                bounds = profile_bounds(compile_goal_profile(goal, macros, weights))
+                if bounds:
+                    # Override bounds are answered from the pool's sorted range index
+                    groups = pool.index.regroup(pool.index.select(bounds, keep_unknown=True))
+                else:
+                    groups = enumerate(pool.restaurants)
+                for order, meals in groups:
+                    self._ensure_preference_index(pool.places[order], pool.restaurants[order])
+                    self._push_scored(top, order, meals, goal, macros, exclusions, flavor_prefs, cuisine, weights)
+                logger.info("meal_discovery.latency", total=time.time()-t0, score=time.time()-t_score, pool_reused=True)
+                add_request_latency("meal_discovery", (time.time()-t0)*1000)
+                return self._page_response(top, start, page, page_size, pool_reused=True)
+            # 1+2. Discover places page by page and start scraping each page as it
+            # arrives (capped by the process-wide governor)
+            async def scrape_with_semaphore(order, place):
+                return order, await self._scrape_and_parse_menu(place)
+            t_places = time.time()
+            t_scrape = None
+            scrape_tasks = []
+            places = []
+            menus: Dict[int, List[Dict[str, Any]]] = {}
+            t_score = 0.0
+            complete = True
+            try:
+                try:
+                    async for batch in self.places_client.iter_places(lat, lng, radius, keyword, refresh=refresh):
+                        t_scrape = t_scrape or time.time()
+                        for place in batch:
+                            scrape_tasks.append(asyncio.create_task(scrape_with_semaphore(len(scrape_tasks), place)))
+                            places.append({f: place.get(f) for f in POOL_PLACE_FIELDS})
+                except Exception as e:
+                    if not scrape_tasks:
+                        raise
+                    # A later Places page failed; the restaurants already found still get scraped
+                    complete = False
+                    logger.warn("meal_discovery.places_page_failed", error=str(e), restaurants=len(scrape_tasks))
+                t_places_done = time.time()
+                if not scrape_tasks:
+                    raise MealDiscoveryError("No restaurants found.")
+                # 3. Score each restaurant's meals as soon as its scrape completes
+                for done in asyncio.as_completed(scrape_tasks):
+                    order, meals = await done
+                    menus[order] = meals or []
+                    t_batch = time.time()
+                    self._push_scored(top, order, meals, goal, macros, exclusions, flavor_prefs, cuisine, weights)
+                    t_score += time.time() - t_batch
+            except BaseException:
+                for task in scrape_tasks:
+                    task.cancel()
+                raise
+            t_scrape_done = time.time()
+            if complete:
+                candidate_pool.set(lat, lng, radius, keyword, [menus[i] for i in range(len(scrape_tasks))], places)
             # Log step durations
-            logger.info("meal_discovery.latency", total=time.time()-t0, places=t_places_done-t_places, scrape=t_scrape_done-t_scrape, score=t_score_done-t_score)
+            logger.info("meal_discovery.latency", total=time.time()-t0, places=t_places_done-t_places, scrape=t_scrape_done-t_scrape, score=t_score, pool_reused=False)
             add_request_latency("meal_discovery", (time.time()-t0)*1000)
-            return {
-                "meals": all_meals[start:end],
-                "total": len(all_meals),
-                "page": page,
-                "page_size": page_size
-            }
+            return self._page_response(top, start, page, page_size, pool_reused=False)
         except MealDiscoveryError as e:
             logger.error("meal_discovery.error", error=e.message)
             raise
@@ -77,16 +119,59 @@ class MealDiscoveryService:
             logger.error("meal_discovery.unknown_error", error=str(e))
             raise MealDiscoveryError("Unknown error in meal discovery.")
 
+    def _push_scored(self, top: TopK, order: int, meals: List[Dict[str, Any]], goal: str, macros, exclusions, flavor_prefs, cuisine=None, weights=None):
+        """
+        Score one restaurant's meals and offer them to the top-k. Goal fit ranks
+        first, then preference matches, then relevance; remaining ties keep
+        restaurant then menu order.
+        """
+        if not meals:
+            return
+        scored, tiebreak = self._score_meals(meals, goal, macros, exclusions, flavor_prefs, cuisine, weights)
+        for i, meal in enumerate(scored):
+            top.push((meal["match_score"], len(meal.get("preference_matches", ())), float(tiebreak[i]), -order, -i), meal)
+
+    def _ensure_preference_index(self, place: Optional[Dict[str, Any]], meals: List[Dict[str, Any]]):
+        """Pools shared by another process (or evicted from the index) arrive unindexed; index them on first use."""
+        rid = meals[0].get("restaurant_id") if meals else None
+        if rid and not preference_index.is_indexed(rid):
+            preference_index.index_menu(dict(place or {}, place_id=rid), meals)
+
+    def _page_response(self, top: TopK, start: int, page: int, page_size: int, pool_reused: bool) -> Dict[str, Any]:
+        return {
+            "meals": top.items()[start:start + page_size],
+            "total": top.total,
+            "page": page,
+            "page_size": page_size,
+            "pool_reused": pool_reused
+        }
+
     async def _scrape_and_parse_menu(self, place: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Fetch a menu (or reuse its chain's canonical menu), stamp restaurant
+        and meal ids, and index its cuisine/flavor terms.
+        """
+        meals = chain_registry.menu_for(place)
+        if meals is None:
+            async with governor.slot("playwright"):
+                meals = await self._fetch_menu(place)
+        rid = restaurant_id(place)
+        meals = [dict(m, restaurant_id=rid, meal_id=meal_id(rid, m)) for m in meals or []]
+        preference_index.index_menu(place, meals)
+        return meals
+
+    async def _fetch_menu(self, place: Dict[str, Any]) -> List[Dict[str, Any]]:
         try:
             # 1. Uber Eats Scraper API
             meals = await self._fetch_ubereats_meals(place)
             if meals:
+                chain_registry.observe(place, meals)
                 return meals
             log_event('fallback_used', {'method': 'restaurants_api', 'place': place.get('name')})
             # 2. Restaurants API fallback
             meals = await self._fetch_restaurants_api_meals(place)
             if meals:
+                chain_registry.observe(place, meals)
                 return meals
             log_event('fallback_used', {'method': 'static_mock', 'place': place.get('name')})
             # 3. Static mock data fallback
@@ -172,10 +257,44 @@ class MealDiscoveryService:
             "score": 80
         }]
 
-    def _score_and_sort_meals(self, meals: List[Dict[str, Any]], goal: str, macros, exclusions, flavor_prefs) -> List[Dict[str, Any]]:
-        # Placeholder: In real code, call scoring engine
-        # For now, just return meals sorted by mock score
-        return sorted(meals, key=lambda m: m.get("score", 0), reverse=True)
+    def _score_meals(self, meals: List[Dict[str, Any]], goal: str, macros, exclusions, flavor_prefs, cuisine=None, weights=None) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """Annotated copies of the meals that pass filtering, in input order, plus their tiebreak scores."""
+        if not meals:
+            return [], np.zeros(0)
+        # Preference matches come from the inverted index posting lists
+        rid = meals[0].get("restaurant_id", "")
+        pref_terms = preference_terms(flavor_prefs)
+        pref_matches = preference_index.meal_matches(rid, pref_terms) if pref_terms else {}
+        venue_matches = preference_index.restaurant_matches(rid, pref_terms) if pref_terms else []
+        # Meals with an excluded ingredient, outside an explicit MacroOverrides
+        # bound or not of a requested cuisine are dropped outright
+        batch = MealBatch.from_meals(meals)
+        weights = weights or get_weights()
+        profile = compile_goal_profile(goal, macros, weights)
+        keep = ~excluded_mask(meals, exclusions)
+        cuisine_terms = preference_terms(cuisine, "cuisine")
+        if cuisine_terms and not preference_index.restaurant_matches(rid, cuisine_terms):
+            in_cuisine = preference_index.meal_matches(rid, cuisine_terms)
+            keep &= np.array([m.get("meal_id") in in_cuisine for m in meals], dtype=bool)
+        if profile.has_overrides:
+            keep &= within_limits(batch.calories, batch.grams, profile)
+        if not keep.all():
+            meals = [m for m, k in zip(meals, keep.tolist()) if k]
+            batch = MealBatch(batch.calories[keep], *batch.grams[keep].T)
+        # Whole batch is scored in vectorized passes; existing scores only break ties
+        result = score_batch(batch, goal, macros, weights)
+        tags = mismatch_tags(result)
+        scored = []
+        for i, meal in enumerate(meals):
+            meal = dict(meal)
+            meal["match_score"] = float(result["match_score"][i])
+            meal["goal_fit_tags"] = tags[i]
+            if pref_terms:
+                matched = set(pref_matches.get(meal.get("meal_id"), ())) | set(venue_matches)
+                meal["preference_matches"] = sorted(t.split(":", 1)[1] for t in matched)
+            scored.append(meal)
+        tiebreak = np.array([m.get("relevance_score", m.get("score", 0)) or 0 for m in meals], dtype=np.float64)
+        return scored, tiebreak
 
     def _load_mock_meals(self, place: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         import os, json
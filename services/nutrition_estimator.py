@@ -1,16 +1,28 @@
 import openai
 import asyncio
 import os
+import re
 import json
-from typing import Dict, Any, Optional
+import numpy as np
+from typing import Dict, Any, List, Optional, Tuple
 from config.config import get_settings
 from schemas.responses import NutritionInfo
 import structlog
 from core.analytics import log_event
+from core.concurrency import governor
+from utils.cache import CACHE_TTLS, get_cache, set_cache
+from services.nutrition_refiner import nutrition_refiner
+from services.dish_memo import dish_memo
+from services.dish_lsh import dish_lsh
+from services.composition_estimator import CompositionEstimator
+from utils.aho_corasick import AhoCorasick
 
 logger = structlog.get_logger()
 
 TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), '../data/nutrient_templates.json')
+TEMPLATE_FIELDS = ("calories", "protein", "carbs", "fat")
+NAME_MATCH_WEIGHT = 2.0  # a template named in the meal name outweighs one in its description
+GPT_CONFIDENCE_SCORE = 0.9
 
 SYSTEM_PROMPT = """
 You are a nutrition estimation assistant. Given a meal name and description, estimate the nutrition as JSON:
@@ -28,6 +40,72 @@ FEW_SHOT_EXAMPLES = [
     }
 ]
 
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[_\-]+", " ", (text or "").lower()).split())
+
+def nutrition_cache_key(name: str, description: str) -> str:
+    return f"nutrition:{_normalize(name)}|{_normalize(description)}"
+
+class TemplateIndex:
+    """
+    Nutrient templates compiled once: every template key (and its plurals)
+    in one Aho-Corasick automaton, and the ranges as (n, 4) low/high arrays
+    over calories, protein, carbs and fat.
+
+    A meal is matched in one pass over its text. Matches inside a longer
+    match ('chicken' in 'chicken salad') are dropped, and the rest are
+    blended weighted by specificity (words in the key), doubled for
+    matches in the meal name.
+    """
+
+    def __init__(self, templates: Dict[str, Dict[str, List[float]]]):
+        self.keys = [k for k, tpl in templates.items() if all(len(tpl.get(f) or ()) == 2 for f in TEMPLATE_FIELDS)]
+        ranges = np.array([[templates[k][f] for f in TEMPLATE_FIELDS] for k in self.keys], dtype=np.float64).reshape(-1, 4, 2)
+        self.lo = ranges[:, :, 0]
+        self.hi = ranges[:, :, 1]
+        self.specificity = np.array([len(_normalize(k).split()) for k in self.keys], dtype=np.float64)
+        rows: Dict[str, str] = {}
+        for i, key in enumerate(self.keys):
+            norm = _normalize(key)
+            for variant in (norm, norm + "s", norm + "es"):
+                rows.setdefault(variant, str(i))
+        self._automaton = AhoCorasick(rows, values=rows)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def match(self, name: str, description: str) -> Dict[int, float]:
+        """Template row -> blend weight for the templates a meal mentions."""
+        name_text = _normalize(name)
+        text = name_text + "\n" + _normalize(description)
+        hits = list(self._automaton.iter_word_matches(text))
+        weights: Dict[int, float] = {}
+        for start, end, row in hits:
+            if any(s <= start and end <= e and (s, e) != (start, end) for s, e, _ in hits):
+                continue
+            row = int(row)
+            weight = self.specificity[row] * (NAME_MATCH_WEIGHT if end <= len(name_text) else 1.0)
+            weights[row] = max(weights.get(row, 0.0), weight)
+        return weights
+
+    def blend(self, weights: Dict[int, float]) -> Tuple[np.ndarray, np.ndarray]:
+        """Weighted low/high ranges over the matched templates."""
+        rows = np.fromiter(weights.keys(), dtype=np.intp, count=len(weights))
+        w = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+        w /= w.sum()
+        return w @ self.lo[rows], w @ self.hi[rows]
+
+    def confidence(self, weights: Dict[int, float], lo: np.ndarray, hi: np.ndarray) -> float:
+        """
+        0-1 trust in a blended estimate: higher for more specific templates
+        and for templates named in the meal name, lower for wide calorie ranges.
+        """
+        specificity = min(0.9, 0.4 + 0.2 * max(self.specificity[row] for row in weights))
+        placement = 1.0 if any(w > self.specificity[row] for row, w in weights.items()) else 0.8
+        total = hi[0] + lo[0]
+        precision = 1.0 - (hi[0] - lo[0]) / total if total > 0 else 0.5
+        return round(float(specificity * placement * precision), 3)
+
 class NutritionEstimator:
     def __init__(self):
         self.settings = get_settings()
@@ -37,7 +115,10 @@ class NutritionEstimator:
         self.temperature = 0
         self.max_tokens = 128
         self.max_retries = 3
+        self.gpt_threshold = self.settings.NUTRITION_GPT_THRESHOLD
         self.templates = self._load_templates()
+        self.template_index = TemplateIndex(self.templates)
+        self.composition = CompositionEstimator()
 
     def _load_templates(self):
         try:
@@ -47,8 +128,77 @@ class NutritionEstimator:
             logger.warn("nutrition.templates.load_failed", error=str(e))
             return {}
 
-    async def estimate(self, name: str, description: str) -> Dict[str, Any]:
-        # Try GPT first
+    async def estimate(self, name: str, description: str, high_confidence: bool = False) -> Dict[str, Any]:
+        """
+        Tiered: the cross-restaurant dish memo, the cached estimate, then
+        the best of a near-duplicate dish's estimate, the templates and the
+        ingredient breakdown, then GPT. GPT is called only when that
+        confidence is below the threshold or the caller asks for high
+        confidence. While the background refiner runs, a low-confidence
+        estimate is returned at once and refined there instead; GPT results
+        are cached either way.
+        """
+        memo = dish_memo.get(name)
+        if memo and (not high_confidence or memo.get("confidence") == "high"):
+            self._index_similar(name, description, memo)
+            self._log_tier("memo", name, memo.get("confidence_score"), high_confidence)
+            return memo
+        key = nutrition_cache_key(name, description)
+        cached = get_cache(key)
+        if cached and (not high_confidence or cached.get("confidence") == "high"):
+            self._index_similar(name, description, cached)
+            self._log_tier("cache", name, cached.get("confidence_score"), high_confidence)
+            return cached
+        cheap = self._rule_based_estimate(name, description)
+        score = cheap["confidence_score"]
+        # A near-duplicate's inherited estimate competes with the templates
+        similar = dish_lsh.lookup(name, description)
+        if similar and similar["confidence_score"] > score:
+            cheap, score = similar, similar["confidence_score"]
+        if not high_confidence and score >= self.gpt_threshold:
+            self._log_tier(cheap["origin"], name, score, high_confidence)
+            return cheap
+        if not high_confidence and nutrition_refiner.running:
+            queued = nutrition_refiner.submit(key, name, description)
+            self._log_tier("rule_queued" if queued else cheap["origin"], name, score, high_confidence)
+            return cheap
+        result = await self._gpt_estimate(name, description)
+        if result:
+            self.remember(name, description, result)
+            self._log_tier("gpt", name, score, high_confidence)
+            return result
+        # Fallback: rule-based
+        log_event('fallback_used', {'method': 'rule/manual', 'name': name, 'desc': description})
+        self._log_tier(cheap["origin"], name, score, high_confidence)
+        return cheap
+
+    async def refine(self, name: str, description: str) -> Optional[Dict[str, Any]]:
+        """GPT estimate for a dish, written back to the caches; used by the background refiner."""
+        result = await self._gpt_estimate(name, description)
+        if result:
+            self.remember(name, description, result)
+        return result
+
+    def remember(self, name: str, description: str, result: Dict[str, Any]):
+        set_cache(nutrition_cache_key(name, description), result, CACHE_TTLS.get('nutrition_ttl', 604800))
+        dish_memo.put(name, result)
+        dish_lsh.add(name, description, result)
+
+    def _index_similar(self, name: str, description: str, result: Dict[str, Any]):
+        # Warm the near-duplicate index from persisted GPT estimates as they are read
+        if result.get("origin") == "gpt" and name not in dish_lsh:
+            dish_lsh.add(name, description, result)
+
+    def _log_tier(self, tier: str, name: str, score: Optional[float], high_confidence: bool):
+        log_event('nutrition_tier', {
+            'tier': tier,
+            'name': name,
+            'rule_score': score,
+            'threshold': self.gpt_threshold,
+            'high_confidence': high_confidence
+        })
+
+    async def _gpt_estimate(self, name: str, description: str) -> Optional[Dict[str, Any]]:
         for attempt in range(self.max_retries):
             try:
                 messages = [
@@ -56,14 +206,15 @@ class NutritionEstimator:
                     *FEW_SHOT_EXAMPLES,
                     {"role": "user", "content": f"{name}: {description}"}
                 ]
-                response = await openai.ChatCompletion.acreate(
-                    model=self.model,
-                    messages=messages,
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens,
-                    response_format={"type": "json_object"},
-                    timeout=20
-                )
+                async with governor.slot("openai"):
+                    response = await openai.ChatCompletion.acreate(
+                        model=self.model,
+                        messages=messages,
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                        response_format={"type": "json_object"},
+                        timeout=20
+                    )
                 content = response.choices[0].message.content
                 data = self._safe_json_load(content)
                 if data and "calories" in data:
@@ -79,34 +230,22 @@ class NutritionEstimator:
                     return {
                         "nutrition": data,
                         "origin": "gpt",
-                        "confidence": "high"
+                        "confidence": "high",
+                        "confidence_score": GPT_CONFIDENCE_SCORE
                     }
             except Exception as e:
                 logger.warn("nutrition.gpt.retry", error=str(e), attempt=attempt)
                 await asyncio.sleep(2 ** attempt)
-        # Fallback: rule-based
-        log_event('fallback_used', {'method': 'rule/manual', 'name': name, 'desc': description})
-        return self._rule_based_estimate(name, description)
+        return None
 
     def _rule_based_estimate(self, name: str, description: str) -> Dict[str, Any]:
-        text = f"{name} {description}".lower()
-        for key, tpl in self.templates.items():
-            if key in text:
-                # Use average of range
-                nutrition = {
-                    "calories": int(sum(tpl["calories"]) / 2),
-                    "protein": float(sum(tpl["protein"]) / 2),
-                    "carbs": float(sum(tpl["carbs"]) / 2),
-                    "fat": float(sum(tpl["fat"]) / 2),
-                    "fiber": None, "sugar": None, "sodium": None,
-                    "confidence_level": "medium",
-                    "estimation_origin": "rule"
-                }
-                return {
-                    "nutrition": nutrition,
-                    "origin": "rule",
-                    "confidence": "medium"
-                }
+        # The dish templates and the ingredient breakdown compete; the manual default is the last resort
+        template = self._template_estimate(name, description)
+        composed = self.composition.estimate(name, description)
+        if composed and (template is None or composed["confidence_score"] > template["confidence_score"]):
+            return composed
+        if template:
+            return template
         # Manual fallback
         nutrition = {
             "calories": 400, "protein": 20, "carbs": 40, "fat": 10, "fiber": None, "sugar": None, "sodium": None,
@@ -116,9 +255,35 @@ class NutritionEstimator:
         return {
             "nutrition": nutrition,
             "origin": "manual",
-            "confidence": "low"
+            "confidence": "low",
+            "confidence_score": 0.0
         }
 
+    def _template_estimate(self, name: str, description: str) -> Optional[Dict[str, Any]]:
+        weights = self.template_index.match(name, description)
+        if weights:
+            lo, hi = self.template_index.blend(weights)
+            score = self.template_index.confidence(weights, lo, hi)
+            # Midpoint of the blended ranges
+            calories, protein, carbs, fat = ((lo + hi) / 2).tolist()
+            nutrition = {
+                "calories": int(round(calories)),
+                "protein": round(protein, 1),
+                "carbs": round(carbs, 1),
+                "fat": round(fat, 1),
+                "fiber": None, "sugar": None, "sodium": None,
+                "confidence_level": "medium",
+                "estimation_origin": "rule"
+            }
+            return {
+                "nutrition": nutrition,
+                "origin": "rule",
+                "confidence": "medium",
+                "confidence_score": score,
+                "templates": [self.template_index.keys[row] for row in weights]
+            }
+        return None
+
     def _safe_json_load(self, content: str) -> Any:
         try:
             return json.loads(content)
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from typing import Any, List, Optional, Set
+import structlog
+from core.analytics import log_event
+from core.concurrency import CONCURRENCY_CONFIG, bind_request_context
+
+logger = structlog.get_logger()
+
+REFINEMENT_CONFIG = CONCURRENCY_CONFIG.get('refinement') or {}
+REFINER_WORKERS = int(REFINEMENT_CONFIG.get('workers', 1))
+REFINER_QUEUE_SIZE = int(REFINEMENT_CONFIG.get('queue_size', 1000))
+REFINER_CALLS_PER_HOUR = float(REFINEMENT_CONFIG.get('calls_per_hour', 600))
+REFINER_BURST = float(REFINEMENT_CONFIG.get('burst', 10))
+REFINER_PLAN = "background"
+
+class NutritionRefiner:
+    """
+    Background GPT refinement of template and manual nutrition estimates.
+
+    Requests return their cheap estimate at once and submit the dish here.
+    Workers drain the queue under their own token-bucket budget and the
+    "background" governor plan, whose lower weight gives refinement a
+    smaller share of OpenAI slots than live requests; it can still hold a
+    slot a live request then waits for. Each refined estimate is handed to
+    estimator.refine, which writes it back to the estimation caches.
+    """
+
+    def __init__(self, workers: int = REFINER_WORKERS, queue_size: int = REFINER_QUEUE_SIZE,
+                 calls_per_hour: float = REFINER_CALLS_PER_HOUR, burst: float = REFINER_BURST):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.calls_per_hour = calls_per_hour
+        # Bucket capacity: a backlog after startup or an idle spell drains at the
+        # hourly rate after at most this many back-to-back calls
+        self.burst = max(1.0, min(burst, calls_per_hour))
+        self.estimator: Any = None
+        self.queue: Optional[asyncio.Queue] = None
+        self.pending: Set[str] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self.refined = 0
+        self.failed = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    def start(self, estimator: Any):
+        """Start the workers on the running loop; estimator must provide refine(name, description)."""
+        if self.running:
+            return
+        self.estimator = estimator
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.pending.clear()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info("nutrition.refiner.started", workers=self.workers, calls_per_hour=self.calls_per_hour)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, key: str, name: str, description: str) -> bool:
+        """Queue a dish for refinement; False when not running, already queued or the queue is full."""
+        if not self.running or key in self.pending:
+            return False
+        try:
+            self.queue.put_nowait((key, name, description))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.pending.add(key)
+        return True
+
+    async def _take_budget(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.calls_per_hour / 3600)
+            self._stamp = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) * 3600 / self.calls_per_hour)
+
+    async def _worker(self, worker_id: int):
+        bind_request_context(REFINER_PLAN, f"refiner-{worker_id}")
+        while True:
+            key, name, description = await self.queue.get()
+            try:
+                await self._take_budget()
+                result = await self.estimator.refine(name, description)
+                if result:
+                    self.refined += 1
+                else:
+                    self.failed += 1
+                log_event('nutrition_refined', {'name': name, 'desc': description, 'refined': bool(result)})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.warn("nutrition.refiner.failed", name=name, error=str(e))
+            finally:
+                self.pending.discard(key)
+                self.queue.task_done()
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "refined": self.refined,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+# Process-level singleton, started with the app
+nutrition_refiner = NutritionRefiner()
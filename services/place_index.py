@@ -0,0 +1,310 @@
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+import structlog
+from utils.cache import CACHE_TTLS
+
+logger = structlog.get_logger()
+
+PLACE_INDEX_PATH = os.path.join(os.path.dirname(__file__), '../logs/place_index.json')
+GEOHASH_PRECISION = 6  # ~1.2km x 0.6km cells
+CIRCLE_BUCKET_PRECISION = 3  # ~156km buckets for whole-circle containment checks
+COVERAGE_TTL = CACHE_TTLS.get('place_index_ttl', 86400)
+MAX_PLACES = 50000
+SAVE_DELAY = 5.0  # seconds; saves requested while one is pending are batched into it
+INDEXED_FIELDS = ("name", "place_id", "location", "rating", "website")
+EARTH_RADIUS_KM = 6371.0
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash_encode(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_lo, lat_hi, lng_lo, lng_hi = -90.0, 90.0, -180.0, 180.0
+    chars = []
+    bit, ch, even = 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch = (ch << 1) | 1
+                lng_lo = mid
+            else:
+                ch <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_BASE32[ch])
+            bit, ch = 0, 0
+    return "".join(chars)
+
+def cell_size(precision: int = GEOHASH_PRECISION) -> Tuple[float, float]:
+    """(lat_step, lng_step) in degrees of one geohash cell."""
+    bits = precision * 5
+    return 180.0 / (1 << (bits // 2)), 360.0 / (1 << ((bits + 1) // 2))
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def cells_for_circle(lat: float, lng: float, radius_km: float, precision: int = GEOHASH_PRECISION, flag_inside: bool = True) -> List[Dict[str, Any]]:
+    """Grid cells intersecting the circle, flagged when fully inside it."""
+    lat_step, lng_step = cell_size(precision)
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    lat0 = math.floor((lat - dlat + 90.0) / lat_step) * lat_step - 90.0
+    lng0 = math.floor((lng - dlng + 180.0) / lng_step) * lng_step - 180.0
+    cells = []
+    cell_lat = lat0
+    while cell_lat < lat + dlat:
+        cell_lng = lng0
+        while cell_lng < lng + dlng:
+            # Closest point of the cell to the circle center decides intersection
+            near_lat = min(max(lat, cell_lat), cell_lat + lat_step)
+            near_lng = min(max(lng, cell_lng), cell_lng + lng_step)
+            if haversine_km(lat, lng, near_lat, near_lng) <= radius_km:
+                corners = [(cell_lat, cell_lng), (cell_lat + lat_step, cell_lng),
+                           (cell_lat, cell_lng + lng_step), (cell_lat + lat_step, cell_lng + lng_step)]
+                center = (cell_lat + lat_step / 2, cell_lng + lng_step / 2)
+                cells.append({
+                    "hash": geohash_encode(center[0], center[1], precision),
+                    "center": center,
+                    "inside": flag_inside and all(haversine_km(lat, lng, c[0], c[1]) <= radius_km for c in corners),
+                })
+            cell_lng += lng_step
+        cell_lat += lat_step
+    return cells
+
+class PlaceIndex:
+    """
+    Geohash grid of every place seen from Google, with per-(cell, keyword)
+    coverage timestamps so repeat-area radius queries can skip Google.
+
+    A query is covered when a fresh earlier search circle contains it, or when
+    every cell it touches lies fully inside some earlier search circle.
+
+    Places not seen within the coverage TTL expire, and at most max_places
+    are kept. Inside an event loop, saves are debounced and written from a
+    worker thread, merged with what other processes wrote to the same file.
+    """
+
+    def __init__(self, path: str = PLACE_INDEX_PATH, precision: int = GEOHASH_PRECISION, coverage_ttl: int = COVERAGE_TTL,
+                 max_places: int = MAX_PLACES, save_delay: float = SAVE_DELAY):
+        self.path = path
+        self.precision = precision
+        self.coverage_ttl = coverage_ttl
+        self.max_places = max_places
+        self.save_delay = save_delay
+        self.places: Dict[str, Dict[str, Any]] = {}
+        self.cells: Dict[str, set] = defaultdict(set)
+        self.coverage: Dict[str, float] = {}
+        self.circles: Dict[str, List[List[float]]] = defaultdict(list)
+        self._save_pending = False
+        self._write_lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _coverage_key(cell_hash: str, keyword: str) -> str:
+        return f"{cell_hash}|{keyword.strip().lower()}"
+
+    def _circle_key(self, lat: float, lng: float, keyword: str) -> str:
+        return self._coverage_key(geohash_encode(lat, lng, CIRCLE_BUCKET_PRECISION), keyword)
+
+    def _contained(self, lat: float, lng: float, radius_km: float, kw: str, now: float) -> bool:
+        for c_lat, c_lng, c_radius, ts in self.circles.get(self._circle_key(lat, lng, kw), ()):
+            if now - ts <= self.coverage_ttl and haversine_km(lat, lng, c_lat, c_lng) + radius_km <= c_radius:
+                return True
+        return False
+
+    def query(self, lat: float, lng: float, radius_km: float, keyword: str, limit: Optional[int] = None, now: Optional[float] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Return (known places inside the circle, cells whose coverage is missing or stale)."""
+        now = now or time.time()
+        kw = keyword.strip().lower()
+        hits = []
+        uncovered = []
+        contained = self._contained(lat, lng, radius_km, kw, now)
+        for cell in cells_for_circle(lat, lng, radius_km, self.precision, flag_inside=False):
+            ts = now if contained else self.coverage.get(self._coverage_key(cell["hash"], kw))
+            if ts is None or now - ts > self.coverage_ttl:
+                uncovered.append(cell)
+                continue
+            for place_id in self.cells.get(cell["hash"], ()):
+                record = self.places[place_id]
+                if kw not in record["keywords"]:
+                    continue
+                loc = record["location"]
+                dist = haversine_km(lat, lng, loc["lat"], loc["lng"])
+                if dist <= radius_km:
+                    hits.append((dist, record))
+        hits.sort(key=lambda x: x[0])
+        places = [{f: record.get(f) for f in INDEXED_FIELDS} for _, record in hits[:limit]]
+        return places, uncovered
+
+    def uncovered_region(self, lat: float, lng: float, radius_km: float, uncovered: List[Dict[str, Any]]) -> Tuple[float, float, float]:
+        """Smallest (center, radius) around the uncovered cells, never wider than the original circle."""
+        c_lat = sum(c["center"][0] for c in uncovered) / len(uncovered)
+        c_lng = sum(c["center"][1] for c in uncovered) / len(uncovered)
+        lat_step, lng_step = cell_size(self.precision)
+        half_diag = haversine_km(0, 0, lat_step / 2, lng_step / 2)
+        reach = max(haversine_km(c_lat, c_lng, c["center"][0], c["center"][1]) for c in uncovered) + half_diag
+        if reach >= radius_km:
+            return lat, lng, radius_km
+        return c_lat, c_lng, reach
+
+    def add_places(self, places: List[Dict[str, Any]], keyword: str, lat: float, lng: float, radius_km: float, now: Optional[float] = None, mark_coverage: bool = True):
+        """Index places returned by a nearby search and mark the cells it fully covered."""
+        now = now or time.time()
+        kw = keyword.strip().lower()
+        for p in places:
+            loc = p.get("location") or {}
+            if not p.get("place_id") or "lat" not in loc or "lng" not in loc:
+                continue
+            record = self.places.get(p["place_id"])
+            if record is None:
+                record = {"keywords": []}
+                self.places[p["place_id"]] = record
+            else:
+                old = record["location"]
+                self.cells[geohash_encode(old["lat"], old["lng"], self.precision)].discard(p["place_id"])
+            record.update({f: p.get(f) for f in INDEXED_FIELDS})
+            record["last_seen"] = now
+            if kw not in record["keywords"]:
+                record["keywords"].append(kw)
+            self.cells[geohash_encode(loc["lat"], loc["lng"], self.precision)].add(p["place_id"])
+        if mark_coverage:
+            for cell in cells_for_circle(lat, lng, radius_km, self.precision):
+                if cell["inside"]:
+                    self.coverage[self._coverage_key(cell["hash"], kw)] = now
+            self.circles[self._circle_key(lat, lng, kw)].append([lat, lng, radius_km, now])
+        self._save()
+
+    def prune(self, now: Optional[float] = None):
+        """Drop expired coverage, circles and places, then the least recently seen places above max_places."""
+        now = now or time.time()
+        self.coverage = {k: ts for k, ts in self.coverage.items() if now - ts <= self.coverage_ttl}
+        for key in list(self.circles):
+            fresh = [c for c in self.circles[key] if now - c[3] <= self.coverage_ttl]
+            if fresh:
+                self.circles[key] = fresh
+            else:
+                del self.circles[key]
+        expired = [pid for pid, r in self.places.items() if now - r.get("last_seen", 0) > self.coverage_ttl]
+        excess = len(self.places) - len(expired) - self.max_places
+        if excess > 0:
+            alive = sorted((r.get("last_seen", 0), pid) for pid, r in self.places.items() if now - r.get("last_seen", 0) <= self.coverage_ttl)
+            expired.extend(pid for _, pid in alive[:excess])
+        for place_id in expired:
+            self._remove_place(place_id)
+
+    def _remove_place(self, place_id: str):
+        record = self.places.pop(place_id, None)
+        if record is None:
+            return
+        loc = record["location"]
+        cell_hash = geohash_encode(loc["lat"], loc["lng"], self.precision)
+        ids = self.cells.get(cell_hash)
+        if ids is not None:
+            ids.discard(place_id)
+            if not ids:
+                del self.cells[cell_hash]
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.places = data.get("places", {})
+            self.coverage = data.get("coverage", {})
+            self.circles.update(data.get("circles", {}))
+            for place_id, record in self.places.items():
+                loc = record["location"]
+                self.cells[geohash_encode(loc["lat"], loc["lng"], self.precision)].add(place_id)
+            self.prune()
+        except Exception as e:
+            logger.warn("place_index.load_failed", error=str(e))
+
+    def _save(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Outside an event loop (scripts, tests) write straight away
+            self.flush()
+            return
+        if not self._save_pending:
+            self._save_pending = True
+            loop.call_later(self.save_delay, self._flush_in_background, loop)
+
+    def _flush_in_background(self, loop: asyncio.AbstractEventLoop):
+        self._save_pending = False
+        loop.run_in_executor(None, self._write, self._snapshot())
+
+    def flush(self):
+        """Prune and write the index now."""
+        self._write(self._snapshot())
+
+    def _snapshot(self) -> Dict[str, Any]:
+        # Copied on the caller's thread, so the writer never sees the index mid-update
+        self.prune()
+        return {
+            "places": {pid: {**r, "keywords": list(r["keywords"])} for pid, r in self.places.items()},
+            "coverage": dict(self.coverage),
+            "circles": {k: [list(c) for c in v] for k, v in self.circles.items()},
+        }
+
+    def _write(self, data: Dict[str, Any]):
+        with self._write_lock:
+            try:
+                self._merge_from_disk(data)
+                tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "w") as f:
+                    json.dump(data, f)
+                os.replace(tmp, self.path)
+            except Exception as e:
+                logger.warn("place_index.save_failed", error=str(e))
+
+    def _merge_from_disk(self, data: Dict[str, Any]):
+        """Keep what other workers saved since: newer places, later coverage and their circles."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                disk = json.load(f)
+        except Exception:
+            return
+        now = time.time()
+        for place_id, record in disk.get("places", {}).items():
+            if now - record.get("last_seen", 0) > self.coverage_ttl:
+                continue
+            mine = data["places"].get(place_id)
+            if mine is None or record.get("last_seen", 0) > mine.get("last_seen", 0):
+                data["places"][place_id] = record
+        if len(data["places"]) > self.max_places:
+            newest = sorted(data["places"].items(), key=lambda item: item[1].get("last_seen", 0), reverse=True)
+            data["places"] = dict(newest[:self.max_places])
+        for key, ts in disk.get("coverage", {}).items():
+            if now - ts <= self.coverage_ttl and ts > data["coverage"].get(key, 0):
+                data["coverage"][key] = ts
+        for key, circles in disk.get("circles", {}).items():
+            merged = data["circles"].setdefault(key, [])
+            for circle in circles:
+                if now - circle[3] <= self.coverage_ttl and circle not in merged:
+                    merged.append(circle)
+
+@lru_cache()
+def get_place_index() -> PlaceIndex:
+    return PlaceIndex()
@@ -0,0 +1,69 @@
+import pytest
+import utils.cache as cache_module
+from services.candidate_pool import CandidatePoolCache, pool_key
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    # Keep test entries out of the shared logs/file_cache and any live Redis
+    monkeypatch.setattr(cache_module, "FILE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(cache_module, "redis_client", None)
+
+def test_pool_key_buckets_radius_and_tile():
+    assert pool_key(40.71280, -74.00600, 2.2, "High Protein") == pool_key(40.71281, -74.00601, 2.5, "high protein")
+    assert pool_key(40.7128, -74.0060, 2.2, "keto") != pool_key(40.7128, -74.0060, 2.6, "keto")
+
+def test_pool_round_trip_and_shared_cache():
+    restaurants = [[{"name": "Chicken Bowl", "nutrition": {"calories": 500, "protein": 40, "carbs": 45, "fat": 15}}], []]
+    writer = CandidatePoolCache()
+    assert writer.get(40.7128, -74.0060, 3, "pool test") is None
+    writer.set(40.7128, -74.0060, 3, "pool test", restaurants)
+    assert writer.get(40.7128, -74.0060, 3, "pool test").restaurants == restaurants
+    # A fresh process-local LRU falls through to the shared cache
+    pool = CandidatePoolCache().get(40.7128, -74.0060, 3, "pool test")
+    assert pool.restaurants == restaurants
+    assert len(pool.index) == 1
+
+def test_pool_reused_only_inside_its_circle():
+    near = [{"name": "Near Bowl", "nutrition": {"calories": 500}}]
+    edge = [{"name": "Edge Wrap", "nutrition": {"calories": 600}}]
+    places = [
+        {"place_id": "near", "name": "Near Bowl Co", "location": {"lat": 40.7130, "lng": -74.0060}},
+        {"place_id": "edge", "name": "Edge Wraps", "location": {"lat": 40.7340, "lng": -74.0060}},
+    ]
+    # Same tile and radius bucket, but a stored 2.1 km circle does not cover 2.5 km
+    assert pool_key(40.7128, -74.0060, 2.1, "circle test") == pool_key(40.7128, -74.0060, 2.5, "circle test")
+    small = CandidatePoolCache()
+    small.set(40.7128, -74.0060, 2.1, "circle test", [near], places[:1])
+    assert small.get(40.7128, -74.0060, 2.5, "circle test") is None
+    # A stored 2.5 km pool serves 2.1 km without the restaurant ~2.4 km away
+    large = CandidatePoolCache()
+    large.set(40.7128, -74.0060, 2.5, "circle test", [near, edge], places)
+    narrowed = large.get(40.7128, -74.0060, 2.1, "circle test")
+    assert narrowed.restaurants == [near]
+    assert narrowed.places == places[:1]
+    assert large.get(40.7128, -74.0060, 2.5, "circle test").restaurants == [near, edge]
+
+def test_narrowed_pool_reuses_stored_index(monkeypatch):
+    import services.candidate_pool as pool_module
+    near = [{"name": "Near Bowl", "nutrition": {"calories": 500}}]
+    edge = [{"name": "Edge Wrap", "nutrition": {"calories": 600}}]
+    places = [
+        {"place_id": "near", "name": "Near Bowl Co", "location": {"lat": 40.7130, "lng": -74.0060}},
+        {"place_id": "edge", "name": "Edge Wraps", "location": {"lat": 40.7340, "lng": -74.0060}},
+    ]
+    built = []
+
+    class CountingIndex(pool_module.RangeIndex):
+        def __init__(self, groups):
+            built.append(len(groups))
+            super().__init__(groups)
+
+    monkeypatch.setattr(pool_module, "RangeIndex", CountingIndex)
+    cache = CandidatePoolCache()
+    cache.set(40.7128, -74.0060, 2.5, "narrow index test", [near, edge], places)
+    for _ in range(3):
+        narrowed = cache.get(40.7128, -74.0060, 2.1, "narrow index test")
+        grouped = narrowed.index.regroup(narrowed.index.select({"calories": (None, 800)}))
+        assert grouped == [(0, near)]
+    # Only the stored pool is indexed; each narrowed request filters it
+    assert built == [2]
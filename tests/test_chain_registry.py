@@ -0,0 +1,115 @@
+import services.chain_registry as chain_module
+from services.chain_registry import ChainRegistry, normalize_chain_name, website_domain
+
+MENU = [
+    {"name": "Chicken Burrito Bowl", "description": "Rice, beans, chicken", "price": "$10.95"},
+    {"name": "Steak Tacos", "description": "Three tacos", "price": "$11.50"},
+]
+
+def _registry(monkeypatch, store=None, **kwargs):
+    store = {} if store is None else store
+    monkeypatch.setattr(chain_module, "get_cache", store.get)
+    monkeypatch.setattr(chain_module, "set_cache", lambda key, value, ttl: store.__setitem__(key, value))
+    kwargs.setdefault("verify_rate", 0.0)
+    return ChainRegistry(**kwargs)
+
+def test_identity_normalization():
+    assert normalize_chain_name("McDonald's - Times Sq") == normalize_chain_name("MCDONALDS (#1234)") == "mcdonalds"
+    assert website_domain("https://www.chipotle.com/locations/ny") == "chipotle.com"
+    assert website_domain("https://facebook.com/joes-diner") is None
+
+def test_domain_chain_reused_with_overrides(monkeypatch):
+    registry = _registry(monkeypatch)
+    site = "https://www.chipotle.com"
+    assert registry.menu_for({"name": "Chipotle - Midtown", "place_id": "p1", "website": site}) is None
+    registry.observe({"name": "Chipotle - Midtown", "place_id": "p1", "website": site}, MENU)
+    assert registry.menu_for({"name": "Chipotle Mexican Grill", "place_id": "p2", "website": site}) is None
+    assert registry.menu_for({"name": "Chipotle (Soho)", "place_id": "p2", "website": site}) == MENU
+    # A location with a different price keeps only the difference
+    local = [MENU[0], dict(MENU[1], price="$12.50"), {"name": "Local Special", "price": "$9"}]
+    registry.observe({"name": "Chipotle", "place_id": "p3", "website": site}, local)
+    assert registry.menu_for({"name": "Chipotle", "place_id": "p3", "website": site}) == local
+    assert registry.menu_for({"name": "Chipotle", "place_id": "p4", "website": site}) == MENU
+
+NEAR = {"lat": 40.7128, "lng": -74.0060}
+FAR = {"lat": 34.0522, "lng": -118.2437}
+
+def test_name_only_chain_needs_matching_menus_nearby(monkeypatch):
+    registry = _registry(monkeypatch)
+    registry.observe({"name": "Golden Dragon", "place_id": "a", "location": NEAR}, MENU)
+    assert registry.menu_for({"name": "Golden Dragon", "place_id": "b", "location": NEAR}) is None
+    registry.observe({"name": "Golden Dragon", "place_id": "b", "location": NEAR}, [{"name": "Kung Pao Chicken"}])
+    assert registry.menu_for({"name": "Golden Dragon", "place_id": "c", "location": NEAR}) is None
+    registry.observe({"name": "Golden Dragon #2", "place_id": "c", "location": NEAR}, MENU)
+    assert registry.menu_for({"name": "Golden Dragon", "place_id": "d", "location": NEAR}) == MENU
+    # An unrelated Golden Dragon elsewhere, or one without a location, is never given that menu
+    assert registry.menu_for({"name": "Golden Dragon", "place_id": "e", "location": FAR}) is None
+    assert registry.menu_for({"name": "Golden Dragon", "place_id": "f"}) is None
+
+def test_unverified_locations_are_sampled_for_a_fetch(monkeypatch):
+    monkeypatch.setattr(chain_module.random, "random", lambda: 0.1)
+    registry = _registry(monkeypatch, verify_rate=0.2)
+    site = "https://www.chipotle.com"
+    registry.observe({"name": "Chipotle", "place_id": "p1", "website": site}, MENU)
+    # The location that set the canonical menu is already verified
+    assert registry.menu_for({"name": "Chipotle", "place_id": "p1", "website": site}) == MENU
+    assert registry.menu_for({"name": "Chipotle", "place_id": "p2", "website": site}) is None
+    assert registry.verifications == 1
+    # Once compared, the location is served from the chain, identical or not
+    registry.observe({"name": "Chipotle", "place_id": "p2", "website": site}, MENU)
+    assert registry.menu_for({"name": "Chipotle", "place_id": "p2", "website": site}) == MENU
+    monkeypatch.setattr(chain_module.random, "random", lambda: 0.9)
+    assert registry.menu_for({"name": "Chipotle", "place_id": "p3", "website": site}) == MENU
+
+def test_local_copies_expire_and_are_bounded(monkeypatch):
+    store = {}
+    now = [1000.0]
+    monkeypatch.setattr(chain_module.time, "monotonic", lambda: now[0])
+    registry = _registry(monkeypatch, store, local_ttl=60, max_overrides=2)
+    site = "https://www.chipotle.com"
+    registry.observe({"name": "Chipotle", "place_id": "p1", "website": site}, MENU)
+    # Once the shared entry expires, the local copy is only served until local_ttl
+    del store["chain_menu:chipotle@chipotle.com"]
+    assert registry.menu_for({"name": "Chipotle", "place_id": "p2", "website": site}) == MENU
+    now[0] += 61
+    assert registry.menu_for({"name": "Chipotle", "place_id": "p2", "website": site}) is None
+    # Looked-up overrides, including 'no override', are kept for at most max_overrides places
+    registry.observe({"name": "Chipotle", "place_id": "p1", "website": site}, MENU)
+    for pid in ("p2", "p3", "p4"):
+        registry.menu_for({"name": "Chipotle", "place_id": pid, "website": site})
+    assert list(registry._overrides) == ["p3", "p4"]
+
+async def test_scrape_records_how_a_location_differs(monkeypatch):
+    from services import meal_discovery
+    store = {}
+    registry = _registry(monkeypatch, store, verify_rate=0.5)
+    monkeypatch.setattr(meal_discovery, "chain_registry", registry)
+    monkeypatch.setattr(meal_discovery.preference_index, "index_menu", lambda place, meals: None)
+    monkeypatch.setattr(meal_discovery, "log_event", lambda *a: None)
+    site = "https://www.chipotle.com"
+    local = [MENU[0], dict(MENU[1], price="$12.50")]
+    menus = {"p1": MENU, "p2": local, "p3": MENU}
+    fetched = []
+
+    async def fetch_ubereats(place):
+        fetched.append(place["place_id"])
+        return [dict(m) for m in menus[place["place_id"]]]
+
+    service = meal_discovery.MealDiscoveryService()
+    monkeypatch.setattr(service, "_fetch_ubereats_meals", fetch_ubereats)
+    rolls = iter([0.1, 0.9])
+    monkeypatch.setattr(chain_module.random, "random", lambda: next(rolls))
+    first = await service._scrape_and_parse_menu({"name": "Chipotle", "place_id": "p1", "website": site})
+    assert [m["meal_id"] for m in first] == ["p1|chicken burrito bowl", "p1|steak tacos"]
+    # p2 is sampled for a fetch, which records its price difference
+    sampled = await service._scrape_and_parse_menu({"name": "Chipotle", "place_id": "p2", "website": site})
+    assert sampled[1]["price"] == "$12.50"
+    assert store["chain_override:p2"]["meals"][0]["price"] == "$12.50"
+    # p3 is not sampled and reuses the chain menu under its own ids
+    reused = await service._scrape_and_parse_menu({"name": "Chipotle", "place_id": "p3", "website": site})
+    assert [m["meal_id"] for m in reused] == ["p3|chicken burrito bowl", "p3|steak tacos"]
+    assert fetched == ["p1", "p2"]
+    # Later requests for p2 are answered from the chain with its override, without a fetch
+    again = await service._scrape_and_parse_menu({"name": "Chipotle", "place_id": "p2", "website": site})
+    assert again[1]["price"] == "$12.50" and again[1]["restaurant_id"] == "p2"
+    assert fetched == ["p1", "p2"]
@@ -0,0 +1,90 @@
+import json
+import os
+import numpy as np
+from services.composition_estimator import CompositionEstimator, compile_food_table, load_food_table
+
+FOODS = {
+    "columns": ["calories", "protein", "carbs", "fat", "portion_g", "unit_g"],
+    "foods": {
+        "ribeye": [300, 24, 0, 22, 280, 0],
+        "brown rice": [120, 3, 25, 1, 180, 0],
+        "white rice": [130, 3, 28, 0, 180, 0],
+        "broccoli": [35, 2, 7, 0, 90, 0],
+        "egg": [140, 12, 1, 10, 100, 50],
+        "chicken breast": [165, 31, 0, 4, 150, 0],
+        "pepperoni": [494, 23, 0, 44, 20, 0],
+    },
+    "aliases": {"rice": "white rice", "steak": "ribeye", "chicken": "chicken breast"},
+}
+
+def _estimator(tmp_path):
+    path = tmp_path / "foods.json"
+    path.write_text(json.dumps(FOODS))
+    return CompositionEstimator(load_food_table(str(path), str(tmp_path / "foods.npy")))
+
+def test_compiled_table_is_memory_mapped(tmp_path):
+    estimator = _estimator(tmp_path)
+    assert isinstance(estimator.table, np.memmap)
+    assert os.path.exists(tmp_path / "foods.npy")
+    # Plurals and aliases are rows of their own
+    names = set(estimator.table["name"].tolist())
+    assert {"eggs", "rice", "steak"} <= names
+    assert len(compile_food_table(str(tmp_path / "foods.json"))) == len(estimator)
+
+def test_sums_ingredients_with_portions(tmp_path):
+    result = _estimator(tmp_path).estimate("Ribeye Plate", "10oz ribeye, brown rice, broccoli")
+    grams = {i["food"]: i["grams"] for i in result["ingredients"]}
+    # Longest match wins: brown rice, not rice
+    assert grams == {"ribeye": 283.5, "brown rice": 180.0, "broccoli": 90.0}
+    assert result["nutrition"]["calories"] == round(283.5 * 3 + 180 * 1.2 + 90 * 0.35)
+    assert result["origin"] == "composition"
+    assert result["nutrition"]["estimation_origin"] == "rule"
+
+def test_counts_and_dedupe_across_name_and_description(tmp_path):
+    result = _estimator(tmp_path).estimate("Steak and Eggs", "8 oz steak with two eggs")
+    grams = {i["food"]: i["grams"] for i in result["ingredients"]}
+    assert grams == {"ribeye": 226.8, "egg": 100.0}
+    assert result["confidence"] == "high"
+
+def test_confidence_reflects_coverage(tmp_path):
+    estimator = _estimator(tmp_path)
+    full = estimator.estimate("Rice and Broccoli", "")
+    partial = estimator.estimate("Broccoli Cheddar Soup", "creamy")
+    assert full["confidence_score"] > partial["confidence_score"]
+    assert estimator.estimate("Mystery Special", "chef's choice") is None
+
+def test_dishes_missing_from_the_table_are_low_confidence(tmp_path):
+    estimator = _estimator(tmp_path)
+    # The head noun names the dish; a topping or base alone does not explain it
+    for name in ("Pepperoni Pizza", "Chicken Wings"):
+        result = estimator.estimate(name, "")
+        assert result["confidence"] == "low"
+        assert result["confidence_score"] < 0.45
+    # 'Half' names a whole dish here, not half a portion
+    half = estimator.estimate("Half Chicken (rotisserie)", "")
+    assert half["ingredients"] == [{"food": "chicken breast", "grams": 150.0}]
+    assert half["confidence"] == "low"
+    # A portion in the description still counts, and a known head noun is not weak
+    assert estimator.estimate("Grilled Chicken", "half chicken breast")["ingredients"][0]["grams"] == 75.0
+    assert estimator.estimate("Chicken and Rice", "")["confidence"] != "low"
+
+def test_name_food_gives_way_to_a_specific_description_food(tmp_path):
+    path = tmp_path / "foods.json"
+    foods = dict(FOODS, foods=dict(FOODS["foods"], steak=[206, 29, 0, 9, 200, 0]), aliases={"chicken": "chicken breast"},
+                 groups={"ribeye": "beef", "steak": "beef", "brown rice": "rice", "white rice": "rice"})
+    path.write_text(json.dumps(foods))
+    estimator = CompositionEstimator(load_food_table(str(path), str(tmp_path / "foods.npy")))
+    result = estimator.estimate("Steak Dinner", "12oz ribeye, brown rice, broccoli")
+    grams = {i["food"]: i["grams"] for i in result["ingredients"]}
+    assert grams == {"ribeye": 340.2, "brown rice": 180.0, "broccoli": 90.0}
+    assert result["nutrition"]["calories"] == round(340.2 * 3 + 180 * 1.2 + 90 * 0.35)
+    # The name's food still counts when the description only adds to it
+    grams = {i["food"]: i["grams"] for i in estimator.estimate("Steak Plate", "with brown rice")["ingredients"]}
+    assert grams == {"steak": 200.0, "brown rice": 180.0}
+
+def test_older_compiled_layout_is_rebuilt(tmp_path):
+    path = tmp_path / "foods.json"
+    path.write_text(json.dumps(FOODS))
+    compiled = tmp_path / "foods.npy"
+    np.save(compiled, np.zeros(1, dtype=[("name", "U32"), ("food", "U32"), ("values", np.float32, (6,))]))
+    assert "group" in load_food_table(str(path), str(compiled)).dtype.names
@@ -0,0 +1,36 @@
+from services.dish_lsh import DishLSH
+
+GPT = {"nutrition": {"calories": 520, "protein": 42, "carbs": 48, "fat": 14, "confidence_level": "high"},
+       "origin": "gpt", "confidence": "high", "confidence_score": 0.9}
+
+def test_variants_inherit_with_discount():
+    index = DishLSH()
+    index.add("Grilled Chicken Rice Bowl", "grilled chicken, jasmine rice, broccoli", GPT)
+    index.add("Margherita Pizza", "tomato, mozzarella, basil", {**GPT, "nutrition": {"calories": 900}})
+    result = index.lookup("Chicken Bowl, Grilled", "grilled chicken with rice and broccoli")
+    assert result["similar_to"] == "Grilled Chicken Rice Bowl"
+    assert result["origin"] == "similar"
+    assert result["confidence"] == "medium"
+    assert result["nutrition"]["calories"] == 520
+    assert 0 < result["confidence_score"] < GPT["confidence_score"]
+    assert index.lookup("Beef Pho", "rice noodles in broth") is None
+
+def _name(i):
+    word = "".join(chr(ord("a") + int(d)) for d in str(i))
+    return f"Dish x{word} y{word} z{word}"
+
+def test_replace_and_evict():
+    index = DishLSH(max_entries=500)
+    for i in range(600):
+        index.add(_name(i), "", GPT)
+    assert len(index) == 500
+    assert _name(0) not in index and _name(100) in index
+    # Replacing the oldest dish swaps its estimate in place and makes it the newest
+    index.add(_name(100), "", {**GPT, "confidence_score": 0.5})
+    assert len(index) == 500
+    result = index.lookup(_name(100))
+    assert result["similar_to"] == _name(100)
+    assert result["confidence_score"] == round(0.5 * 0.85, 3)
+    index.add(_name(600), "", GPT)
+    assert _name(100) in index and _name(101) not in index
+    assert len(index) == 500
@@ -0,0 +1,24 @@
+import services.dish_memo as dish_memo_module
+from services.dish_memo import DishMemo, dish_signature
+
+def test_signature_is_shared_across_menus():
+    assert dish_signature("The Famous Grilled Chicken Caesar Salad") == dish_signature("caesar salad w/ grilled chicken")
+    assert dish_signature("Fish Tacos") == dish_signature("fish taco")
+    assert dish_signature("12 oz Ribeye Steak (Large)") == "ribeye steak|12oz,large"
+    assert dish_signature("Ribeye Steak 8oz") != dish_signature("Ribeye Steak 12 ounces")
+
+def test_more_confident_estimate_wins(monkeypatch):
+    store = {}
+    monkeypatch.setattr(dish_memo_module, "get_cache", store.get)
+    monkeypatch.setattr(dish_memo_module, "set_cache", lambda key, value, ttl: store.__setitem__(key, value))
+    memo = DishMemo(maxsize=2)
+    gpt = {"nutrition": {"calories": 480}, "origin": "gpt", "confidence": "high", "confidence_score": 0.9}
+    rule = {"nutrition": {"calories": 440}, "origin": "rule", "confidence": "medium", "confidence_score": 0.6}
+    assert memo.put("Grilled Chicken Caesar Salad", gpt)
+    assert not memo.put("Caesar Salad with Grilled Chicken", rule)
+    entry = memo.get("caesar salad, grilled chicken")
+    assert entry["origin"] == "gpt" and entry["signature"] == "caesar chicken grilled salad"
+    # Evicted from the LRU, still found in the backing cache
+    memo.put("Pad Thai", gpt)
+    memo.put("Beef Pho", gpt)
+    assert DishMemo().get("Grilled Chicken Caesar Salad")["nutrition"] == {"calories": 480}
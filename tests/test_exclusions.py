@@ -0,0 +1,49 @@
+from utils.aho_corasick import AhoCorasick
+from scoring.exclusions import compile_exclusions, excluded_mask, normalize_ingredient
+
+def test_automaton_finds_overlapping_patterns():
+    matches = list(AhoCorasick(["he", "she", "his", "hers"]).iter_matches("ushers"))
+    assert sorted(matches) == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+def test_synonyms_plurals_and_word_boundaries():
+    matcher = compile_exclusions(["Gluten", "peanuts", "eggs"])
+    assert matcher.find({"name": "Barley Risotto"}) == {"gluten"}
+    assert matcher.find({"name": "Satay Skewers", "tags": ["spicy"]}) == {"peanut"}
+    assert matcher.find({"name": "Breakfast Plate", "description": "Two eggs over easy"}) == {"egg"}
+    # Short terms match whole words only and exception words do not count: eggplant is not egg, buckwheat is not wheat
+    assert not matcher.find({"name": "Grilled Eggplant", "description": "buckwheat groats"})
+    # "gluten-free" and gluten_free tags name the absence of the ingredient
+    assert not matcher.find({"name": "Quinoa Bowl", "description": "gluten-free", "tags": ["gluten_free"]})
+
+def test_compound_words_and_gluten_carriers():
+    dairy = compile_exclusions(["dairy"])
+    for name in ["Cheeseburger", "Cheesecake", "Milkshake", "Buttermilk Pancakes"]:
+        assert dairy.find({"name": name}) == {"dairy"}, name
+    assert not dairy.find({"name": "PB&J", "description": "peanut butter, coconut milk smoothie"})
+    gluten = compile_exclusions(["gluten"])
+    for name in ["Flatbread", "Pepperoni Pizza", "Club Sandwich", "Ramen", "Pork Dumplings", "Butter Croissant", "Belgian Waffle"]:
+        assert gluten.find({"name": name}) == {"gluten"}, name
+    assert not gluten.find({"name": "Flourless Chocolate Torte", "description": "buckwheat crepe"})
+
+def test_oes_plurals():
+    assert normalize_ingredient("tomatoes") == "tomato"
+    assert normalize_ingredient("Potatoes") == "potato"
+    assert compile_exclusions(["tomatoes"]).find({"name": "Tomato Soup"}) == {"tomato"}
+
+def test_ies_plurals():
+    assert normalize_ingredient("strawberries") == "strawberry"
+    assert normalize_ingredient("Wild Blueberries") == "wild blueberry"
+    assert normalize_ingredient("cookies") == "cookie"
+    assert normalize_ingredient("pies") == "pie"
+    assert compile_exclusions(["strawberries"]).find({"name": "Strawberry Smoothie Bowl"}) == {"strawberry"}
+    assert compile_exclusions(["strawberries"]).find({"name": "Spinach Salad", "description": "with fresh strawberries"}) == {"strawberry"}
+
+def test_matchers_are_cached_per_exclusion_set():
+    assert compile_exclusions(["dairy", "Soy"]) is compile_exclusions(["soy", "dairy "])
+    assert compile_exclusions([]) is None and compile_exclusions(["  "]) is None
+    assert normalize_ingredient(" Tree_Nuts ") == "tree nut"
+
+def test_excluded_mask():
+    meals = [{"name": "Shrimp Tacos"}, {"name": "Chicken Salad"}, {"name": "Lobster Roll"}]
+    assert excluded_mask(meals, ["shellfish"]).tolist() == [True, False, True]
+    assert excluded_mask(meals, None).tolist() == [False, False, False]
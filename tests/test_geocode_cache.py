@@ -0,0 +1,44 @@
+import json
+import pytest
+import utils.cache as cache_module
+from utils.geocode_cache import GeocodeCache, normalize_address
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    # Keep test entries out of the shared logs/file_cache and any live Redis
+    monkeypatch.setattr(cache_module, "FILE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(cache_module, "redis_client", None)
+
+def test_normalize_address():
+    assert normalize_address("  Brooklyn,  NY ") == normalize_address("brooklyn ny") == "brooklyn ny"
+
+def test_fetch_once_then_cached():
+    cache = GeocodeCache(maxsize=2)
+    calls = []
+
+    def fetch(location):
+        calls.append(location)
+        return {"lat": 40.6782, "lng": -73.9442}
+
+    assert cache.get_or_fetch("Test Geocode Town, NY", fetch) == {"lat": 40.6782, "lng": -73.9442}
+    assert cache.get_or_fetch("test geocode town ny", fetch) == {"lat": 40.6782, "lng": -73.9442}
+    assert len(calls) == 1
+
+def test_failures_are_not_cached():
+    cache = GeocodeCache()
+    calls = []
+
+    def fetch(location):
+        calls.append(location)
+        return None
+
+    assert cache.get_or_fetch("Nowhere Geocode Failure", fetch) is None
+    assert cache.get_or_fetch("Nowhere Geocode Failure", fetch) is None
+    assert len(calls) == 2
+
+def test_seed_from_file(tmp_path):
+    path = tmp_path / "seed.json"
+    path.write_text(json.dumps({"Seeded Geocode City, CA": {"lat": 34.05, "lng": -118.24}}))
+    cache = GeocodeCache()
+    assert cache.seed_from_file(str(path)) == 1
+    assert cache.get_or_fetch("seeded geocode city ca", lambda loc: None) == {"lat": 34.05, "lng": -118.24}
@@ -36,4 +36,25 @@ def test_vegan_synonym():
 
 def test_invalid():
     with pytest.raises(GoalMatchError):
-        matcher.match("superman strength") 
\ No newline at end of file
+        matcher.match("superman strength") 
+
+def test_token_set_ratio_matches_fuzzywuzzy():
+    from fuzzywuzzy import fuzz, utils
+    from core.goal_matcher import _token_set_ratio
+    for text in ["muscle gaim", "lose weight fast", "Keto-Diet!!", "superman strength", "lean"]:
+        tokens = frozenset(utils.full_process(text).split())
+        for term in matcher.all_terms:
+            term_tokens = frozenset(utils.full_process(term).split())
+            assert _token_set_ratio(tokens, term_tokens) == fuzz.token_set_ratio(text, term)
+
+
+def test_suggestions_are_distinct_goals():
+    suggestions = matcher.suggest("lose weight fast")
+    assert 0 < len(suggestions) <= 3
+    assert len(suggestions) == len(set(suggestions))
+
+def test_accented_input_scores_like_fuzzywuzzy():
+    from fuzzywuzzy import fuzz
+    for text in ("músculo gain", "pérdida de peso", "kéto"):
+        _, confidence, _ = matcher._score(text)
+        assert confidence == max(fuzz.token_set_ratio(text, term) for term in matcher.all_terms), text
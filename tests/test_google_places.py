@@ -0,0 +1,178 @@
+import httpx
+import pytest
+import redis
+
+import services.google_places as google_places
+from services.google_places import DYNAMIC_PREFIX, GooglePlacesClient
+from services.place_index import PlaceIndex
+
+PLACE = {"name": "Fit Kitchen", "place_id": "p1", "location": {"lat": 40.7130, "lng": -74.0060}, "rating": 4.6, "website": None}
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+def no_redis(uri):
+    raise redis.ConnectionError("no redis in tests")
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(redis.Redis, "from_url", no_redis)
+    monkeypatch.setattr(google_places, "get_place_index", lambda: PlaceIndex(path=str(tmp_path / "index.json")))
+    client = GooglePlacesClient()
+    client.mock_mode = False
+    return client
+
+@pytest.fixture
+def details_calls(monkeypatch):
+    calls = []
+    responses = {}
+
+    async def get(self, url, params=None):
+        calls.append(params["place_id"])
+        return FakeResponse(responses[params["place_id"]])
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", get)
+    return calls, responses
+
+def expire_dynamic(client, place_id):
+    client._local_fields.pop(DYNAMIC_PREFIX + place_id)
+
+async def test_open_now_is_recomputed_from_stored_hours(client, details_calls):
+    calls, responses = details_calls
+    always_open = [{"open": {"day": 0, "time": "0000"}}]
+    responses["p1"] = {"status": "OK", "result": {"opening_hours": {"open_now": True, "periods": always_open}, "utc_offset_minutes": 0}}
+    places = await client._with_dynamic_fields([PLACE])
+    assert places[0]["open_now"] is True
+    assert calls == ["p1"]
+    expire_dynamic(client, "p1")
+    places = await client._with_dynamic_fields([PLACE])
+    assert places[0]["open_now"] is True
+    assert calls == ["p1"]
+
+async def test_place_without_hours_is_not_asked_again(client, details_calls):
+    calls, responses = details_calls
+    responses["p1"] = {"status": "OK", "result": {"utc_offset_minutes": 0}}
+    places = await client._with_dynamic_fields([PLACE])
+    assert places[0]["open_now"] is None
+    expire_dynamic(client, "p1")
+    places = await client._with_dynamic_fields([PLACE])
+    assert places[0]["open_now"] is None
+    assert calls == ["p1"]
+
+async def test_failed_details_lookup_is_retried(client, details_calls):
+    calls, responses = details_calls
+    responses["p1"] = {"status": "UNKNOWN_ERROR"}
+    await client._with_dynamic_fields([PLACE])
+    await client._with_dynamic_fields([PLACE])
+    assert calls == ["p1", "p1"]
+
+def nearby_place(n):
+    return {"name": f"Place {n}", "place_id": f"n{n}", "geometry": {"location": {"lat": 40.7128, "lng": -74.0060}}}
+
+@pytest.fixture
+def nearby_pages(client, monkeypatch):
+    """Serve canned Nearby Search pages keyed by page token (None for page 1)."""
+    pages = {}
+    requested = []
+    sleeps = []
+
+    async def get_nearby_page(http_client, url, params):
+        token = params.get("pagetoken")
+        requested.append(token)
+        page = pages[token]
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(client, "_get_nearby_page", get_nearby_page)
+    monkeypatch.setattr(google_places.asyncio, "sleep", sleep)
+    return pages, requested, sleeps
+
+def add_pages(pages, count, last_token=None):
+    for i in range(count):
+        token = f"t{i}" if i else None
+        data = {"results": [nearby_place(i * 20 + j) for j in range(20)]}
+        if i + 1 < count:
+            data["next_page_token"] = f"t{i + 1}"
+        elif last_token:
+            data["next_page_token"] = last_token
+        pages[token] = data
+
+def covered(client, keyword="healthy"):
+    _, uncovered = client.index.query(40.7128, -74.0060, 1, keyword)
+    return not uncovered
+
+async def test_pages_are_followed_after_the_token_delay(client, nearby_pages):
+    pages, requested, sleeps = nearby_pages
+    add_pages(pages, 3, last_token="t3")
+    places = await client.discover_places(40.7128, -74.0060, 1, "healthy", refresh=True, max_places=100)
+    # Google never serves past 60 results, even when it hands out another token
+    assert len(places) == google_places.GOOGLE_MAX_RESULTS
+    assert requested == [None, "t1", "t2"]
+    assert sleeps == [google_places.NEXT_PAGE_DELAY] * 2
+
+async def test_paging_stops_at_max_places(client, nearby_pages):
+    pages, requested, _ = nearby_pages
+    add_pages(pages, 3)
+    places = await client.discover_places(40.7128, -74.0060, 1, "healthy", refresh=True, max_places=30)
+    assert len(places) == 30
+    assert requested == [None, "t1"]
+    # A truncated result set must not answer later searches of the circle
+    assert not covered(client)
+
+async def test_complete_result_set_covers_the_circle(client, nearby_pages):
+    pages, _, _ = nearby_pages
+    add_pages(pages, 2)
+    places = await client.discover_places(40.7128, -74.0060, 1, "healthy", refresh=True, max_places=60)
+    assert len(places) == 40
+    assert covered(client)
+
+async def test_unfollowed_page_token_leaves_circle_uncovered(client, nearby_pages):
+    pages, requested, _ = nearby_pages
+    add_pages(pages, 2)
+    places = await client.discover_places(40.7128, -74.0060, 1, "healthy", refresh=True, max_places=20)
+    assert len(places) == 20
+    assert requested == [None]
+    assert not covered(client)
+
+async def test_later_page_failure_keeps_first_page(client, nearby_pages):
+    pages, _, _ = nearby_pages
+    add_pages(pages, 1, last_token="t1")
+    pages["t1"] = google_places.MealDiscoveryError("Failed to fetch places after retries.")
+    batches = []
+    with pytest.raises(google_places.MealDiscoveryError):
+        async for batch in client.iter_places(40.7128, -74.0060, 1, "healthy", refresh=True, max_places=60):
+            batches.append(batch)
+    assert [len(b) for b in batches] == [20]
+    assert not covered(client)
+
+async def test_discovery_scores_first_page_when_a_later_page_fails(client, monkeypatch):
+    from services import meal_discovery
+
+    class FailingPlaces:
+        async def iter_places(self, *args, **kwargs):
+            yield [{"name": "Fit Kitchen", "place_id": "p1", "location": {"lat": 40.7128, "lng": -74.0060}}]
+            raise google_places.MealDiscoveryError("Failed to fetch places after retries.")
+
+    async def scrape(place):
+        return [{"name": "Grilled Chicken Bowl", "restaurant_id": place["place_id"], "meal_id": "m1",
+                 "nutrition": {"calories": 500, "protein": 40, "carbs": 45, "fat": 15}}]
+
+    stored = []
+    monkeypatch.setattr(meal_discovery.candidate_pool, "get", lambda *args: None)
+    monkeypatch.setattr(meal_discovery.candidate_pool, "set", lambda *args: stored.append(args))
+    service = meal_discovery.MealDiscoveryService()
+    service.mock_mode = False
+    service.places_client = FailingPlaces()
+    monkeypatch.setattr(service, "_scrape_and_parse_menu", scrape)
+    result = await service.discover_meals(40.7128, -74.0060, 1, "high_protein")
+    assert [m["name"] for m in result["meals"]] == ["Grilled Chicken Bowl"]
+    # A partial result set is not cached as the area's candidate pool
+    assert stored == []
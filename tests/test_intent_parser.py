@@ -0,0 +1,66 @@
+import core.intent_parser as intent_parser
+from core.intent_parser import parse_intent, parse_query
+
+def test_common_patterns_parse_locally():
+    intent = parse_query("High-protein lunch under 600 calories with chicken, no peanuts or shellfish")
+    assert intent.goal == "muscle_gain"
+    assert dict(intent.macros) == {"max_calories": 600}
+    assert intent.ingredients == ("chicken",)
+    assert intent.exclusions == ("peanut", "shellfish")
+    assert intent.confidence == 1.0
+
+def test_macro_bounds_and_free_suffix():
+    intent = parse_query("at least 40g protein, 400 to 600 cal, gluten-free thai")
+    assert dict(intent.macros) == {"min_protein": 40.0, "min_calories": 400, "max_calories": 600}
+    assert intent.exclusions == ("gluten",)
+    assert intent.cuisine == ("thai",)
+    # 'no more than' is a macro bound, not an exclusion
+    assert parse_query("no more than 700 cal keto").exclusions == ()
+
+def test_hyphenated_range():
+    for query in ("keto 500-700 calories", "keto 500 - 700 calories", "keto 500\u2013700 calories"):
+        assert dict(parse_query(query).macros) == {"min_calories": 500, "max_calories": 700}, query
+
+def test_exclusion_skips_articles():
+    intent = parse_query("chicken without the skin")
+    assert intent.exclusions == ("skin",)
+    assert intent.ingredients == ("chicken",)
+    assert parse_query("no added sugar").exclusions == ("sugar",)
+    assert parse_query("without any peanuts or shellfish").exclusions == ("peanut", "shellfish")
+
+def test_fuzzy_goal_discounts_confidence():
+    intent = parse_query("muscle gaim bowl")
+    assert intent.goal == "muscle_gain"
+    assert 0 < intent.confidence < 1
+
+async def test_escalates_only_low_confidence(monkeypatch):
+    calls = []
+    async def fake_llm(text):
+        calls.append(text)
+        return {"goal": "keto", "macros": {"max_carbs": 20}, "cuisine": ["nordic"]}
+    monkeypatch.setattr(intent_parser, "_llm_parse", fake_llm)
+    monkeypatch.setattr(intent_parser, "get_cache", lambda key: None)
+    monkeypatch.setattr(intent_parser, "set_cache", lambda key, value, ttl: None)
+    monkeypatch.setattr(intent_parser.get_settings(), "INTENT_LLM_THRESHOLD", 0.7)
+    confident = await parse_intent("keto spicy thai food")
+    assert confident.source == "local" and not calls
+    escalated = await parse_intent("xyzzy smorgasbord")
+    assert calls == ["xyzzy smorgasbord"]
+    assert escalated.source == "llm"
+    assert escalated.goal == "keto"
+    assert dict(escalated.macros) == {"max_carbs": 20.0}
+    assert escalated.cuisine == ("nordic",)
+
+async def test_llm_threshold_comes_from_settings(monkeypatch):
+    calls = []
+    async def fake_llm(text):
+        calls.append(text)
+        return {"goal": "keto"}
+    monkeypatch.setattr(intent_parser, "_llm_parse", fake_llm)
+    monkeypatch.setattr(intent_parser, "get_cache", lambda key: None)
+    monkeypatch.setattr(intent_parser, "set_cache", lambda key, value, ttl: None)
+    monkeypatch.setattr(intent_parser.get_settings(), "INTENT_LLM_THRESHOLD", 0.0)
+    assert (await parse_intent("xyzzy smorgasbord")).source == "local"
+    monkeypatch.setattr(intent_parser.get_settings(), "INTENT_LLM_THRESHOLD", 1.01)
+    assert (await parse_intent("keto spicy thai food")).source == "llm"
+    assert calls == ["keto spicy thai food"]
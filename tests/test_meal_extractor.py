@@ -0,0 +1,31 @@
+import meal_extractor
+from meal_extractor import add_goal_scores, apply_goal, validate_and_clean_meals
+from scoring.engine import GOAL_INDEX
+
+MEALS = [
+    {"name": "Grilled Chicken", "tags": ["high protein"], "nutrition": {"calories": 450, "protein": 45, "carbs": 10, "fat": 20}},
+    {"name": "Pasta Alfredo", "tags": [], "nutrition": {"calories": 800, "protein": 20, "carbs": 120, "fat": 20}},
+    {"name": "Chef's Salad", "tags": ["low carb"]},
+]
+
+def test_free_text_goals_use_keywords_and_macros():
+    meals = add_goal_scores(validate_and_clean_meals(MEALS))
+    # 'high protein' is no fitness goal: tags and macro shares decide
+    assert [m["relevance_score"] for m in apply_goal(meals, "high protein")] == [1.0, 0.0, 0.0]
+    # A known goal scores meals with nutrition; the salad has none and falls back to its tags
+    keto = apply_goal(meals, "keto")
+    assert keto[0]["relevance_score"] == meals[0]["goal_scores"][GOAL_INDEX["keto"]]
+    assert keto[2]["relevance_score"] == 0.0
+    # A goal naming no tags is neutral
+    assert {m["relevance_score"] for m in apply_goal(meals, "chef's whim")} == {0.5}
+
+def test_goal_scores_are_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(meal_extractor, "CACHE_FILE", str(tmp_path / "openai.json"))
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    cleaned = validate_and_clean_meals(MEALS)
+    assert all("goal_scores" not in m for m in cleaned)
+    cache = {meal_extractor.get_openai_cache_key("menu"): {"meals": cleaned, "timestamp": meal_extractor.datetime.now().isoformat()}}
+    meal_extractor.save_openai_cache(cache)
+    meals = meal_extractor.parse_menu_meals("menu")
+    assert all(len(m["goal_scores"]) == len(GOAL_INDEX) for m in meals)
+    assert "goal_scores" not in meal_extractor.load_openai_cache()[meal_extractor.get_openai_cache_key("menu")]["meals"][0]
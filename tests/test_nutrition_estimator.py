@@ -1,6 +1,6 @@
 import pytest
 import asyncio
-from services.nutrition_estimator import NutritionEstimator
+from services.nutrition_estimator import NutritionEstimator, TemplateIndex
 from core.nutrition_utils import analyze_goal_fit
 from schemas.responses import NutritionInfo
 
@@ -49,4 +49,87 @@ def test_goal_fit_analyzer():
     assert 0 <= result["match_score"] <= 1
     info2 = NutritionInfo(calories=1200, protein=10, carbs=100, fat=50)
     result2 = analyze_goal_fit(info2, "keto")
-    assert "carb mismatch" in result2["tags"] or "fat mismatch" in result2["tags"] 
\ No newline at end of file
+    assert "carb mismatch" in result2["tags"] or "fat mismatch" in result2["tags"] 
+TEMPLATES = {
+    "salad": {"calories": [200, 400], "protein": [5, 15], "carbs": [10, 30], "fat": [10, 30]},
+    "chicken": {"calories": [400, 600], "protein": [30, 50], "carbs": [0, 20], "fat": [10, 30]},
+    "chicken salad": {"calories": [350, 450], "protein": [25, 35], "carbs": [10, 20], "fat": [15, 25]},
+}
+
+GPT_RESULT = {
+    "nutrition": {"calories": 500, "protein": 40, "carbs": 30, "fat": 20, "confidence_level": "high", "estimation_origin": "gpt"},
+    "origin": "gpt", "confidence": "high", "confidence_score": 0.9,
+}
+
+@pytest.fixture
+def tiered(monkeypatch):
+    """A real estimator with the caches, near-duplicate index, refiner and GPT stubbed out."""
+    import services.nutrition_estimator as module
+    monkeypatch.setattr(module.dish_memo, "get", lambda name: None)
+    monkeypatch.setattr(module, "get_cache", lambda key: None)
+    monkeypatch.setattr(module.dish_lsh, "lookup", lambda name, description: None)
+    monkeypatch.setattr(module, "log_event", lambda *a, **k: None)
+    monkeypatch.setattr(type(module.nutrition_refiner), "running", property(lambda self: False))
+    est = NutritionEstimator()
+    est.gpt_calls = []
+    async def fake_gpt(name, description):
+        est.gpt_calls.append(name)
+        return GPT_RESULT
+    monkeypatch.setattr(est, "_gpt_estimate", fake_gpt)
+    monkeypatch.setattr(est, "remember", lambda *a: None)
+    return est
+
+@pytest.mark.asyncio
+async def test_threshold_gates_gpt(tiered):
+    tiered.gpt_threshold = 0.45
+    confident = await tiered.estimate("Caesar Salad", "romaine, parmesan, croutons")
+    assert confident["origin"] == "rule" and confident["confidence_score"] >= 0.45
+    assert tiered.gpt_calls == []
+    # A bare, generic template falls below the threshold and goes to GPT
+    vague = await tiered.estimate("Bowl", "")
+    assert vague["origin"] == "gpt"
+    assert tiered.gpt_calls == ["Bowl"]
+
+@pytest.mark.asyncio
+async def test_high_confidence_bypasses_threshold(tiered):
+    tiered.gpt_threshold = 0.0
+    result = await tiered.estimate("Caesar Salad", "romaine, parmesan, croutons", high_confidence=True)
+    assert result["origin"] == "gpt"
+    assert tiered.gpt_calls == ["Caesar Salad"]
+
+def test_template_blend_and_confidence():
+    index = TemplateIndex(TEMPLATES)
+    rows = {key: i for i, key in enumerate(index.keys)}
+    # 'chicken' and 'salad' inside 'chicken salad' are dropped; a name match counts double
+    assert index.match("Chicken Salad", "") == {rows["chicken salad"]: 4.0}
+    weights = index.match("Garden Salad", "topped with chicken")
+    assert weights == {rows["salad"]: 2.0, rows["chicken"]: 1.0}
+    lo, hi = index.blend(weights)
+    assert lo[0] == pytest.approx((2 * 200 + 400) / 3) and hi[0] == pytest.approx((2 * 400 + 600) / 3)
+    # More specific, name-matched and narrower templates are trusted more
+    specific = index.match("Chicken Salad", "")
+    generic = index.match("Lunch Special", "with a salad")
+    assert index.confidence(specific, *index.blend(specific)) > index.confidence(weights, lo, hi)
+    assert index.confidence(weights, lo, hi) > index.confidence(generic, *index.blend(generic))
+
+def test_template_index_skips_incomplete_templates_and_matches_plurals():
+    index = TemplateIndex(dict(TEMPLATES, soup={"calories": [150, 300]}))
+    assert "soup" not in index.keys and len(index) == len(TEMPLATES)
+    rows = {key: i for i, key in enumerate(index.keys)}
+    # Plurals match, and a template named in both name and description keeps its name weight
+    assert index.match("Salads", "two fresh salads") == {rows["salad"]: 2.0}
+    # The longer match drops its shorter parts in the description too
+    assert index.match("Lunch Plate", "a chicken salad") == {rows["chicken salad"]: 2.0}
+
+def test_template_estimate_reports_midpoints_and_templates():
+    est = NutritionEstimator.__new__(NutritionEstimator)
+    est.template_index = TemplateIndex(TEMPLATES)
+    result = est._template_estimate("Chicken Salad", "")
+    assert result["templates"] == ["chicken salad"]
+    assert result["nutrition"]["calories"] == 400 and result["nutrition"]["protein"] == 30.0
+    assert result["origin"] == "rule" and 0 < result["confidence_score"] <= 1
+    assert est._template_estimate("Mystery Special", "") is None
+    # The shipped templates resolve common multi-word dishes specifically
+    shipped = TemplateIndex(est._load_templates())
+    weights = shipped.match("Pad Thai", "with shrimp and peanuts")
+    assert shipped.keys[max(weights, key=weights.get)] == "pad thai"
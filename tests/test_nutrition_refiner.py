@@ -0,0 +1,61 @@
+import pytest
+import asyncio
+import services.nutrition_refiner as refiner_module
+from services.nutrition_refiner import NutritionRefiner
+
+@pytest.fixture(autouse=True)
+def no_analytics(monkeypatch):
+    monkeypatch.setattr(refiner_module, "log_event", lambda event_type, payload: None)
+
+class FakeEstimator:
+    def __init__(self):
+        self.cache = {}
+
+    async def refine(self, name, description):
+        await asyncio.sleep(0)
+        result = {"nutrition": {"calories": 500}, "origin": "gpt", "confidence": "high"}
+        self.cache[name] = result
+        return result
+
+@pytest.mark.asyncio
+async def test_refines_in_background_and_dedupes():
+    refiner = NutritionRefiner(workers=2, queue_size=10, calls_per_hour=3600)
+    estimator = FakeEstimator()
+    assert not refiner.submit("k1", "Beef Stew", "")
+    refiner.start(estimator)
+    assert refiner.submit("k1", "Beef Stew", "")
+    assert not refiner.submit("k1", "Beef Stew", "")
+    assert refiner.submit("k2", "Lentil Dal", "")
+    await asyncio.wait_for(refiner.queue.join(), 1)
+    assert set(estimator.cache) == {"Beef Stew", "Lentil Dal"}
+    assert refiner.stats()["refined"] == 2
+    await refiner.stop()
+    assert not refiner.running
+
+@pytest.mark.asyncio
+async def test_queue_bound_and_budget():
+    refiner = NutritionRefiner(workers=1, queue_size=1, calls_per_hour=1)
+    refiner._tokens = 0
+    refiner.start(FakeEstimator())
+    refiner._tokens = 0
+    assert refiner.submit("k1", "a", "")
+    await asyncio.sleep(0.01)
+    # Worker holds k1 waiting for budget; one more fits the queue, the next is dropped
+    assert refiner.submit("k2", "b", "")
+    assert not refiner.submit("k3", "c", "")
+    assert refiner.stats()["refined"] == 0 and refiner.stats()["dropped"] == 1
+    await refiner.stop()
+
+@pytest.mark.asyncio
+async def test_burst_is_capped_below_hourly_budget():
+    refiner = NutritionRefiner(workers=1, queue_size=10, calls_per_hour=600, burst=3)
+    for _ in range(3):
+        await asyncio.wait_for(refiner._take_budget(), 0.1)
+    # The fourth call waits for a refill instead of spending the hour's budget
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(refiner._take_budget(), 0.05)
+    # A long idle spell refills only up to the burst
+    refiner._stamp -= 3600
+    for _ in range(3):
+        await asyncio.wait_for(refiner._take_budget(), 0.1)
+    assert refiner._tokens < 1
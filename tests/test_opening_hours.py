@@ -0,0 +1,23 @@
+import calendar
+from utils.opening_hours import open_now
+
+# Mon-Fri 11:00-22:00, Sat 18:00 until Sun 02:00
+PERIODS = [{"open": {"day": d, "time": "1100"}, "close": {"day": d, "time": "2200"}} for d in range(1, 6)]
+PERIODS.append({"open": {"day": 6, "time": "1800"}, "close": {"day": 0, "time": "0200"}})
+
+def _utc(y, m, d, hh, mm=0):
+    return calendar.timegm((y, m, d, hh, mm, 0))
+
+def test_open_within_period():
+    # Monday 2024-01-01 12:00 local
+    assert open_now(PERIODS, 0, _utc(2024, 1, 1, 12)) is True
+    assert open_now(PERIODS, 0, _utc(2024, 1, 1, 23)) is False
+
+def test_overnight_and_utc_offset():
+    # Sunday 01:00 local falls in Saturday's late period; New York is UTC-5
+    assert open_now(PERIODS, -300, _utc(2024, 1, 7, 6)) is True
+    assert open_now(PERIODS, -300, _utc(2024, 1, 7, 8)) is False
+
+def test_always_open_and_unknown():
+    assert open_now([{"open": {"day": 0, "time": "0000"}}], 0) is True
+    assert open_now([], 0) is None
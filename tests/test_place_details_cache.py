@@ -0,0 +1,98 @@
+import pytest
+import utils.cache as cache_module
+from utils.geocode_cache import GeocodeCache
+
+PLACE = {"place_id": "p1", "name": "Fit Kitchen", "vicinity": "1 Main St"}
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_module, "FILE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(cache_module, "redis_client", None)
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+@pytest.fixture
+def finder(monkeypatch):
+    pytest.importorskip("requests_cache")
+    import restaurant_finder
+    calls = []
+    responses = {
+        restaurant_finder.GEOCODE_URL: {"status": "OK", "results": [{"geometry": {"location": {"lat": 40.67, "lng": -73.94}}}]},
+        restaurant_finder.DETAILS_URL: {"status": "OK", "result": {"name": "Fit Kitchen", "website": "https://fit.example", "place_id": "p1"}},
+    }
+
+    def get(url, params=None):
+        calls.append(url)
+        return FakeResponse(responses.get(url, {"status": "OK", "results": [PLACE]}))
+
+    monkeypatch.setattr(restaurant_finder.requests, "get", get)
+    monkeypatch.setattr(restaurant_finder, "geocode_cache", GeocodeCache())
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    return restaurant_finder, calls
+
+class FakeMapsClient:
+    def __init__(self, key=None):
+        self.calls = []
+
+    def geocode(self, location):
+        self.calls.append("geocode")
+        return [{"geometry": {"location": {"lat": 40.67, "lng": -73.94}}}]
+
+    def places_nearby(self, **kwargs):
+        self.calls.append("nearby")
+        return {"results": [PLACE]}
+
+    def place(self, place_id, fields=None):
+        self.calls.append("place")
+        return {"result": {"place_id": place_id, "name": "Fit Kitchen", "formatted_address": "1 Main St, Brooklyn",
+                           "website": "https://fit.example", "formatted_phone_number": "555-0100"}}
+
+@pytest.fixture
+def service(monkeypatch):
+    googlemaps = pytest.importorskip("googlemaps")
+    import app.services.google_places as app_places
+    monkeypatch.setattr(googlemaps, "Client", FakeMapsClient)
+    monkeypatch.setattr(app_places, "geocode_cache", GeocodeCache())
+    return app_places, app_places.GooglePlacesService()
+
+def test_finder_details_are_fetched_once(finder):
+    restaurant_finder, calls = finder
+    first = restaurant_finder.get_place_details(PLACE, "test-key")
+    second = restaurant_finder.get_place_details(PLACE, "test-key")
+    assert first == second == {"name": "Fit Kitchen", "website": "https://fit.example", "place_id": "p1"}
+    assert calls == [restaurant_finder.DETAILS_URL]
+
+def test_finder_geocodes_a_location_once(finder):
+    restaurant_finder, calls = finder
+    restaurant_finder.get_nearby_restaurants("Brooklyn, NY")
+    restaurants = restaurant_finder.get_nearby_restaurants("brooklyn ny")
+    assert [r["place_id"] for r in restaurants] == ["p1"]
+    assert calls.count(restaurant_finder.GEOCODE_URL) == 1
+    assert calls.count(restaurant_finder.DETAILS_URL) == 1
+
+async def test_service_details_and_geocode_are_cached(service):
+    app_places, places = service
+    await places.search_restaurants("Brooklyn, NY")
+    restaurants = await places.search_restaurants("brooklyn ny")
+    assert restaurants[0].address == "1 Main St, Brooklyn"
+    assert restaurants[0].phone == "555-0100"
+    assert places.client.calls.count("geocode") == 1
+    assert places.client.calls.count("place") == 1
+
+async def test_finder_entry_does_not_answer_service_lookup(finder, service):
+    restaurant_finder, _ = finder
+    app_places, places = service
+    assert restaurant_finder.DETAILS_CACHE_PREFIX != app_places.DETAILS_CACHE_PREFIX
+    restaurant_finder.get_place_details(PLACE, "test-key")
+    restaurant = await places.get_restaurant_details("p1")
+    # The finder's cached entry has no address or phone; the service must fetch its own fields
+    assert restaurant.address == "1 Main St, Brooklyn"
+    assert places.client.calls == ["place"]
@@ -0,0 +1,78 @@
+from services.place_index import PlaceIndex, geohash_encode, haversine_km
+
+PLACES = [
+    {"name": "Fit Kitchen", "place_id": "p1", "location": {"lat": 40.7130, "lng": -74.0060}, "rating": 4.6, "open_now": True, "website": "https://fit.example"},
+    {"name": "Green Bowl", "place_id": "p2", "location": {"lat": 40.7200, "lng": -74.0000}, "rating": 4.2, "open_now": False, "website": None},
+    {"name": "Far Away Grill", "place_id": "p3", "location": {"lat": 40.8000, "lng": -73.9000}, "rating": 4.0, "open_now": True, "website": None},
+]
+
+def test_geohash_known_value():
+    assert geohash_encode(57.64911, 10.40744, 6) == "u4pruy"
+
+def test_uncovered_area_reports_cells(tmp_path):
+    index = PlaceIndex(path=str(tmp_path / "index.json"))
+    places, uncovered = index.query(40.7128, -74.0060, 3, "healthy")
+    assert places == []
+    assert uncovered
+
+def test_covered_area_is_answered_locally(tmp_path):
+    path = str(tmp_path / "index.json")
+    index = PlaceIndex(path=path)
+    index.add_places(PLACES, "healthy", 40.7128, -74.0060, 5)
+    places, uncovered = index.query(40.7128, -74.0060, 2, "healthy")
+    assert not uncovered
+    assert [p["place_id"] for p in places] == ["p1", "p2"]
+    # Coverage is per keyword
+    _, uncovered = index.query(40.7128, -74.0060, 2, "keto")
+    assert uncovered
+    # Persisted and reloaded
+    reloaded = PlaceIndex(path=path)
+    places, uncovered = reloaded.query(40.7128, -74.0060, 2, "healthy")
+    assert not uncovered and len(places) == 2
+
+def test_stale_coverage_is_refetched(tmp_path):
+    index = PlaceIndex(path=str(tmp_path / "index.json"), coverage_ttl=60)
+    index.add_places(PLACES, "healthy", 40.7128, -74.0060, 5, now=1000)
+    _, uncovered = index.query(40.7128, -74.0060, 2, "healthy", now=2000)
+    assert uncovered
+
+def test_uncovered_region_shrinks_to_missing_cells(tmp_path):
+    index = PlaceIndex(path=str(tmp_path / "index.json"))
+    index.add_places(PLACES, "healthy", 40.7128, -74.0060, 3)
+    _, uncovered = index.query(40.7128, -74.0060, 4, "healthy")
+    lat, lng, radius = index.uncovered_region(40.7128, -74.0060, 4, uncovered)
+    assert radius <= 4
+    assert haversine_km(40.7128, -74.0060, lat, lng) <= 4
+
+def test_repeat_of_same_circle_is_covered(tmp_path):
+    index = PlaceIndex(path=str(tmp_path / "index.json"))
+    index.add_places(PLACES, "healthy", 40.7128, -74.0060, 3)
+    places, uncovered = index.query(40.7128, -74.0060, 3, "healthy")
+    assert not uncovered
+    assert [p["place_id"] for p in places] == ["p1", "p2"]
+
+def test_places_are_bounded_and_expire(tmp_path):
+    import time
+    index = PlaceIndex(path=str(tmp_path / "index.json"), max_places=2)
+    now = time.time()
+    for i, place in enumerate(PLACES):
+        index.add_places([place], "healthy", 40.7128, -74.0060, 3, now=now + i)
+    assert set(index.places) == {"p2", "p3"}
+    assert "p1" not in index.cells.get(geohash_encode(40.7130, -74.0060), set())
+    index.prune(now=now + index.coverage_ttl + 10)
+    assert not index.places and not index.coverage and not index.circles
+
+async def test_saves_are_batched_off_the_loop(tmp_path):
+    import asyncio
+    path = tmp_path / "index.json"
+    index = PlaceIndex(path=str(path), save_delay=0.01)
+    other = PlaceIndex(path=str(path))
+    index.add_places(PLACES[:1], "healthy", 40.7128, -74.0060, 3)
+    index.add_places(PLACES[1:2], "healthy", 40.7128, -74.0060, 3)
+    assert not path.exists()
+    await asyncio.sleep(0.2)
+    assert set(PlaceIndex(path=str(path)).places) == {"p1", "p2"}
+    # Another worker's index saved to the same file is merged, not clobbered
+    other.add_places(PLACES[2:], "healthy", 40.7128, -74.0060, 3)
+    other.flush()
+    assert set(PlaceIndex(path=str(path)).places) == {"p1", "p2", "p3"}
@@ -0,0 +1,50 @@
+from scoring.preference_index import PreferenceIndex, extract_terms, meal_id, preference_terms
+
+MENU = [
+    {"name": "Spicy Chicken Tacos", "description": "Chipotle salsa and lime"},
+    {"name": "Margherita Pizza", "description": "Fresh mozzarella"},
+    {"name": "Grilled Salmon", "description": "With lemon butter"},
+]
+
+def test_terms_from_text_and_preferences():
+    assert extract_terms("Spicy Chicken Tacos") >= {"flavor:spicy", "cuisine:mexican"}
+    assert preference_terms(["Hot", "Italian food"]) == {"flavor:spicy", "cuisine:italian"}
+    assert preference_terms(["Hot", "Italian food"], "cuisine") == {"cuisine:italian"}
+
+def test_hot_inside_longer_phrases():
+    # 'hot' alone is spicy, but not inside a longer keyword or a neutral phrase
+    assert extract_terms("Chili Hot Dog") == {"cuisine:american", "flavor:spicy"}
+    assert extract_terms("Classic Hot Dogs") == {"cuisine:american"}
+    assert extract_terms("Hot Chocolate") == set()
+    assert extract_terms("Nashville Hot Chicken") == {"flavor:spicy"}
+
+def test_postings_and_intersection():
+    index = PreferenceIndex()
+    index.index_menu({"place_id": "r1", "name": "Casa Verde Taqueria"}, MENU)
+    ids = [meal_id("r1", m) for m in MENU]
+    matches = index.meal_matches("r1", {"flavor:spicy", "flavor:sour"})
+    assert sorted(matches[ids[0]]) == ["flavor:sour", "flavor:spicy"]
+    assert matches[ids[2]] == ["flavor:sour"]
+    assert ids[1] not in matches
+    assert index.meals_matching_all({"flavor:spicy", "cuisine:mexican"}) == {ids[0]}
+    assert index.restaurant_matches("r1", {"cuisine:mexican", "cuisine:italian"}) == ["cuisine:mexican"]
+
+def test_reindexing_replaces_old_menu():
+    index = PreferenceIndex()
+    index.index_menu({"place_id": "r1", "name": "Casa Verde Taqueria"}, MENU)
+    index.index_menu({"place_id": "r1", "name": "Casa Verde"}, [{"name": "Mushroom Risotto"}])
+    assert not index.meal_matches("r1", {"flavor:spicy"})
+    assert not index.restaurant_matches("r1", {"cuisine:mexican"})
+    assert index.meal_matches("r1", {"cuisine:italian"}) == {meal_id("r1", {"name": "Mushroom Risotto"}): ["cuisine:italian"]}
+
+def test_restaurant_name_terms_and_eviction():
+    index = PreferenceIndex(max_restaurants=2)
+    index.index_menu({"place_id": "r1", "name": "Casa Verde Taqueria"}, MENU)
+    index.index_menu({"place_id": "r2", "name": "Luigi's Trattoria"}, [{"name": "Mushroom Risotto"}])
+    assert index.restaurant_matches("r1", {"cuisine:mexican"}) == ["cuisine:mexican"]
+    index.index_menu({"place_id": "r3", "name": "Thai Basil"}, [{"name": "Pad Thai"}])
+    # The least recently indexed restaurant goes, postings included
+    assert len(index) == 2 and not index.is_indexed("r1")
+    assert not index.restaurant_matches("r1", {"cuisine:mexican"})
+    assert "flavor:spicy" not in index.postings
+    assert index.is_indexed("r2") and index.is_indexed("r3")
@@ -0,0 +1,73 @@
+import numpy as np
+from scoring.profiles import compile_goal_profile
+from scoring.range_index import RangeIndex, parse_price, profile_bounds
+
+def _groups(seed=0):
+    rng = np.random.default_rng(seed)
+    groups = []
+    for r in range(20):
+        meals = []
+        for j in range(int(rng.integers(0, 15))):
+            nutrition = {"calories": int(rng.integers(100, 1500)), "protein": float(rng.integers(0, 90)),
+                         "carbs": float(rng.integers(0, 150)), "fat": float(rng.integers(0, 80))}
+            meal = {"name": f"r{r}-m{j}", "price": f"${rng.integers(5, 30)}.99"}
+            if rng.random() > 0.1:
+                meal["nutrition"] = nutrition
+            meals.append(meal)
+        groups.append(meals)
+    return groups
+
+def _brute(groups, bounds, keep_unknown):
+    hits = []
+    for meals in groups:
+        for meal in meals:
+            ok = True
+            for column, (lo, hi) in bounds.items():
+                value = parse_price(meal["price"]) if column == "price" else (meal.get("nutrition") or {}).get(column)
+                if value is None:
+                    ok = ok and keep_unknown
+                    continue
+                ok = ok and (lo is None or value >= lo) and (hi is None or value <= hi)
+            if ok:
+                hits.append(meal["name"])
+    return hits
+
+def test_select_matches_scan():
+    groups = _groups()
+    index = RangeIndex(groups)
+    queries = [
+        {"protein": (30, 60), "calories": (None, 700)},
+        {"price": (10, 20)},
+        {"fat": (None, 10), "carbs": (20, None), "calories": (300, 900)},
+        {"protein": (200, None)},
+    ]
+    for bounds in queries:
+        for keep_unknown in (False, True):
+            names = [index.meals[p]["name"] for p in index.select(bounds, keep_unknown).tolist()]
+            assert names == _brute(groups, bounds, keep_unknown)
+
+def test_regroup_keeps_restaurant_order():
+    groups = [[{"name": "a", "nutrition": {"calories": 500}}, {"name": "b", "nutrition": {"calories": 900}}],
+              [], [{"name": "c", "nutrition": {"calories": 400}}]]
+    index = RangeIndex(groups)
+    grouped = index.regroup(index.select({"calories": (None, 600)}))
+    assert [(g, [m["name"] for m in meals]) for g, meals in grouped] == [(0, ["a"]), (2, ["c"])]
+
+def test_profile_bounds_and_price_parsing():
+    assert profile_bounds(compile_goal_profile("keto")) == {}
+    assert profile_bounds(compile_goal_profile("keto", {"min_protein": 30, "max_calories": 700})) == {
+        "calories": (None, 700.0), "protein": (30.0, None)}
+    assert parse_price("$12.99") == 12.99 and parse_price("12,50 €") == 12.5 and np.isnan(parse_price("market price"))
+
+def test_subset_matches_fresh_index():
+    groups = _groups(1)
+    keep = [0, 3, 4, 9, 15, 19]
+    subset = RangeIndex(groups).subset(keep)
+    fresh = RangeIndex([groups[g] for g in keep])
+    assert subset.meals == fresh.meals
+    assert subset.group.tolist() == fresh.group.tolist()
+    for column in ("calories", "protein", "carbs", "fat", "price"):
+        assert subset.order[column].tolist() == fresh.order[column].tolist()
+        assert subset.unknown[column].tolist() == fresh.unknown[column].tolist()
+    for bounds in ({"protein": (30, 60), "calories": (None, 700)}, {"price": (10, 20)}):
+        assert subset.select(bounds, keep_unknown=True).tolist() == fresh.select(bounds, keep_unknown=True).tolist()
@@ -1,4 +1,88 @@
+import numpy as np
+from types import SimpleNamespace
+from core.nutrition_utils import analyze_goal_fit
+from core.fitness_goals import FITNESS_GOALS
+from scoring.engine import GOAL_NAMES, MealBatch, goal_score, score_all_goals, score_batch, mismatch_tags, rank_indices
+from scoring.profiles import compile_goal_profile, within_limits
+from scoring.topk import TopK
+
 def test_mock_scoring():
     # Placeholder for scoring logic test
     score = 0.85
-    assert 0 <= score <= 1 
\ No newline at end of file
+    assert 0 <= score <= 1 
+
+def _random_meals(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"name": f"meal{i}", "nutrition": {
+            "calories": int(rng.integers(200, 4000)),
+            "protein": float(rng.integers(0, 200)),
+            "carbs": float(rng.integers(0, 300)),
+            "fat": float(rng.integers(0, 150)),
+        }}
+        for i in range(n)
+    ]
+
+def test_batch_scoring_matches_per_meal_analyzer():
+    meals = _random_meals(300)
+    batch = MealBatch.from_meals(meals)
+    for goal in FITNESS_GOALS:
+        result = score_batch(batch, goal)
+        tags = mismatch_tags(result)
+        for i, meal in enumerate(meals):
+            expected = analyze_goal_fit(SimpleNamespace(**meal["nutrition"]), goal)
+            assert abs(result["match_score"][i] - expected["match_score"]) < 1e-9
+            assert tags[i] == expected["tags"]
+
+def test_unknown_goal_and_missing_nutrition():
+    meals = [{"name": "a", "nutrition": {"calories": 500, "protein": 40, "carbs": 45, "fat": 15}}, {"name": "b"}]
+    batch = MealBatch.from_meals(meals)
+    assert batch.known.tolist() == [True, False]
+    result = score_batch(batch, "muscle_gain")
+    assert result["match_score"][1] == 0
+    unknown = score_batch(batch, "not_a_goal")
+    assert mismatch_tags(unknown) == [["unknown goal"], ["unknown goal"]]
+
+def test_rank_indices_uses_tiebreak():
+    result = {"match_score": np.array([0.5, 0.8, 0.5])}
+    assert rank_indices(result, np.array([0.1, 0.0, 0.9])).tolist() == [1, 2, 0]
+
+def test_overrides_match_per_meal_analyzer():
+    meals = _random_meals(200, seed=1)
+    batch = MealBatch.from_meals(meals)
+    overrides = {"min_calories": 300, "max_calories": 900, "min_protein": 30, "max_fat": 40}
+    for goal in FITNESS_GOALS:
+        result = score_batch(batch, goal, overrides)
+        tags = mismatch_tags(result)
+        for i, meal in enumerate(meals):
+            expected = analyze_goal_fit(SimpleNamespace(**meal["nutrition"]), goal, overrides)
+            assert abs(result["match_score"][i] - expected["match_score"]) < 1e-9
+            assert tags[i] == expected["tags"]
+
+def test_profiles_are_cached_and_limits_filter():
+    assert compile_goal_profile("keto", {"max_carbs": 20}) is compile_goal_profile("keto", {"max_carbs": 20.0})
+    assert not compile_goal_profile("keto").has_overrides
+    profile = compile_goal_profile("keto", {"max_carbs": 20})
+    batch = MealBatch(np.array([500, 500, np.nan]), np.array([30, 30, np.nan]), np.array([10, 50, np.nan]), np.array([35, 35, np.nan]))
+    assert within_limits(batch.calories, batch.grams, profile).tolist() == [True, False, True]
+
+def test_topk_matches_full_sort():
+    rng = np.random.default_rng(2)
+    keys = rng.integers(0, 20, size=500).tolist()
+    top = TopK(25)
+    for i, key in enumerate(keys):
+        top.push(key, i)
+    expected = sorted(range(len(keys)), key=lambda i: -keys[i])[:25]
+    assert top.items() == expected
+    assert top.total == 500 and len(top) == 25
+
+def test_all_goal_scores_match_per_goal_scoring():
+    meals = _random_meals(200, seed=3) + [{"name": "unknown"}]
+    batch = MealBatch.from_meals(meals)
+    matrix = score_all_goals(batch)
+    assert matrix.shape == (len(meals), len(GOAL_NAMES))
+    for g, goal in enumerate(GOAL_NAMES):
+        assert np.allclose(matrix[:, g], score_batch(batch, goal)["match_score"])
+    meal = {"goal_scores": matrix[0].tolist()}
+    assert goal_score(meal, "keto") == matrix[0, GOAL_NAMES.index("keto")]
+    assert goal_score(meal, "not_a_goal") is None and goal_score({}, "keto") is None
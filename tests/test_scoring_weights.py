@@ -0,0 +1,56 @@
+import os
+import numpy as np
+from config.config import get_settings
+from scoring.engine import MealBatch, score_all_goals
+from scoring.profiles import compile_goal_profile
+from scoring.tags import tag_mask
+from scoring.weights import WeightsRegistry
+
+def _write(path, calorie, high_protein, mtime):
+    path.write_text(f"scoring:\n  penalties:\n    calorie: {calorie}\n  tag_weights:\n    high_protein: {high_protein}\n")
+    os.utime(path, (mtime, mtime))
+
+def test_reload_swaps_compiled_weights(tmp_path):
+    path = tmp_path / "weights.yaml"
+    _write(path, 0.3, 3, 1000)
+    registry = WeightsRegistry(str(path), check_interval=0)
+    first = registry.current()
+    assert first.calorie_penalty == 0.3 and first.macro_penalty == 0.2
+    assert first.tags.score(tag_mask(["high protein"])) == 3
+    _write(path, 0.5, 7, 2000)
+    second = registry.current()
+    assert second is not first
+    assert second.calorie_penalty == 0.5 and second.tags.score(tag_mask(["high protein"])) == 7
+    # The old snapshot is untouched for readers still holding it
+    assert first.calorie_penalty == 0.3
+    assert registry.current() is second
+
+def test_bad_file_keeps_last_good_weights(tmp_path):
+    path = tmp_path / "weights.yaml"
+    _write(path, 0.4, 3, 1000)
+    registry = WeightsRegistry(str(path), check_interval=0)
+    path.write_text("scoring: [unclosed")
+    os.utime(path, (2000, 2000))
+    assert registry.current().calorie_penalty == 0.4
+
+def test_missing_file_uses_defaults(tmp_path):
+    weights = WeightsRegistry(str(tmp_path / "missing.yaml"), check_interval=0).current()
+    assert weights.calorie_penalty == 0.3 and weights.tags.score(tag_mask(["keto"])) == 3
+
+def test_path_comes_from_settings(tmp_path, monkeypatch):
+    path = tmp_path / "weights.yaml"
+    _write(path, 0.6, 3, 1000)
+    monkeypatch.setenv("SCORING_WEIGHTS_PATH", str(path))
+    get_settings.cache_clear()
+    try:
+        assert WeightsRegistry(check_interval=0).current().calorie_penalty == 0.6
+    finally:
+        get_settings.cache_clear()
+
+def test_snapshot_is_passed_through(tmp_path):
+    path = tmp_path / "weights.yaml"
+    _write(path, 0.9, 3, 1000)
+    weights = WeightsRegistry(str(path), check_interval=0).current()
+    assert compile_goal_profile("keto", weights=weights).calorie_penalty == 0.9
+    batch = MealBatch.from_meals([{"nutrition": {"calories": 5000, "protein": 10, "carbs": 10, "fat": 10}}])
+    assert np.all(score_all_goals(batch, weights) <= 0.1 + 1e-9)
@@ -0,0 +1,28 @@
+import numpy as np
+from scoring.tags import TAG_BITS, TagWeights, canonical_tag, has_all, has_none, mask_array, mask_of, tag_mask, tags_of
+
+def test_canonical_tags():
+    assert canonical_tag("High Protein") == canonical_tag("high-protein") == "high_protein"
+    assert canonical_tag("GF") == "gluten_free"
+    assert canonical_tag("plant based") == "vegan"
+    assert canonical_tag("chef's special") is None
+
+def test_masks_round_trip_and_vectorized_tests():
+    mask = tag_mask(["High Protein", "gluten free", "spicy", "high_protein"])
+    assert mask == TAG_BITS["high_protein"] | TAG_BITS["gluten_free"]
+    assert tags_of(mask) == ["high_protein", "gluten_free"]
+    meals = [{"tags": ["keto", "low carb"]}, {"tags": ["vegan"]}, {"tags": ["keto"], "tag_mask": TAG_BITS["keto"]}]
+    masks = mask_array(meals)
+    assert has_all(masks, mask_of("keto", "low_carb")).tolist() == [True, False, False]
+    assert has_none(masks, mask_of("vegan")).tolist() == [True, False, True]
+
+def test_tag_weights_score_per_mask():
+    weights = TagWeights({"high_protein": 3, "low_carb": 2, "unknown": 9})
+    assert weights.score(tag_mask(["high protein", "low-carb", "healthy"])) == 5
+    assert weights.score(0) == 0
+
+def test_meal_item_mask_is_internal():
+    from app.models import MealItem
+    item = MealItem(name="Steak Salad", tags=["keto", "healthy"], tag_mask=1)
+    assert item.tag_mask == tag_mask(["keto", "healthy"])
+    assert "tag_mask" not in item.model_dump()
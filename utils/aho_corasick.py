@@ -0,0 +1,70 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: every occurrence of every pattern in one pass over
+    the text, independent of the number of patterns.
+
+    Each pattern maps to a value (defaults to the pattern itself) that is
+    reported with its matches.
+    """
+
+    def __init__(self, patterns: Iterable[str] = (), values: Optional[Dict[str, str]] = None):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        values = values or {}
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern, values.get(pattern, pattern))
+        self._build()
+
+    def _add(self, pattern: str, value: str):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), value))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                # Inherit matches that end here via the failure link
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Yield (start, end, value) for every match; end is exclusive."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, value in out[node]:
+                yield i + 1 - length, i + 1, value
+
+    def iter_word_matches(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Like iter_matches, but only matches that start and end on word boundaries."""
+        for start, end, value in self.iter_matches(text):
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < len(text) and text[end].isalnum():
+                continue
+            yield start, end, value
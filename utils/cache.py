@@ -27,8 +27,8 @@ def _file_cache_path(key: str) -> str:
     h = hashlib.sha256(key.encode()).hexdigest()
     return os.path.join(FILE_CACHE_DIR, f'{h}.json')
 
-def get_or_set_cache(key: str, ttl: int, fetch_fn: Callable[[], Any]) -> Any:
-    # Try Redis
+def get_cache(key: str) -> Any:
+    """Return the cached value for key from Redis or the file cache, or None."""
     if redis_client:
         try:
             val = redis_client.get(key)
@@ -36,24 +36,32 @@ def get_or_set_cache(key: str, ttl: int, fetch_fn: Callable[[], Any]) -> Any:
                 return json.loads(val)
         except Exception:
             pass
-    # Try file cache
     path = _file_cache_path(key)
     if os.path.exists(path):
-        with open(path) as f:
-            data = json.load(f)
-            if time.time() < data.get('expires', 0):
-                return data['value']
-    # Fetch and cache
-    value = fetch_fn()
-    # Set Redis
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except Exception:
+            return None
+        if time.time() < data.get('expires', 0):
+            return data['value']
+    return None
+
+def set_cache(key: str, value: Any, ttl: int):
     if redis_client:
         try:
             redis_client.setex(key, ttl, json.dumps(value))
         except Exception:
             pass
-    # Set file cache
-    with open(path, 'w') as f:
+    with open(_file_cache_path(key), 'w') as f:
         json.dump({'value': value, 'expires': time.time() + ttl}, f)
+
+def get_or_set_cache(key: str, ttl: int, fetch_fn: Callable[[], Any]) -> Any:
+    value = get_cache(key)
+    if value is not None:
+        return value
+    value = fetch_fn()
+    set_cache(key, value, ttl)
     return value
 
 def invalidate_cache(key: str):
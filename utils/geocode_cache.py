@@ -0,0 +1,82 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+import structlog
+from utils.cache import CACHE_TTLS, get_cache, set_cache
+
+logger = structlog.get_logger()
+
+GEOCODE_CACHE_PREFIX = "geocode:"
+GEOCODE_TTL = CACHE_TTLS.get('geocode_ttl', 2592000)  # 30 days
+GEOCODE_LRU_SIZE = 1024
+GEOCODE_SEED_PATH = os.getenv('GEOCODE_SEED_PATH', '')
+
+def normalize_address(location: str) -> str:
+    """'  Brooklyn,  NY ' and 'brooklyn ny' map to the same key."""
+    return " ".join(re.sub(r"[^\w]+", " ", location.lower()).split())
+
+class GeocodeCache:
+    """
+    Free-text location -> {"lat", "lng"} cache: in-process LRU in front of
+    the shared Redis/file cache. Only successful lookups are stored.
+    """
+
+    def __init__(self, maxsize: int = GEOCODE_LRU_SIZE, ttl: int = GEOCODE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lru: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, location: str) -> Optional[Dict[str, float]]:
+        key = normalize_address(location)
+        with self._lock:
+            coords = self._lru.get(key)
+            if coords is not None:
+                self._lru.move_to_end(key)
+                return coords
+        coords = get_cache(GEOCODE_CACHE_PREFIX + key)
+        if coords is not None:
+            self._remember(key, coords)
+        return coords
+
+    def set(self, location: str, coords: Dict[str, float]):
+        key = normalize_address(location)
+        coords = {"lat": float(coords["lat"]), "lng": float(coords["lng"])}
+        set_cache(GEOCODE_CACHE_PREFIX + key, coords, self.ttl)
+        self._remember(key, coords)
+
+    def get_or_fetch(self, location: str, fetch_fn: Callable[[str], Optional[Dict[str, float]]]) -> Optional[Dict[str, float]]:
+        coords = self.get(location)
+        if coords is not None:
+            return coords
+        coords = fetch_fn(location)
+        if coords:
+            self.set(location, coords)
+        return coords
+
+    def seed_from_file(self, path: str) -> int:
+        """Bulk-load {"location": {"lat": .., "lng": ..}} pairs from a JSON file."""
+        with open(path, "r") as f:
+            entries: Dict[str, Any] = json.load(f)
+        for location, coords in entries.items():
+            self.set(location, coords)
+        logger.info("geocode_cache.seeded", path=path, count=len(entries))
+        return len(entries)
+
+    def _remember(self, key: str, coords: Dict[str, float]):
+        with self._lock:
+            self._lru[key] = coords
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+geocode_cache = GeocodeCache()
+
+if GEOCODE_SEED_PATH:
+    try:
+        geocode_cache.seed_from_file(GEOCODE_SEED_PATH)
+    except Exception as e:
+        logger.warn("geocode_cache.seed_failed", path=GEOCODE_SEED_PATH, error=str(e))
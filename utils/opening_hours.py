@@ -0,0 +1,34 @@
+import time
+from typing import Any, Dict, List, Optional
+
+MINUTES_PER_WEEK = 7 * 24 * 60
+
+def _minute_of_week(point: Dict[str, Any]) -> int:
+    # Google periods count days from Sunday (0) and give times as "HHMM"
+    hhmm = str(point.get("time", "0000")).zfill(4)
+    return int(point.get("day", 0)) * 1440 + int(hhmm[:2]) * 60 + int(hhmm[2:])
+
+def open_now(periods: List[Dict[str, Any]], utc_offset_minutes: int, now: Optional[float] = None) -> Optional[bool]:
+    """
+    open_now from a place's opening_hours periods and UTC offset, so it can
+    be recomputed locally instead of asking Place Details again. None when
+    there are no periods to go on.
+    """
+    if not periods:
+        return None
+    local = time.gmtime((now or time.time()) + utc_offset_minutes * 60)
+    minute = ((local.tm_wday + 1) % 7) * 1440 + local.tm_hour * 60 + local.tm_min
+    for period in periods:
+        start = period.get("open")
+        if not start:
+            continue
+        end = period.get("close")
+        if not end:
+            # Open around the clock
+            return True
+        opens, closes = _minute_of_week(start), _minute_of_week(end)
+        if closes <= opens:
+            closes += MINUTES_PER_WEEK
+        if opens <= minute < closes or opens <= minute + MINUTES_PER_WEEK < closes:
+            return True
+    return False